@@ -0,0 +1,128 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Hashable
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """LRU cache of generated answers, looked up by query embedding similarity.
+
+    An entry matches a new query when the cosine similarity of their query
+    embeddings reaches the threshold and both were asked in the same context
+    (procedure step, search filters). Entries remember the sources of the
+    chunks they were answered from and are dropped when one of those sources
+    changes, after ttl_seconds, or when the cache is over max_entries.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self.invalidations = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float):
+        expired = [entry_id for entry_id, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        self.expirations += len(expired)
+
+    def lookup(self, query_embedding, context_key: Hashable = None) -> Optional[Dict[str, Any]]:
+        """Return the cached response of the most similar matching entry, or None"""
+        query_vector = self._normalize(query_embedding)
+        with self._lock:
+            self._expire(time.time())
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry["context_key"] == context_key
+            ]
+            if candidates:
+                similarities = np.stack([entry["embedding"] for _, entry in candidates]) @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_tokens += entry["tokens"]
+                    return dict(entry["response"], cache_similarity=round(float(similarities[best]), 4))
+            self.misses += 1
+            return None
+
+    def store(self, query_embedding, response: Dict[str, Any], sources: List[str], chunk_ids: List[str],
+              tokens: int = 0, context_key: Hashable = None):
+        """Cache a response together with the sources and chunk ids it was generated from"""
+        with self._lock:
+            self._entries[self._next_id] = {
+                "embedding": self._normalize(query_embedding),
+                "context_key": context_key,
+                "response": response,
+                "sources": set(sources),
+                "chunk_ids": set(chunk_ids),
+                "tokens": tokens,
+                "created_at": time.time()
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_sources(self, sources: Optional[List[str]]):
+        """Drop entries answered from any of the sources (all entries when sources is None).
+
+        Entries answered without any retrieved context are dropped on every
+        change, since new content may now answer them.
+        """
+        with self._lock:
+            if sources is None:
+                doomed = list(self._entries)
+            else:
+                changed = set(sources)
+                doomed = [
+                    entry_id for entry_id, entry in self._entries.items()
+                    if not entry["sources"] or entry["sources"] & changed
+                ]
+            for entry_id in doomed:
+                del self._entries[entry_id]
+            self.invalidations += len(doomed)
+        if doomed:
+            logger.info(f"Answer cache: invalidated {len(doomed)} entries")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_tokens": self.saved_tokens,
+                "invalidations": self.invalidations,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,138 @@
+"""
+Benchmark corpora: labeled SOP chunks plus queries with their relevant chunks.
+
+A corpus is a dict:
+    {
+        "name": str,
+        "documents": [{"source": str, "file_type": str, "chunks": [str, ...]}],
+        "queries": [{"query": str, "relevant": ["<source>#<chunk index>", ...]}]
+    }
+
+Chunks are passed to RAGEngine.add_documents as-is (no DocumentProcessor), so
+relevance labels stay stable when the chunker changes.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import List, Dict, Any
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+
+EQUIPMENT = [
+    "centrifugal pump", "air compressor", "boiler feed pump", "cooling tower fan", "hydraulic press",
+    "conveyor belt", "forklift", "overhead crane", "diesel generator", "heat exchanger",
+    "chiller unit", "steam turbine", "gearbox", "mixing tank", "packaging line",
+    "CNC lathe", "welding robot", "paint booth", "kiln", "water softener",
+    "filter press", "vacuum pump", "control valve", "transformer", "switchgear panel",
+    "ammonia refrigeration skid", "dust collector", "spray dryer", "autoclave", "bottling filler"
+]
+
+PROCEDURES = [
+    ("lockout", "isolate all energy sources and apply personal locks and tags to the {equipment}",
+     ["lockout", "tagout", "isolate", "energy"]),
+    ("startup", "verify guards are in place, prime the system and start the {equipment} at low load",
+     ["start", "startup", "prime", "guards"]),
+    ("shutdown", "reduce load gradually, stop the {equipment} and record the run hours",
+     ["shutdown", "stop", "run hours"]),
+    ("inspection", "inspect the {equipment} for leaks, cracks, loose fasteners and abnormal noise",
+     ["inspect", "leaks", "cracks", "noise"]),
+    ("lubrication", "apply the specified grease to every fitting on the {equipment} and wipe off excess",
+     ["lubricate", "grease", "fittings"]),
+    ("calibration", "calibrate the {equipment} sensors against the reference gauge and log the offsets",
+     ["calibrate", "sensors", "gauge", "offsets"]),
+    ("cleaning", "flush the {equipment} with approved detergent and rinse until the water runs clear",
+     ["clean", "flush", "detergent", "rinse"]),
+    ("emergency", "press the emergency stop on the {equipment}, evacuate the area and call the shift supervisor",
+     ["emergency", "evacuate", "supervisor"]),
+    ("filter replacement", "remove the old filter element from the {equipment} and install a new one",
+     ["filter", "replace", "element"]),
+    ("troubleshooting", "check the alarm codes of the {equipment} and follow the fault tree before resetting",
+     ["troubleshoot", "alarm codes", "fault"])
+]
+
+QUERY_TEMPLATES = [
+    "How do I perform {procedure} on the {equipment}?",
+    "What is the {procedure} procedure for the {equipment}?",
+    "{equipment} {keyword} steps",
+    "Steps to {keyword} the {equipment}"
+]
+
+
+def synthetic_corpus(documents: int = 30, procedures_per_document: int = 10, queries: int = 200,
+                     seed: int = 7) -> Dict[str, Any]:
+    """Deterministic SOP-like corpus: one document per equipment, one chunk per procedure.
+
+    Every chunk shares its procedure wording with the same procedure of the
+    other equipment, so retrieval has to match both the equipment and the task.
+    """
+    rng = random.Random(seed)
+    equipment_names = [
+        EQUIPMENT[i % len(EQUIPMENT)] + ("" if i < len(EQUIPMENT) else f" unit {i // len(EQUIPMENT) + 1}")
+        for i in range(documents)
+    ]
+    procedures = PROCEDURES[:min(procedures_per_document, len(PROCEDURES))]
+
+    corpus_documents = []
+    for equipment in equipment_names:
+        source = equipment.replace(" ", "_") + "_sop.md"
+        chunks = []
+        for procedure, instruction, _ in procedures:
+            torque = rng.randint(20, 120)
+            interval = rng.choice(["daily", "weekly", "monthly", "quarterly"])
+            chunks.append(
+                f"{procedure.title()} procedure for the {equipment}. "
+                f"Step 1: {instruction.format(equipment=equipment)}. "
+                f"Step 2: torque the cover bolts to {torque} Nm. "
+                f"Perform this {interval}. "
+                f"Warning: wear gloves and safety glasses."
+            )
+        corpus_documents.append({"source": source, "file_type": ".md", "chunks": chunks})
+
+    corpus_queries = []
+    for _ in range(queries):
+        document_index = rng.randrange(len(corpus_documents))
+        procedure_index = rng.randrange(len(procedures))
+        procedure, _, keywords = procedures[procedure_index]
+        corpus_queries.append({
+            "query": rng.choice(QUERY_TEMPLATES).format(
+                procedure=procedure,
+                equipment=equipment_names[document_index],
+                keyword=rng.choice(keywords)
+            ),
+            "relevant": [f"{corpus_documents[document_index]['source']}#{procedure_index}"]
+        })
+
+    return {"name": f"synthetic-{documents}x{len(procedures)}-seed{seed}", "documents": corpus_documents,
+            "queries": corpus_queries}
+
+
+def load_corpus(path: str) -> Dict[str, Any]:
+    """Load a corpus JSON file (see benchmarks/fixtures/sop_fixture.json)"""
+    with open(path, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    corpus.setdefault("name", Path(path).stem)
+    return corpus
+
+
+def fixture_corpus() -> Dict[str, Any]:
+    return load_corpus(str(FIXTURE_DIR / "sop_fixture.json"))
+
+
+def corpus_chunks(corpus: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """RAGEngine.add_documents payloads, one list per source document"""
+    payloads = []
+    for document in corpus["documents"]:
+        payloads.append([
+            {
+                "text": text,
+                "source": document["source"],
+                "chunk_id": i,
+                "file_type": document.get("file_type", ".md"),
+                "chunk_size": len(text),
+                "steps": [],
+                "safety_notes": []
+            }
+            for i, text in enumerate(document["chunks"])
+        ])
+    return payloads
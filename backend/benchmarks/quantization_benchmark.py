@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Memory / recall benchmark for quantized vector storage in the NumPy index.
+
+Builds the same synthetic corpus with float32, float16 and int8 storage
+(with and without exact re-scoring) and compares each against exact float32
+brute-force search. Prints one JSON document with RAM, on-disk size (snapshot
+plus the exact re-scoring copy), recall@k and latency.
+
+Usage:
+    python benchmarks/quantization_benchmark.py --vectors 200000 --dim 384
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add backend directory to Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from vector_index import NumpyCollection
+
+
+def make_corpus(n_vectors: int, dim: int, n_clusters: int, seed: int) -> np.ndarray:
+    """Clustered unit vectors, closer to real sentence embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    assignments = rng.integers(0, n_clusters, n_vectors)
+    vectors = centers[assignments] + 0.6 * rng.standard_normal((n_vectors, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top
+
+
+def disk_bytes(directory: str) -> int:
+    return sum(path.stat().st_size for path in Path(directory).iterdir() if path.is_file())
+
+
+def run_config(corpus, queries, truth, ids, k, dtype, rescore_factor, workdir):
+    persist_dir = os.path.join(workdir, f"{dtype}_{rescore_factor}")
+    collection = NumpyCollection(
+        f"bench_{dtype}_{rescore_factor}",
+        persist_dir=persist_dir,
+        dtype=dtype,
+        rescore_factor=rescore_factor
+    )
+    collection.add(ids=ids, embeddings=corpus)
+
+    latencies = []
+    recalls = []
+    for query_vector, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query_vector], n_results=k, include=['distances'])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        found = {int(doc_id) for doc_id in result["ids"][0]}
+        recalls.append(len(found & {int(i) for i in expected}) / k)
+    collection.close()
+
+    return {
+        "dtype": dtype,
+        "rescore_factor": rescore_factor,
+        "vector_ram_mb": round(collection.memory_bytes() / (1024 * 1024), 2),
+        "disk_mb": round(disk_bytes(persist_dir) / (1024 * 1024), 2),
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.vectors, args.dim, args.clusters, args.seed)
+    queries = make_corpus(args.queries, args.dim, args.clusters, args.seed + 1)
+    truth = exact_top_k(corpus, queries, args.k)
+    ids = [str(i) for i in range(args.vectors)]
+
+    configs = [("float32", 0), ("float16", 0), ("float16", 4), ("int8", 0), ("int8", 4)]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for dtype, rescore_factor in configs:
+            results.append(run_config(corpus, queries, truth, ids, args.k, dtype, rescore_factor, workdir))
+
+    print(json.dumps({
+        "benchmark": "vector_storage_quantization",
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality / latency benchmark for RAGEngine.
+
+Ingests a labeled corpus into a throw-away vector store, runs every query
+through search_documents and prints one JSON document with recall@k, MRR,
+search latency percentiles, ingest throughput and peak RSS. Keys are sorted
+so results of two commits can be diffed directly.
+
+Runs offline by default: NumPy vector backend, no knowledge graph, no
+re-ranker and a deterministic hashing embedder. Pass --model to benchmark a
+real sentence-transformers model instead. Retrieval settings (HYBRID_SEARCH,
+MMR_ENABLED, SMALL_TO_BIG, ...) are read from the environment as usual.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py --corpus fixture
+    python benchmarks/retrieval_benchmark.py --corpus synthetic --documents 200 --output before.json
+    HYBRID_SEARCH=false python benchmarks/retrieval_benchmark.py --corpus synthetic --output dense.json
+    # Unscoped query latency over many per-source partitions
+    python benchmarks/retrieval_benchmark.py --corpus synthetic --documents 500 --partitioning source
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Offline defaults; explicit environment settings win
+os.environ.setdefault("VECTOR_BACKEND", "numpy")
+os.environ.setdefault("KG_ENABLED", "false")
+os.environ.setdefault("RERANK_ENABLED", "false")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("VECTOR_PARTITIONING", "none")
+
+# Add backend directory to Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from rag_engine import RAGEngine
+from corpora import synthetic_corpus, fixture_corpus, load_corpus, corpus_chunks
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words encoder with the SentenceTransformer surface RAGEngine uses.
+
+    Unigrams and bigrams are hashed into signed buckets and L2-normalized. It
+    has no semantic knowledge, but needs no download and gives stable scores.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _bucket(self, token: str):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimension, 1.0 if value >> 63 else -1.0
+
+    def encode(self, texts, show_progress_bar: bool = False, batch_size: int = 32, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            for token in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                bucket, sign = self._bucket(token)
+                vectors[row, bucket] += sign
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def percentile_ms(latencies: List[float], q: float) -> float:
+    return round(float(np.percentile(latencies, q)), 3) if latencies else 0.0
+
+
+def result_label(result: Dict[str, Any]) -> str:
+    metadata = result.get("metadata") or {}
+    return f"{metadata.get('source')}#{metadata.get('chunk_id')}"
+
+
+def run_benchmark(engine: RAGEngine, corpus: Dict[str, Any], ks: List[int]) -> Dict[str, Any]:
+    payloads = corpus_chunks(corpus)
+    total_chunks = sum(len(payload) for payload in payloads)
+
+    ingest_start = time.perf_counter()
+    for payload in payloads:
+        result = engine.add_documents(payload)
+        if result["status"] != "success":
+            raise RuntimeError(result.get("message", "add_documents failed"))
+    ingest_seconds = time.perf_counter() - ingest_start
+    rss_after_ingest = peak_rss_mb()
+
+    # One untimed query so lazy initialization is not billed to the first labeled query
+    engine.search_documents("warm up query", n_results=max(ks))
+
+    latencies = []
+    hits_at = {k: [] for k in ks}
+    reciprocal_ranks = []
+    for labeled in corpus["queries"]:
+        relevant = set(labeled["relevant"])
+        start = time.perf_counter()
+        results = engine.search_documents(labeled["query"], n_results=max(ks))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [result_label(result) for result in results]
+        for k in ks:
+            hits_at[k].append(len(relevant & set(ranked[:k])) / len(relevant))
+        rank = next((i + 1 for i, label in enumerate(ranked) if label in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    quality = {f"recall@{k}": round(float(np.mean(hits_at[k])), 4) for k in ks}
+    quality["mrr"] = round(float(np.mean(reciprocal_ranks)), 4)
+
+    return {
+        "corpus": {
+            "name": corpus["name"],
+            "documents": len(payloads),
+            "chunks": total_chunks,
+            "queries": len(corpus["queries"])
+        },
+        "quality": quality,
+        "search_latency_ms": {
+            "p50": percentile_ms(latencies, 50),
+            "p95": percentile_ms(latencies, 95),
+            "p99": percentile_ms(latencies, 99),
+            "mean": round(float(np.mean(latencies)), 3) if latencies else 0.0
+        },
+        "ingest": {
+            "seconds": round(ingest_seconds, 3),
+            "chunks_per_sec": round(total_chunks / ingest_seconds, 1) if ingest_seconds else 0.0
+        },
+        "peak_rss_mb": {"after_ingest": rss_after_ingest, "after_search": peak_rss_mb()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAGEngine retrieval quality and latency")
+    parser.add_argument("--corpus", default="fixture",
+                        help="'fixture', 'synthetic', or the path of a corpus JSON file")
+    parser.add_argument("--documents", type=int, default=30, help="Synthetic corpus: number of documents")
+    parser.add_argument("--procedures", type=int, default=10, help="Synthetic corpus: chunks per document")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic corpus: number of queries")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="Cut-offs for recall@k")
+    parser.add_argument("--model", default=None,
+                        help="sentence-transformers model to use instead of the offline hashing embedder")
+    parser.add_argument("--dim", type=int, default=384, help="Hashing embedder dimension")
+    parser.add_argument("--partitioning", choices=["none", "source"], default=None,
+                        help="VECTOR_PARTITIONING for this run (source: one collection per document)")
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Keep INFO logging from the engine")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    if args.partitioning:
+        os.environ["VECTOR_PARTITIONING"] = args.partitioning
+
+    if args.corpus == "fixture":
+        corpus = fixture_corpus()
+    elif args.corpus == "synthetic":
+        corpus = synthetic_corpus(args.documents, args.procedures, args.queries, args.seed)
+    else:
+        corpus = load_corpus(args.corpus)
+
+    if args.model:
+        embedding_model, model_name = None, args.model
+    else:
+        embedding_model, model_name = HashingEmbedder(args.dim), f"hashing-{args.dim}"
+
+    with tempfile.TemporaryDirectory() as db_path:
+        engine = RAGEngine(
+            db_path=db_path,
+            collection_name="benchmark",
+            embedding_model_name=model_name,
+            embedding_model=embedding_model
+        )
+        try:
+            report = run_benchmark(engine, corpus, sorted(set(args.k)))
+            report["config"] = {
+                "embedding_model": model_name,
+                "vector_backend": engine.vector_backend,
+                "vector_index_dtype": os.getenv("VECTOR_INDEX_DTYPE", "float32"),
+                "vector_partitioning": engine.vector_partitioning,
+                "partition_query_workers": getattr(engine.collection, "query_workers", None),
+                "hybrid_search": engine.hybrid_search,
+                "rerank": engine.rerank_enabled,
+                "mmr": engine.mmr_enabled,
+                "small_to_big": engine.small_to_big,
+                "knowledge_graph": engine.kg_available
+            }
+        finally:
+            engine.close()
+
+    report["benchmark"] = "retrieval"
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
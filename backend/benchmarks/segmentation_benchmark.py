@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the sentence segmentation backends used by the chunker.
+
+Builds page-sized text blocks from the synthetic SOP corpus (or reads a text
+file), segments them with every requested SEGMENTATION_BACKEND and n_process
+setting and prints one JSON document with pages/sec, chars/sec, sentence
+counts and how many sentence boundaries agree with the first backend.
+Backends whose spaCy pipeline cannot be loaded are reported as unavailable.
+
+Usage:
+    python benchmarks/segmentation_benchmark.py --pages 500
+    python benchmarks/segmentation_benchmark.py --backends full sentencizer --n-process 1 4
+    python benchmarks/segmentation_benchmark.py --text manual.txt --output segmentation.json
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any
+
+# Add backend directory to Python path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sentence_segmenter import SentenceSegmenter, SEGMENTATION_BACKENDS
+from corpora import synthetic_corpus
+
+
+def synthetic_pages(n_pages: int, page_chars: int, seed: int) -> List[str]:
+    """Page-sized blocks of SOP prose, numbered like DocumentProcessor's PDF pages"""
+    corpus = synthetic_corpus(documents=max(1, n_pages // 10), procedures_per_document=10, queries=1, seed=seed)
+    sentences = [chunk for document in corpus["documents"] for chunk in document["chunks"]]
+    pages, current = [], ""
+    i = 0
+    while len(pages) < n_pages:
+        current += sentences[i % len(sentences)] + (" " if i % 5 else "\n\n")
+        i += 1
+        if len(current) >= page_chars:
+            pages.append(f"\n--- Page {len(pages) + 1} ---\n" + current + "\n")
+            current = ""
+    return pages
+
+
+def text_pages(path: str, page_chars: int) -> List[str]:
+    text = Path(path).read_text(encoding="utf-8")
+    return [text[i:i + page_chars] for i in range(0, len(text), page_chars)]
+
+
+def boundaries(sentences: List[str]) -> set:
+    """Character offsets (ignoring whitespace) where sentences end"""
+    offsets, position = set(), 0
+    for sentence in sentences:
+        position += len("".join(sentence.split()))
+        offsets.add(position)
+    return offsets
+
+
+def run_backend(backend: str, n_process: int, batch_size: int, pages: List[str]) -> Dict[str, Any]:
+    load_start = time.perf_counter()
+    segmenter = SentenceSegmenter(backend=backend, n_process=n_process, batch_size=batch_size)
+    load_seconds = time.perf_counter() - load_start
+    if backend != "none" and not segmenter.available:
+        return {"backend": backend, "n_process": n_process, "available": False}
+
+    start = time.perf_counter()
+    sentences = list(segmenter.sentences(pages))
+    seconds = time.perf_counter() - start
+    chars = sum(len(page) for page in pages)
+    return {
+        "backend": backend,
+        "n_process": n_process,
+        "available": True,
+        "pipeline": segmenter.nlp.pipe_names if segmenter.nlp else [],
+        "load_seconds": round(load_seconds, 3),
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(len(pages) / seconds, 1) if seconds else 0.0,
+        "chars_per_sec": round(chars / seconds) if seconds else 0,
+        "sentences": len(sentences),
+        "_sentences": sentences
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentence segmentation backends")
+    parser.add_argument("--backends", nargs="+", default=list(SEGMENTATION_BACKENDS), choices=SEGMENTATION_BACKENDS)
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1], help="nlp.pipe worker process counts")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic corpus: number of pages")
+    parser.add_argument("--page-chars", type=int, default=3000)
+    parser.add_argument("--text", default=None, help="Segment this text file instead of the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    pages = text_pages(args.text, args.page_chars) if args.text else synthetic_pages(args.pages, args.page_chars, args.seed)
+
+    runs = [
+        run_backend(backend, n_process, args.batch_size, pages)
+        for backend in args.backends
+        for n_process in (args.n_process if backend != "none" else [1])
+    ]
+
+    # Boundary agreement against the first available backend (the most accurate one listed first)
+    available = [run for run in runs if run["available"]]
+    if available:
+        reference = boundaries(available[0]["_sentences"])
+        for run in available:
+            found = boundaries(run.pop("_sentences"))
+            run["boundary_agreement"] = {
+                "reference": available[0]["backend"],
+                "f1": round(2 * len(found & reference) / (len(found) + len(reference)), 4) if found or reference else 1.0
+            }
+
+    report = {
+        "benchmark": "segmentation",
+        "corpus": {"pages": len(pages), "chars": sum(len(page) for page in pages), "text": args.text or "synthetic"},
+        "runs": runs
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
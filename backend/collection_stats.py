@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CollectionStats:
+    """Per-source / per-file-type chunk counters kept next to the vector store.
+
+    The counters are updated on every add and delete, so stats endpoints read
+    O(#sources) rows instead of scanning collection metadata. Every update
+    also bumps a change version and records which sources changed at it, so
+    all workers sharing the file can tell what changed since they last looked.
+    """
+
+    def __init__(self, stats_path: str):
+        self.stats_path = stats_path
+        os.makedirs(os.path.dirname(os.path.abspath(stats_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(stats_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS source_counts (
+                source TEXT NOT NULL,
+                file_type TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                PRIMARY KEY (source, file_type)
+            );
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS source_changes (source TEXT PRIMARY KEY, version INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta VALUES ('version', '0');
+            INSERT OR IGNORE INTO meta VALUES ('cleared_version', '0');
+        """)
+        self._conn.commit()
+
+    def _group(self, metadatas: Iterable[Dict]) -> Dict[tuple, int]:
+        counts = {}
+        for metadata in metadatas:
+            metadata = metadata or {}
+            key = (metadata.get('source', 'unknown'), metadata.get('file_type', 'unknown'))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def _bump_version(self, sources: Optional[Iterable[str]]):
+        """Advance the change version for these sources (None: everything); caller holds the lock and commits"""
+        # The UPDATE takes the database write lock, so concurrent workers get distinct versions
+        self._conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE name = 'version'")
+        version = int(self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()[0])
+        if sources is None:
+            self._conn.execute("UPDATE meta SET value = ? WHERE name = 'cleared_version'", (str(version),))
+            self._conn.execute("DELETE FROM source_changes")
+        else:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO source_changes (source, version) VALUES (?, ?)",
+                [(source, version) for source in set(sources)]
+            )
+
+    def version(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()[0])
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[List[str]]]:
+        """(current version, sources changed after version); sources is None if everything may have changed"""
+        with self._lock:
+            meta = dict(self._conn.execute(
+                "SELECT name, value FROM meta WHERE name IN ('version', 'cleared_version')"
+            ).fetchall())
+            current, cleared = int(meta['version']), int(meta['cleared_version'])
+            if current == version:
+                return current, []
+            if cleared > version or current < version:
+                return current, None
+            return current, [source for (source,) in self._conn.execute(
+                "SELECT source FROM source_changes WHERE version > ?", (version,)
+            )]
+
+    def add(self, metadatas: List[Dict]):
+        """Count newly stored chunks"""
+        counts = self._group(metadatas)
+        if not counts:
+            return
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO source_counts (source, file_type, chunk_count) VALUES (?, ?, ?)
+                ON CONFLICT (source, file_type) DO UPDATE SET chunk_count = chunk_count + excluded.chunk_count
+            """, [(source, file_type, count) for (source, file_type), count in counts.items()])
+            self._bump_version(source for source, _ in counts)
+            self._conn.commit()
+
+    def remove(self, metadatas: List[Dict]):
+        """Uncount deleted chunks"""
+        counts = self._group(metadatas)
+        if not counts:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE source_counts SET chunk_count = MAX(chunk_count - ?, 0) WHERE source = ? AND file_type = ?",
+                [(count, source, file_type) for (source, file_type), count in counts.items()]
+            )
+            self._conn.execute("DELETE FROM source_counts WHERE chunk_count = 0")
+            self._bump_version(source for source, _ in counts)
+            self._conn.commit()
+
+    def remove_source(self, source: str):
+        """Drop all counters of a source"""
+        with self._lock:
+            self._conn.execute("DELETE FROM source_counts WHERE source = ?", (source,))
+            self._bump_version([source])
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM source_counts")
+            self._bump_version(None)
+            self._conn.commit()
+
+    def total(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM source_counts").fetchone()[0]
+
+    def get_source_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT source, SUM(chunk_count) FROM source_counts GROUP BY source"
+            ).fetchall())
+
+    def get_file_type_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT file_type, SUM(chunk_count) FROM source_counts GROUP BY file_type"
+            ).fetchall())
+
+    def get_source_count(self, source: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(chunk_count), 0) FROM source_counts WHERE source = ?", (source,)
+            ).fetchone()[0]
+
+    def is_initialized(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM meta WHERE name = 'initialized'").fetchone() is not None
+
+    def mark_initialized(self):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('initialized', '1')")
+            self._conn.commit()
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing collection stats: {e}")
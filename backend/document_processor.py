@@ -4,28 +4,43 @@ import PyPDF2
 from docx import Document
 import markdown
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator
 import magic
 import logging
 import re
-try:
-    import spacy
-    nlp = spacy.load('en_core_web_sm')
-except Exception:
-    nlp = None
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pdf_extraction import extract_page_range
+from feature_extractor import FeatureExtractor
+from sentence_segmenter import SentenceSegmenter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
-    def __init__(self):
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+        self.chunk_size = chunk_size or int(os.getenv('CHUNK_SIZE', 1000))
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else int(os.getenv('CHUNK_OVERLAP', 200))
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=int(os.getenv('CHUNK_SIZE', 1000)),
-            chunk_overlap=int(os.getenv('CHUNK_OVERLAP', 200)),
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
         )
         self.allowed_extensions = os.getenv('ALLOWED_EXTENSIONS', '.pdf,.docx,.md,.txt').split(',')
+        # Chunk metadata features, all patterns and vocabularies compiled once
+        self.feature_extractor = FeatureExtractor.from_config()
+        # Sentence segmentation pipeline (SEGMENTATION_BACKEND), loaded once per process and shared
+        self.segmenter = SentenceSegmenter.from_config()
+        # Small-to-big: embed sentence-level children, keep the regular chunks as parent windows
+        self.small_to_big = os.getenv('SMALL_TO_BIG', 'false').lower() == 'true'
+        self.child_chunk_size = int(os.getenv('CHILD_CHUNK_SIZE', 250))
+        # Chunks per batch handed to the RAG engine when a document is streamed (see iter_chunk_batches)
+        self.ingest_batch_size = int(os.getenv('INGEST_BATCH_CHUNKS', 256))
+        # Parallel PDF text extraction for long documents (PyPDF2 is pure Python and CPU-bound)
+        self.pdf_extract_workers = int(os.getenv('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+        self.pdf_parallel_min_pages = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 64))
+        self.pdf_pages_per_task = int(os.getenv('PDF_PAGES_PER_TASK', 16))
     
     def validate_file(self, file_path: str) -> bool:
         """Validate file type and size"""
@@ -46,35 +61,41 @@ class DocumentProcessor:
     
     def process_document(self, file_path: str) -> List[Dict]:
         """Process document and return chunks with metadata, preserving section structure and extracting definitions/tools/materials."""
+        doc_chunks = [chunk for batch in self.iter_chunk_batches(file_path) for chunk in batch]
+        logger.info(f"Successfully processed {Path(file_path).name} into {len(doc_chunks)} indexed chunks")
+        return doc_chunks
+    
+    def iter_chunk_batches(self, file_path: str, batch_size: int = None) -> Iterator[List[Dict]]:
+        """Yield the document's chunks in batches of about batch_size as they are produced.
+        
+        PDFs are read page by page into an incremental chunker, so memory stays
+        bounded by the batch size rather than the document length.
+        """
         try:
             if not self.validate_file(file_path):
                 raise ValueError("File validation failed")
+            batch_size = batch_size or self.ingest_batch_size
             file_ext = Path(file_path).suffix.lower()
             if file_ext == '.pdf':
-                text = self._extract_pdf(file_path)
-            elif file_ext == '.docx':
-                text = self._extract_docx(file_path)
-            elif file_ext in ['.md', '.markdown']:
-                text = self._extract_markdown(file_path)
-            elif file_ext == '.txt':
-                text = self._extract_text(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
-            if not text.strip():
-                raise ValueError("No text content found in document")
-            # Extract sections/headings
-            sections = self._extract_sections(text, file_ext)
-            # Use sentence-based or semantic splitting if possible
-            if nlp:
-                doc = nlp(text)
-                sentences = [sent.text for sent in doc.sents]
-                chunks = self._semantic_split(sentences)
+                # PDF pages carry no heading structure, so there are no sections to look up
+                blocks, sections = self._iter_pdf_pages(file_path), []
             else:
-                chunks = self.text_splitter.split_text(text)
-            doc_chunks = []
-            for i, chunk in enumerate(chunks):
+                if file_ext == '.docx':
+                    text = self._extract_docx(file_path)
+                elif file_ext in ['.md', '.markdown']:
+                    text = self._extract_markdown(file_path)
+                elif file_ext == '.txt':
+                    text = self._extract_text(file_path)
+                else:
+                    raise ValueError(f"Unsupported file format: {file_ext}")
+                # Extract sections/headings
+                blocks, sections = [text], self._extract_sections(text, file_ext)
+            
+            batch = []
+            emitted = 0
+            for i, chunk in enumerate(self._incremental_chunks(blocks)):
                 section = self._find_section_for_chunk(chunk, sections)
-                doc_chunks.append({
+                doc_chunk = {
                     'text': chunk,
                     'chunk_id': i,
                     'source': Path(file_path).name,
@@ -82,35 +103,88 @@ class DocumentProcessor:
                     'file_path': file_path,
                     'chunk_size': len(chunk),
                     'section': section,
-                    'steps': self._extract_steps(chunk),
-                    'safety_notes': self._extract_safety_notes(chunk),
-                    'technical_concepts': self._extract_technical_concepts(chunk),
-                    'statistical_figures': self._extract_statistical_figures(chunk),
-                    'graph_references': self._extract_graph_references(chunk),
-                    'definitions': self._extract_definitions(chunk),
-                    'tools': self._extract_tools(chunk),
-                    'materials': self._extract_materials(chunk),
+                    # steps, safety_notes, technical_concepts, statistical_figures, graph_references,
+                    # definitions, tools, materials (+ any configured vocabulary)
+                    **self.feature_extractor.extract(chunk),
                     'embedding': None
-                })
-            logger.info(f"Successfully processed {Path(file_path).name} into {len(chunks)} chunks")
-            return doc_chunks
+                }
+                if self.small_to_big:
+                    batch.extend(self._child_chunks(doc_chunk, first_child_id=emitted + len(batch)))
+                else:
+                    batch.append(doc_chunk)
+                if len(batch) >= batch_size:
+                    yield batch
+                    emitted += len(batch)
+                    batch = []
+            if batch:
+                yield batch
+                emitted += len(batch)
+            if not emitted:
+                raise ValueError("No text content found in document")
         except Exception as e:
             logger.error(f"Error processing document {file_path}: {str(e)}")
             raise
     
-    def _extract_pdf(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
+    def _incremental_chunks(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Chunk text that arrives in blocks (e.g. PDF pages) without joining it into one string"""
+        if self.segmenter.available:
+            # Blocks are segmented in nlp.pipe batches, so only one batch of spaCy Docs is alive at a time
+            sentences = self.segmenter.sentences(blocks)
+            for chunk in self._group_sentences(sentences, max_chunk_size=self.chunk_size):
+                if chunk.strip():
+                    yield chunk
+            return
+        
+        buffer = ''
+        for block in blocks:
+            buffer += block
+            if len(buffer) >= 4 * self.chunk_size:
+                # Emit all but the last piece; it may continue on the next block
+                pieces = self.text_splitter.split_text(buffer)
+                yield from pieces[:-1]
+                buffer = pieces[-1] if pieces else ''
+        if buffer.strip():
+            yield from self.text_splitter.split_text(buffer)
+    
+    def _iter_pdf_pages(self, file_path: str) -> Iterator[str]:
+        """Yield the text of each PDF page with its page marker, in page order"""
         try:
             with open(file_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- Page {page_num + 1} ---\n" + page_text + "\n"
+                page_count = len(reader.pages)
+                parallel = self.pdf_extract_workers > 1 and page_count >= self.pdf_parallel_min_pages
+                if not parallel:
+                    for page_num, page in enumerate(reader.pages):
+                        page_text = page.extract_text()
+                        if page_text:
+                            yield f"\n--- Page {page_num + 1} ---\n" + page_text + "\n"
+            if parallel:
+                yield from self._iter_pdf_pages_parallel(file_path, page_count)
         except Exception as e:
             raise ValueError(f"Error reading PDF: {str(e)}")
-        return text
+    
+    def _iter_pdf_pages_parallel(self, file_path: str, page_count: int) -> Iterator[str]:
+        """Extract page ranges in worker processes; map() hands results back in page order"""
+        starts = list(range(0, page_count, self.pdf_pages_per_task))
+        workers = min(self.pdf_extract_workers, len(starts))
+        logger.info(f"Extracting {page_count} PDF pages with {workers} worker processes")
+        # Spawned, not forked: ingest runs on an executor thread of a process that has torch and spaCy
+        # loaded, and fresh workers only import pdf_extraction
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            page_ranges = executor.map(
+                extract_page_range,
+                [file_path] * len(starts),
+                starts,
+                [start + self.pdf_pages_per_task for start in starts]
+            )
+            for start, page_texts in zip(starts, page_ranges):
+                for offset, page_text in enumerate(page_texts):
+                    if page_text:
+                        yield f"\n--- Page {start + offset + 1} ---\n" + page_text + "\n"
+    
+    def _extract_pdf(self, file_path: str) -> str:
+        """Extract text from PDF"""
+        return "".join(self._iter_pdf_pages(file_path))
     
     def _extract_docx(self, file_path: str) -> str:
         """Extract text from DOCX"""
@@ -149,91 +223,6 @@ class DocumentProcessor:
         except Exception as e:
             raise ValueError(f"Error reading text file: {str(e)}")
     
-    def _extract_steps(self, text: str) -> List[str]:
-        """Extract step-by-step instructions"""
-        import re
-        
-        # Pattern for numbered steps
-        numbered_steps = re.findall(r'(?:^|\n)(\d+\.\s+.*?)(?=\n\d+\.|\n\n|\Z)', text, re.MULTILINE | re.DOTALL)
-        
-        # Pattern for lettered steps
-        lettered_steps = re.findall(r'(?:^|\n)([a-z]\.\s+.*?)(?=\n[a-z]\.|\n\n|\Z)', text, re.MULTILINE | re.DOTALL)
-        
-        # Pattern for bullet points
-        bullet_steps = re.findall(r'(?:^|\n)([-*•]\s+.*?)(?=\n[-*•]|\n\n|\Z)', text, re.MULTILINE | re.DOTALL)
-        
-        all_steps = numbered_steps + lettered_steps + bullet_steps
-        return [step.strip() for step in all_steps if step.strip()]
-    
-    def _extract_safety_notes(self, text: str) -> List[str]:
-        """Extract safety-related information"""
-        import re
-        
-        safety_patterns = [
-            r'(?i)(?:warning|caution|danger|safety|hazard|risk)[:\s]+(.*?)(?=\n|$)',
-            r'(?i)(?:⚠️|🚨|⚡|☢️|☣️)\s*(.*?)(?=\n|$)',
-            r'(?i)(?:important|critical|essential)[:\s]+(.*?)(?=\n|$)'
-        ]
-        
-        safety_notes = []
-        for pattern in safety_patterns:
-            matches = re.findall(pattern, text, re.MULTILINE | re.DOTALL)
-            safety_notes.extend([match.strip() for match in matches if match.strip()])
-        
-        return safety_notes
-    
-    def _extract_technical_concepts(self, text: str) -> List[str]:
-        """Extract technical concepts (e.g., architectures, workflows)"""
-        import re
-        # Simple keyword-based extraction (expand as needed)
-        keywords = [
-            r'architecture', r'workflow', r'pipeline', r'algorithm', r'framework',
-            r'fusion', r'sensor fusion', r'perception', r'planning', r'control',
-            r'neural network', r'CNN', r'LSTM', r'GAN', r'Bayesian', r'Kalman',
-            r'object detection', r'tracking', r'localization', r'mapping', r'SLAM'
-        ]
-        found = set()
-        for kw in keywords:
-            matches = re.findall(r'\b' + kw + r'\b', text, re.IGNORECASE)
-            found.update([m for m in matches])
-        return list(found)
-
-    def _extract_statistical_figures(self, text: str) -> List[str]:
-        """Extract statistics and figures (e.g., rates, percentages, counts)"""
-        import re
-        patterns = [
-            r'\b\d+\.\d+%\b',         # 12.5%
-            r'\b\d+%\b',                # 12%
-            r'\b\d+,\d+\b',            # 1,234
-            r'\b\d+\.\d+\b',          # 12.34
-            r'\b\d+\b',                 # 123
-            r'\b(one|two|three|four|five|six|seven|eight|nine|ten)\b (percent|percentage|cases|collisions|accidents|events|failures|successes|instances|samples|trials)'
-        ]
-        figures = []
-        for pat in patterns:
-            figures.extend(re.findall(pat, text, re.IGNORECASE))
-        # Remove duplicates and flatten tuples
-        flat = set()
-        for f in figures:
-            if isinstance(f, tuple):
-                flat.add(' '.join(f))
-            else:
-                flat.add(f)
-        return list(flat)
-
-    def _extract_graph_references(self, text: str) -> List[str]:
-        """Extract references to figures, charts, or diagrams"""
-        import re
-        patterns = [
-            r'(Figure|Fig\.|Chart|Diagram|Graph)\s*\d+',
-            r'(see|refer to) (Figure|Fig\.|Chart|Diagram|Graph)\s*\d+',
-            r'(as shown in|illustrated in) (Figure|Fig\.|Chart|Diagram|Graph)\s*\d+'
-        ]
-        refs = []
-        for pat in patterns:
-            refs.extend([m[0] if isinstance(m, tuple) else m for m in re.findall(pat, text, re.IGNORECASE)])
-        return list(set(refs))
-    
     def _extract_sections(self, text: str, file_ext: str) -> list:
         """Extract section/heading info from text."""
         headings = []
@@ -251,38 +240,36 @@ class DocumentProcessor:
         return sections[0]['title'] if sections else ''
     def _semantic_split(self, sentences: list, max_chunk_size: int = 1000) -> list:
         """Group sentences into chunks of roughly max_chunk_size chars."""
-        chunks = []
+        return list(self._group_sentences(sentences, max_chunk_size))
+    def _group_sentences(self, sentences: Iterable[str], max_chunk_size: int = 1000) -> Iterator[str]:
+        """Streaming form of _semantic_split"""
         current = ''
         for sent in sentences:
             if len(current) + len(sent) > max_chunk_size and current:
-                chunks.append(current)
+                yield current
                 current = ''
             current += sent + ' '
         if current:
-            chunks.append(current.strip())
-        return chunks
-    def _extract_definitions(self, text: str) -> list:
-        """Extract definitions like 'X is ...' or 'X refers to ...'"""
-        pattern = r'(\b[A-Z][A-Za-z0-9\s\-]+\b)\s+(is|refers to|means|defined as)\s+(.+?)(\.|$)'
-        matches = re.findall(pattern, text)
-        return [{'term': m[0].strip(), 'definition': m[2].strip()} for m in matches]
-    def _extract_tools(self, text: str) -> list:
-        """Extract tool mentions using a keyword list (expand as needed)."""
-        tool_keywords = ['wrench', 'screwdriver', 'multimeter', 'oscilloscope', 'soldering iron', 'drill', 'pliers', 'hammer', 'tweezers', 'pipette', 'beaker', 'flask', 'centrifuge', 'pipettor', 'caliper', 'thermometer']
-        found = set()
-        for kw in tool_keywords:
-            if re.search(r'\b' + re.escape(kw) + r'\b', text, re.IGNORECASE):
-                found.add(kw)
-        return list(found)
-    def _extract_materials(self, text: str) -> list:
-        """Extract material mentions using a keyword list (expand as needed)."""
-        material_keywords = ['acetone', 'ethanol', 'solder', 'wire', 'resistor', 'capacitor', 'hydrochloric acid', 'sodium chloride', 'water', 'oil', 'lubricant', 'glue', 'tape', 'filter', 'membrane', 'buffer', 'agarose', 'gel']
-        found = set()
-        for kw in material_keywords:
-            if re.search(r'\b' + re.escape(kw) + r'\b', text, re.IGNORECASE):
-                found.add(kw)
-        return list(found)
-    
+            yield current.strip()
+    def _child_chunks(self, parent: Dict, first_child_id: int) -> List[Dict]:
+        """Split a parent chunk into sentence-level children that point back to it.
+
+        Children inherit the parent's extracted metadata; the parent text travels
+        along as parent_text so the RAG engine can store it in its parent store.
+        """
+        sentences = [sentence.strip() for sentence in re.split(r'(?<=[.!?])\s+|\n+', parent['text']) if sentence.strip()]
+        children = self._semantic_split(sentences, max_chunk_size=self.child_chunk_size) or [parent['text']]
+        return [
+            dict(
+                parent,
+                text=child,
+                chunk_id=first_child_id + i,
+                chunk_size=len(child),
+                parent_chunk_id=parent['chunk_id'],
+                parent_text=parent['text']
+            )
+            for i, child in enumerate(child.strip() for child in children)
+        ]
     def get_document_summary(self, file_path: str) -> Dict:
         """Get document summary without full processing"""
         try:
@@ -0,0 +1,212 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SUPPORTED_DTYPES = {'float16': np.float16, 'float32': np.float32}
+
+
+class EmbeddingCache:
+    """Disk-backed embedding cache shared by every process using the same directory.
+
+    Vectors live in one fixed-size memory-mapped array; a SQLite table maps
+    text hashes to row slots and tracks last use for LRU eviction. Writers
+    unpublish an evicted slot before overwriting it, and readers re-check the
+    mapping after copying a row, so a reader never returns a half-written vector.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dimension: int,
+                 max_entries: int = 200000, dtype: str = 'float16'):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.dtype = dtype
+        self.hits = 0
+        self.misses = 0
+
+        model_slug = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        self.cache_dir = os.path.join(cache_dir, f"{model_slug}_{dimension}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.vectors_path = os.path.join(self.cache_dir, f"vectors.{dtype}.bin")
+        self.index_path = os.path.join(self.cache_dir, "index.sqlite3")
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_storage()
+
+        logger.info(f"Embedding cache initialized at {self.cache_dir} ({max_entries} entries, {dtype})")
+
+    def _init_storage(self):
+        """Create the index and the vector file once, under a write lock shared across processes"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    slot INTEGER UNIQUE NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+
+            meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+            expected_shape = f"{self.max_entries}x{self.dimension}"
+            if meta.get('shape') != expected_shape or not os.path.exists(self.vectors_path):
+                # New cache, or capacity changed: start over with an empty array
+                if meta:
+                    logger.info(f"Embedding cache shape changed ({meta.get('shape')} -> {expected_shape}), resetting")
+                self._conn.execute("DELETE FROM entries")
+                vectors = np.memmap(self.vectors_path, dtype=SUPPORTED_DTYPES[self.dtype], mode='w+',
+                                    shape=(self.max_entries, self.dimension))
+                vectors.flush()
+                del vectors
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('shape', ?)", (expected_shape,))
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('next_slot', '0')")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self._vectors = np.memmap(self.vectors_path, dtype=SUPPORTED_DTYPES[self.dtype], mode='r+',
+                                  shape=(self.max_entries, self.dimension))
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _lookup_slots(self, keys: List[str]) -> Dict[str, int]:
+        slots = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            slots.update(self._conn.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+            ).fetchall())
+        return slots
+
+    def get_many(self, texts: List[str]) -> Dict[int, np.ndarray]:
+        """Return {position: float32 vector} for every text found in the cache"""
+        if not texts:
+            return {}
+        keys = [self._key(text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            slots = self._lookup_slots(unique_keys)
+            vectors = {key: np.array(self._vectors[slot], dtype=np.float32) for key, slot in slots.items()}
+
+            # Drop rows that were evicted while we were copying them
+            confirmed = self._lookup_slots(list(slots.keys())) if slots else {}
+            vectors = {key: vector for key, vector in vectors.items() if confirmed.get(key) == slots[key]}
+
+            if vectors:
+                try:
+                    placeholders = ",".join("?" * len(vectors))
+                    self._conn.execute(
+                        f"UPDATE entries SET last_used = ? WHERE key IN ({placeholders})",
+                        [time.time(), *vectors.keys()]
+                    )
+                except sqlite3.OperationalError:
+                    # Recency is best effort; another process holds the write lock
+                    pass
+
+        found = {i: vectors[key] for i, key in enumerate(keys) if key in vectors}
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, texts: List[str], embeddings) -> int:
+        """Store embeddings for texts, evicting least recently used rows when full"""
+        if not texts:
+            return 0
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        pending = {}
+        for text, embedding in zip(texts, embeddings):
+            pending.setdefault(self._key(text), embedding)
+
+        with self._lock:
+            # Phase 1: reserve slots and unpublish evicted rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                present = self._lookup_slots(list(pending.keys()))
+                new_keys = [key for key in pending if key not in present][:self.max_entries]
+                if not new_keys:
+                    self._conn.execute("COMMIT")
+                    return 0
+
+                next_slot = int(self._conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()[0])
+                fresh = list(range(next_slot, min(next_slot + len(new_keys), self.max_entries)))
+                self._conn.execute("UPDATE meta SET value = ? WHERE name = 'next_slot'", (str(next_slot + len(fresh)),))
+
+                evicted = []
+                if len(fresh) < len(new_keys):
+                    evicted = self._conn.execute(
+                        "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?",
+                        (len(new_keys) - len(fresh),)
+                    ).fetchall()
+                    placeholders = ",".join("?" * len(evicted))
+                    self._conn.execute(f"DELETE FROM entries WHERE key IN ({placeholders})", [key for key, _ in evicted])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            assigned = list(zip(new_keys, fresh + [slot for _, slot in evicted]))
+
+            # Phase 2: write vectors, then publish the new mappings
+            for key, slot in assigned:
+                self._vectors[slot] = pending[key]
+            self._vectors.flush()
+
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                    [(key, slot, now) for key, slot in assigned]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return len(assigned)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.count(),
+            "max_entries": self.max_entries,
+            "dtype": self.dtype,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cache_dir": self.cache_dir
+        }
+
+    def close(self):
+        try:
+            self._vectors.flush()
+            self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing embedding cache: {e}")
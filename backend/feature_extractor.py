@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOCABULARIES = {
+    "tools": [
+        'wrench', 'screwdriver', 'multimeter', 'oscilloscope', 'soldering iron', 'drill', 'pliers', 'hammer',
+        'tweezers', 'pipette', 'beaker', 'flask', 'centrifuge', 'pipettor', 'caliper', 'thermometer'
+    ],
+    "materials": [
+        'acetone', 'ethanol', 'solder', 'wire', 'resistor', 'capacitor', 'hydrochloric acid', 'sodium chloride',
+        'water', 'oil', 'lubricant', 'glue', 'tape', 'filter', 'membrane', 'buffer', 'agarose', 'gel'
+    ],
+    "technical_concepts": [
+        'architecture', 'workflow', 'pipeline', 'algorithm', 'framework',
+        'fusion', 'sensor fusion', 'perception', 'planning', 'control',
+        'neural network', 'CNN', 'LSTM', 'GAN', 'Bayesian', 'Kalman',
+        'object detection', 'tracking', 'localization', 'mapping', 'SLAM'
+    ]
+}
+
+# Vocabulary categories reported as matched in the text rather than as the configured term
+SURFACE_FORM_CATEGORIES = {"technical_concepts"}
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """Regex alternation of the terms, factored into a prefix trie.
+
+    A flat `a|b|c|...` makes the regex engine try every term at every
+    position; the trie form only follows branches that match the next
+    character, so matching cost barely grows with the vocabulary size.
+    Optional continuations are greedy, so the longest term wins.
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class FeatureExtractor:
+    """Extraction of the chunk metadata DocumentProcessor stores.
+
+    All patterns are compiled once. Tools, materials, technical concepts (and
+    any other configured vocabulary) are matched together by one trie-shaped
+    regex in a single scan of the chunk, so ingest speed does not depend on
+    how many terms the vocabularies hold.
+
+    Steps, safety notes, figures, graph references and definitions keep their
+    separate patterns: each one reports its own, possibly overlapping matches
+    (12.5% is also 12.5 and 12), which one alternation would not. Instead each
+    family is skipped when a cheap trigger search finds nothing it could match,
+    so a typical chunk is scanned a handful of times rather than once per pattern.
+    """
+
+    def __init__(self, vocabularies: Optional[Dict[str, List[str]]] = None):
+        self.vocabularies = {category: list(terms) for category, terms in (vocabularies or DEFAULT_VOCABULARIES).items()}
+
+        # Lower-cased term -> [(category, configured term)]
+        self._terms: Dict[str, List[tuple]] = {}
+        for category, terms in self.vocabularies.items():
+            for term in terms:
+                key = " ".join(term.lower().split())
+                if key and (category, term) not in self._terms.get(key, []):
+                    self._terms.setdefault(key, []).append((category, term))
+
+        # Vocabulary terms nested in longer ones ("fusion" in "sensor fusion"), reported with them
+        self._nested_terms = {}
+        for key in self._terms:
+            words = key.split()
+            nested = {
+                " ".join(words[i:j]) for i in range(len(words)) for j in range(i + 1, len(words) + 1)
+                if (i, j) != (0, len(words)) and " ".join(words[i:j]) in self._terms
+            }
+            if nested:
+                self._nested_terms[key] = nested
+        # Locate a nested term inside the longer match, to report its surface form
+        self._nested_patterns = {
+            term: re.compile(r'(?<!\w)' + r'\s+'.join(map(re.escape, term.split())) + r'(?!\w)', re.IGNORECASE)
+            for term in set().union(*self._nested_terms.values())
+        } if self._nested_terms else {}
+
+        self._vocabulary_pattern = None
+        if self._terms:
+            self._vocabulary_pattern = re.compile(
+                r'(?<!\w)' + _trie_pattern(sorted(self._terms)) + r'(?!\w)', re.IGNORECASE
+            )
+
+        self._step_patterns = [
+            re.compile(r'(?:^|\n)(\d+\.\s+.*?)(?=\n\d+\.|\n\n|\Z)', re.MULTILINE | re.DOTALL),
+            re.compile(r'(?:^|\n)([a-z]\.\s+.*?)(?=\n[a-z]\.|\n\n|\Z)', re.MULTILINE | re.DOTALL),
+            re.compile(r'(?:^|\n)([-*•]\s+.*?)(?=\n[-*•]|\n\n|\Z)', re.MULTILINE | re.DOTALL)
+        ]
+        self._safety_patterns = [
+            re.compile(r'(?i)(?:warning|caution|danger|safety|hazard|risk)[:\s]+(.*?)(?=\n|$)', re.MULTILINE | re.DOTALL),
+            re.compile(r'(?i)(?:⚠️|🚨|⚡|☢️|☣️)\s*(.*?)(?=\n|$)', re.MULTILINE | re.DOTALL),
+            re.compile(r'(?i)(?:important|critical|essential)[:\s]+(.*?)(?=\n|$)', re.MULTILINE | re.DOTALL)
+        ]
+        self._statistical_patterns = [
+            re.compile(pattern, re.IGNORECASE) for pattern in (
+                r'\b\d+\.\d+%\b',         # 12.5%
+                r'\b\d+%\b',                # 12%
+                r'\b\d+,\d+\b',            # 1,234
+                r'\b\d+\.\d+\b',          # 12.34
+                r'\b\d+\b',                 # 123
+                r'\b(one|two|three|four|five|six|seven|eight|nine|ten)\b (percent|percentage|cases|collisions|accidents|events|failures|successes|instances|samples|trials)'
+            )
+        ]
+        self._graph_patterns = [
+            re.compile(pattern, re.IGNORECASE) for pattern in (
+                r'(Figure|Fig\.|Chart|Diagram|Graph)\s*\d+',
+                r'(see|refer to) (Figure|Fig\.|Chart|Diagram|Graph)\s*\d+',
+                r'(as shown in|illustrated in) (Figure|Fig\.|Chart|Diagram|Graph)\s*\d+'
+            )
+        ]
+        self._definition_pattern = re.compile(r'(\b[A-Z][A-Za-z0-9\s\-]+\b)\s+(is|refers to|means|defined as)\s+(.+?)(\.|$)')
+
+        # Every match of a family contains its trigger, so a chunk without one skips that family's patterns
+        self._step_trigger = re.compile(r'^(?:\d+\.|[a-z]\.|[-*•])\s', re.MULTILINE)
+        self._safety_trigger = re.compile(
+            r'warning|caution|danger|safety|hazard|risk|important|critical|essential|⚠️|🚨|⚡|☢️|☣️', re.IGNORECASE
+        )
+        self._digit_trigger = re.compile(r'\d')
+        self._number_word_trigger = re.compile(r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten)\b', re.IGNORECASE)
+        self._graph_trigger = re.compile(r'fig|chart|diagram|graph', re.IGNORECASE)
+        self._definition_trigger = re.compile(r'\s(?:is|refers to|means|defined as)\s')
+
+    @classmethod
+    def from_config(cls, vocab_path: Optional[str] = None) -> "FeatureExtractor":
+        """Default vocabularies, extended by the JSON file at FEATURE_VOCAB_PATH ({"tools": [...], ...})"""
+        vocab_path = vocab_path or os.getenv('FEATURE_VOCAB_PATH')
+        vocabularies = {category: list(terms) for category, terms in DEFAULT_VOCABULARIES.items()}
+        if vocab_path:
+            with open(vocab_path, 'r', encoding='utf-8') as f:
+                configured = json.load(f)
+            for category, terms in configured.items():
+                vocabularies.setdefault(category, []).extend(terms)
+            logger.info(
+                f"Loaded feature vocabularies from {vocab_path}: "
+                + ", ".join(f"{category}={len(terms)}" for category, terms in vocabularies.items())
+            )
+        return cls(vocabularies)
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Return every chunk feature: steps, safety notes, figures, references, definitions and vocabulary hits"""
+        features = {
+            'steps': self.extract_steps(text),
+            'safety_notes': self.extract_safety_notes(text),
+            'statistical_figures': self.extract_statistical_figures(text),
+            'graph_references': self.extract_graph_references(text),
+            'definitions': self.extract_definitions(text)
+        }
+        features.update(self.extract_vocabulary(text))
+        return features
+
+    def extract_vocabulary(self, text: str) -> Dict[str, List[str]]:
+        """{category: sorted matched terms} for every vocabulary, from one scan of the text"""
+        found = {category: set() for category in self.vocabularies}
+        if self._vocabulary_pattern is None:
+            return {category: [] for category in found}
+
+        for match in self._vocabulary_pattern.finditer(text):
+            surface = match.group(0)
+            key = " ".join(surface.lower().split())
+            matches = [(key, surface)] + [
+                (nested, self._nested_patterns[nested].search(surface).group(0))
+                for nested in sorted(self._nested_terms.get(key, ()))
+            ]
+            for matched_key, matched_surface in matches:
+                for category, term in self._terms[matched_key]:
+                    found[category].add(matched_surface if category in SURFACE_FORM_CATEGORIES else term)
+        return {category: sorted(terms) for category, terms in found.items()}
+
+    def extract_steps(self, text: str) -> List[str]:
+        """Extract step-by-step instructions (numbered, lettered and bullet items)"""
+        if not self._step_trigger.search(text):
+            return []
+        steps = [step for pattern in self._step_patterns for step in pattern.findall(text)]
+        return [step.strip() for step in steps if step.strip()]
+
+    def extract_safety_notes(self, text: str) -> List[str]:
+        """Extract safety-related information"""
+        if not self._safety_trigger.search(text):
+            return []
+        return [
+            match.strip()
+            for pattern in self._safety_patterns
+            for match in pattern.findall(text) if match.strip()
+        ]
+
+    def extract_statistical_figures(self, text: str) -> List[str]:
+        """Extract statistics and figures (e.g., rates, percentages, counts)"""
+        flat = set()
+        # The first five patterns need a digit, the last one a spelled-out number
+        patterns = self._statistical_patterns[:-1] if self._digit_trigger.search(text) else []
+        if self._number_word_trigger.search(text):
+            patterns = patterns + self._statistical_patterns[-1:]
+        for pattern in patterns:
+            for figure in pattern.findall(text):
+                flat.add(' '.join(figure) if isinstance(figure, tuple) else figure)
+        return list(flat)
+
+    def extract_graph_references(self, text: str) -> List[str]:
+        """Extract references to figures, charts, or diagrams"""
+        refs = set()
+        if not self._graph_trigger.search(text):
+            return []
+        for pattern in self._graph_patterns:
+            refs.update(m[0] if isinstance(m, tuple) else m for m in pattern.findall(text))
+        return list(refs)
+
+    def extract_definitions(self, text: str) -> list:
+        """Extract definitions like 'X is ...' or 'X refers to ...'"""
+        if not self._definition_trigger.search(text):
+            return []
+        return [{'term': m[0].strip(), 'definition': m[2].strip()} for m in self._definition_pattern.findall(text)]
@@ -180,7 +180,12 @@ Intent:"""
             return {
                 "intent": intent,
                 "confidence": 0.8,
-                "query": query
+                "query": query,
+                "usage": {
+                    "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
+                    "completion_tokens": response.usage.completion_tokens if response.usage else 0,
+                    "total_tokens": response.usage.total_tokens if response.usage else 0
+                }
             }
             
         except Exception as e:
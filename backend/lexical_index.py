@@ -0,0 +1,143 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+from typing import List, Tuple, Optional, Dict, Any
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Part numbers and tool names keep their hyphens/underscores as one token
+TOKEN_PATTERN = re.compile(r"[\w\-]+", re.UNICODE)
+
+
+class LexicalIndex:
+    """Persistent BM25 inverted index over document chunks, backed by SQLite FTS5"""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        # chunk_map gives indexed lookups by id and source; chunk_fts holds the postings
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunk_map (
+                rowid INTEGER PRIMARY KEY,
+                doc_id TEXT UNIQUE NOT NULL,
+                source TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunk_map_source ON chunk_map(source);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(
+                text,
+                tokenize = "unicode61 tokenchars '-_'"
+            );
+        """)
+        self._conn.commit()
+        logger.info(f"Lexical index initialized at {index_path}")
+
+    def add(self, ids: List[str], texts: List[str], sources: List[str]):
+        """Add or replace chunks in the index"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            for doc_id, text, source in zip(ids, texts, sources):
+                row = cursor.execute("SELECT rowid FROM chunk_map WHERE doc_id = ?", (doc_id,)).fetchone()
+                if row:
+                    cursor.execute("DELETE FROM chunk_fts WHERE rowid = ?", (row[0],))
+                    cursor.execute("DELETE FROM chunk_map WHERE rowid = ?", (row[0],))
+                cursor.execute("INSERT INTO chunk_map (doc_id, source) VALUES (?, ?)", (doc_id, source))
+                cursor.execute("INSERT INTO chunk_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+            self._conn.commit()
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove chunks by id"""
+        if not ids:
+            return 0
+        with self._lock:
+            rowids = []
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rowids.extend(row[0] for row in self._conn.execute(
+                    f"SELECT rowid FROM chunk_map WHERE doc_id IN ({placeholders})", batch
+                ))
+            self._delete_rowids(rowids)
+            self._conn.commit()
+            return len(rowids)
+
+    def delete_by_source(self, source: str) -> int:
+        """Remove all chunks of a source file"""
+        with self._lock:
+            rowids = [row[0] for row in self._conn.execute(
+                "SELECT rowid FROM chunk_map WHERE source = ?", (source,)
+            )]
+            self._delete_rowids(rowids)
+            self._conn.commit()
+            return len(rowids)
+
+    def _delete_rowids(self, rowids: List[int]):
+        for start in range(0, len(rowids), 500):
+            batch = rowids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM chunk_fts WHERE rowid IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM chunk_map WHERE rowid IN ({placeholders})", batch)
+
+    def search(self, query: str, n_results: int = 10, sources: Optional[List[str]] = None) -> List[Tuple[str, float]]:
+        """Return (doc_id, bm25 score) pairs, best match first"""
+        tokens = [token for token in TOKEN_PATTERN.findall(query.lower()) if token.strip("-_")]
+        if not tokens:
+            return []
+
+        # Quote every term so FTS5 operators in user text are taken literally
+        match_expression = " OR ".join('"' + token.replace('"', '""') + '"' for token in dict.fromkeys(tokens))
+
+        sql = """
+            SELECT chunk_map.doc_id, bm25(chunk_fts) AS score
+            FROM chunk_fts
+            JOIN chunk_map ON chunk_map.rowid = chunk_fts.rowid
+            WHERE chunk_fts MATCH ?
+        """
+        params: List[Any] = [match_expression]
+        if sources:
+            sql += f" AND chunk_map.source IN ({','.join('?' * len(sources))})"
+            params.extend(sources)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(n_results)
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Lexical search failed for query '{query[:50]}': {e}")
+                return []
+
+        # FTS5 bm25() is lower-is-better; flip the sign so higher means more relevant
+        return [(doc_id, -score) for doc_id, score in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_map").fetchone()[0]
+
+    def clear(self):
+        """Remove every chunk from the index"""
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_fts")
+            self._conn.execute("DELETE FROM chunk_map")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "indexed_chunks": self.count(),
+            "index_path": self.index_path
+        }
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing lexical index: {e}")
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
 from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from API.user_preferences import router as user_preferences_router
@@ -22,15 +23,34 @@ load_dotenv()
 # Fix tokenizers parallelism warning
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+if __name__ == "__main__":
+    # `python main.py` hands over to uvicorn's CLI before the app is built. Run as a script this
+    # module is __main__, which every spawned worker process (PDF extraction) re-imports, loading
+    # the models and stores again; under `python -m uvicorn main:app` workers only import what they use
+    import sys
+    os.chdir(Path(__file__).resolve().parent)
+    uvicorn_args = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", os.getenv("HOST", "0.0.0.0"),
+        "--port", os.getenv("PORT", "8000"),
+        "--log-level", "info"
+    ]
+    if os.getenv("DEBUG", "true").lower() == "true":
+        uvicorn_args.append("--reload")
+    os.execv(sys.executable, uvicorn_args)
+
 # Import our modules
 from document_processor import DocumentProcessor
-from rag_engine import RAGEngine
+from rag_engine import RAGEngine, ACTIVE_COLLECTION_FILE, load_active_collection, drop_retired_collections
 from groq_client import GroqClient
 from voice_handler import VoiceHandler, DEFAULT_FRIENDLY_VOICE
 from sop_chat import SOPChat
 # Knowledge Graph Ingestion
 from Knowledge_Graph.ingestion import get_neo4j_driver, ingest_sop_to_kg
 import uuid
+import threading
+from reindex import ReindexJob
+from upload_registry import UploadRegistry, StreamingFingerprint
 
 
 
@@ -66,11 +86,18 @@ app.add_middleware(
 # Create upload directory
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
 UPLOAD_DIR.mkdir(exist_ok=True)
+# Uploads are streamed here while they are fingerprinted; outside UPLOAD_DIR's file listing
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+INCOMING_DIR.mkdir(exist_ok=True)
+UPLOAD_READ_CHUNK = 1024 * 1024
 
 # Initialize components
 doc_processor = DocumentProcessor()
 rag_engine = RAGEngine()
 groq_client = GroqClient()
+# SHA-256 -> ingested document, so re-uploads of identical bytes are not processed again
+upload_dedup_enabled = os.getenv("UPLOAD_DEDUP_ENABLED", "true").lower() == "true"
+upload_registry = UploadRegistry(os.path.join(rag_engine.db_path, "upload_registry.sqlite3"))
 
 # Initialize voice handler (optional)
 try:
@@ -106,6 +133,9 @@ class QueryRequest(BaseModel):
     query: str = Field(..., description="User query about SOP")
     voice_enabled: bool = Field(default=False, description="Enable voice response")
     context_filter: Optional[Dict] = Field(default=None, description="Filter for document search")
+    rerank: Optional[bool] = Field(default=None, description="Override cross-encoder re-ranking for this query")
+    mmr: Optional[bool] = Field(default=None, description="Diversify retrieved chunks with max marginal relevance")
+    mmr_lambda: Optional[float] = Field(default=None, ge=0.0, le=1.0, description="MMR relevance/diversity trade-off")
 
 class QueryResponse(BaseModel):
     response: str
@@ -117,6 +147,14 @@ class QueryResponse(BaseModel):
     safety_information: Optional[List[str]] = None
     usage: Optional[Dict] = None
 
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., description="Queries to search in one batch")
+    n_results: Optional[int] = Field(default=None, ge=1, le=50, description="Results per query")
+    where: Optional[Dict] = Field(default=None, description="Metadata filter applied to every query")
+    rerank: Optional[bool] = Field(default=None, description="Override cross-encoder re-ranking")
+    mmr: Optional[bool] = Field(default=None, description="Diversify retrieved chunks with max marginal relevance")
+    mmr_lambda: Optional[float] = Field(default=None, ge=0.0, le=1.0, description="MMR relevance/diversity trade-off")
+
 class ProcedureRequest(BaseModel):
     procedure_name: str = Field(..., description="Name of the procedure to start")
 
@@ -134,6 +172,11 @@ class DocumentUploadResponse(BaseModel):
     chunks_created: int
     file_type: str
     file_size_mb: float
+    chunks_added: int = 0
+    chunks_reused: int = 0
+    chunks_removed: int = 0
+    fingerprint: Optional[str] = None
+    duplicate_of: Optional[str] = None
 
 class SettingsRequest(BaseModel):
     # General Settings
@@ -183,6 +226,7 @@ class SettingsResponse(BaseModel):
     success: bool
     message: str
     settings: Dict[str, Any]
+    reindex: Optional[Dict[str, Any]] = None
 
 # Health check endpoint
 @app.get("/health")
@@ -203,8 +247,13 @@ async def health_check():
 
 # Document upload endpoint
 @app.post("/upload", response_model=DocumentUploadResponse)
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process SOP document"""
+async def upload_document(file: UploadFile = File(...), force: bool = False):
+    """Upload and process SOP document.
+
+    Identical bytes that were already ingested are not processed again: the
+    existing result is returned and a new filename is recorded as an alias.
+    force=true re-ingests anyway.
+    """
     try:
         # Validate file
         if not file.filename:
@@ -219,35 +268,62 @@ async def upload_document(file: UploadFile = File(...)):
                 detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
             )
         
-        # Save uploaded file
+        # A successful re-upload replaces the previous version so its unchanged
+        # chunks keep their content-addressed IDs and are reused
         file_path = UPLOAD_DIR / file.filename
         
-        # Handle file overwrite
-        if file_path.exists():
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            name_part = file_path.stem
-            file_path = UPLOAD_DIR / f"{name_part}_{timestamp}{file_ext}"
+        # Stream the file to a private incoming directory, hashing it on the way. It keeps its
+        # name (the chunks' source) and only replaces file_path once ingest has succeeded.
+        fingerprint = StreamingFingerprint()
+        incoming_dir = INCOMING_DIR / uuid.uuid4().hex
+        incoming_dir.mkdir()
+        incoming_path = incoming_dir / file.filename
+        try:
+            with open(incoming_path, "wb") as buffer:
+                while True:
+                    data = await file.read(UPLOAD_READ_CHUNK)
+                    if not data:
+                        break
+                    fingerprint.update(data)
+                    buffer.write(data)
+        except Exception:
+            shutil.rmtree(incoming_dir, ignore_errors=True)
+            raise
         
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        sha256 = fingerprint.hexdigest()
+        file_size_mb = fingerprint.size / (1024 * 1024)
+        file_type = file.content_type or mimetypes.guess_type(file.filename)[0] or file_ext
         
-        file_size_mb = len(content) / (1024 * 1024)
+        if upload_dedup_enabled and not force:
+            existing = upload_registry.lookup(sha256)
+            # Only trust the registry while the document is still on disk and in the index; a different
+            # document already stored under the new name is replaced by a normal ingest instead
+            chunk_count = 0
+            if existing and (file.filename == existing["filename"] or not file_path.exists()):
+                if (UPLOAD_DIR / existing["filename"]).exists():
+                    chunk_count = rag_engine.get_chunk_counts().get(existing["filename"], 0)
+            if chunk_count:
+                shutil.rmtree(incoming_dir, ignore_errors=True)
+                if file.filename != existing["filename"]:
+                    upload_registry.add_alias(sha256, file.filename)
+                    message = f"{file.filename} is identical to {existing['filename']}; recorded as an alias"
+                else:
+                    message = f"{file.filename} is unchanged; already processed"
+                logger.info(f"Skipped duplicate upload {file.filename} (sha256 {sha256[:12]})")
+                return DocumentUploadResponse(
+                    success=True,
+                    message=message,
+                    filename=file.filename,
+                    chunks_created=chunk_count,
+                    file_type=file_type,
+                    file_size_mb=round(file_size_mb, 2),
+                    chunks_reused=chunk_count,
+                    fingerprint=sha256,
+                    duplicate_of=existing["filename"]
+                )
         
         # Process document
         try:
-            chunks = doc_processor.process_document(str(file_path))
-            
-            # Add to RAG engine
-            rag_result = rag_engine.add_documents(chunks)
-            
-            if rag_result["status"] != "success":
-                raise Exception(f"RAG processing failed: {rag_result.get('message', 'Unknown error')}")
-            
-            logger.info(f"Successfully processed {file.filename}: {len(chunks)} chunks created")
-            
-            # Build SOP data structure
             sop_id = str(uuid.uuid4())
             sop_data = {
                 "id": sop_id,
@@ -257,43 +333,85 @@ async def upload_document(file: UploadFile = File(...)):
                 "created_at": datetime.now().isoformat(),
                 "steps": []
             }
-
-            for i, chunk in enumerate(chunks):
-                step_id = f"{sop_id}_step_{i}"
-                sop_data["steps"].append({
-                    "id": step_id,
-                    "description": chunk["text"],
-                    "order": i,
-                    "chunk_id": chunk["chunk_id"],
-                    "tools": [],  # If you have tool extraction logic, add here
-                    "materials": [],  # If you have material extraction logic, add here
-                    "safety_notes": chunk.get("safety_notes", [])
-                })
+            kg_state = {"steps": 0, "seen_parents": set(), "failed": False}
             
-            # Store in Neo4j
-            if kg_available:
+            def ingest_batch_to_kg(batch: List[Dict], batch_result: Dict):
+                """Store the steps of one chunk batch in Neo4j (MERGE, so batches add up to one SOP)"""
+                if not kg_available or kg_state["failed"]:
+                    return
+                # Small-to-big child chunks share parents; the KG gets one step per parent window
+                steps = []
+                for chunk in batch:
+                    parent_key = chunk.get("parent_chunk_id", chunk["chunk_id"])
+                    if parent_key in kg_state["seen_parents"]:
+                        continue
+                    kg_state["seen_parents"].add(parent_key)
+                    order = kg_state["steps"] + len(steps)
+                    steps.append({
+                        "id": f"{sop_id}_step_{order}",
+                        "description": chunk.get("parent_text", chunk["text"]),
+                        "order": order,
+                        "chunk_id": chunk["chunk_id"],
+                        "tools": [],  # If you have tool extraction logic, add here
+                        "materials": [],  # If you have material extraction logic, add here
+                        "safety_notes": chunk.get("safety_notes", [])
+                    })
+                kg_state["steps"] += len(steps)
                 try:
-                    ingest_sop_to_kg(sop_data, kg_driver)
-                    logger.info(f"SOP stored in Neo4j with id {sop_id}")
+                    ingest_sop_to_kg(dict(sop_data, steps=steps), kg_driver)
                 except Exception as e:
+                    kg_state["failed"] = True
                     logger.error(f"Failed to store SOP in Neo4j: {e}")
                     logger.warning(f"Upload succeeded but SOP was NOT stored in Neo4j for file: {file.filename}")
-            else:
+            
+            # Pages are chunked, embedded and stored batch by batch, so memory does not grow with the document
+            engine = rag_engine
+            rag_result = await engine.aadd_document_batches(
+                doc_processor.iter_chunk_batches(str(incoming_path)), on_batch=ingest_batch_to_kg
+            )
+            
+            if rag_result["status"] != "success":
+                raise Exception(f"RAG processing failed: {rag_result.get('message', 'Unknown error')}")
+            
+            chunks_created = rag_result["chunks"]
+            os.replace(incoming_path, file_path)
+            shutil.rmtree(incoming_dir, ignore_errors=True)
+            logger.info(f"Successfully processed {file.filename}: {chunks_created} chunks created")
+            upload_registry.record(sha256, file.filename, fingerprint.size, file_ext, chunks_created)
+            
+            # A re-index may have swapped its collection in while this upload was ingesting into
+            # the previous one; its catch-up could have run before the file landed in UPLOAD_DIR
+            live_engine, live_processor = await run_in_threadpool(active_engine)
+            if live_engine is not engine and live_engine.acquire():
+                try:
+                    logger.info(f"Re-index activated during upload; ingesting {file.filename} into {live_engine.collection_name}")
+                    live_result = await live_engine.aadd_document_batches(live_processor.iter_chunk_batches(str(file_path)))
+                    if live_result["status"] != "success":
+                        logger.error(f"Failed to ingest {file.filename} into {live_engine.collection_name}: {live_result.get('message')}")
+                finally:
+                    live_engine.release()
+            
+            if kg_available and not kg_state["failed"]:
+                logger.info(f"SOP stored in Neo4j with id {sop_id}")
+            elif not kg_available:
                 logger.warning(f"Neo4j not available - SOP {sop_id} not stored in Knowledge Graph")
             
             return DocumentUploadResponse(
                 success=True,
                 message=f"Successfully processed {file.filename}",
                 filename=file.filename,
-                chunks_created=len(chunks),
-                file_type=file.content_type or mimetypes.guess_type(file.filename)[0] or file_ext,
-                file_size_mb=round(file_size_mb, 2)
+                chunks_created=chunks_created,
+                file_type=file_type,
+                file_size_mb=round(file_size_mb, 2),
+                chunks_added=rag_result.get("documents_added", 0),
+                chunks_reused=rag_result.get("chunks_reused", 0),
+                chunks_removed=rag_result.get("chunks_removed", 0),
+                fingerprint=sha256
             )
             
         except Exception as processing_error:
-            # Clean up file if processing failed
-            if file_path.exists():
-                file_path.unlink()
+            # Drop only the new upload; a previously ingested version stays on disk and registered
+            shutil.rmtree(incoming_dir, ignore_errors=True)
             raise HTTPException(
                 status_code=500, 
                 detail=f"Document processing failed: {str(processing_error)}"
@@ -313,8 +431,20 @@ async def query_sop(request: QueryRequest):
         # Update voice preference
         sop_chat.set_user_preferences({"voice_enabled": request.voice_enabled})
         
-        # Process query
-        response = sop_chat.process_query(request.query, request.context_filter)
+        # Per-request retrieval options
+        search_options = {}
+        if request.rerank is not None:
+            search_options["rerank"] = request.rerank
+        if request.mmr is not None:
+            search_options["mmr"] = request.mmr
+        if request.mmr_lambda is not None:
+            search_options["mmr_lambda"] = request.mmr_lambda
+        
+        # Off the event loop; the LLM calls wait on the shared threadpool while SOPChat runs its
+        # retrieval on the engine's query executor, so slow generations never fill that pool
+        response = await run_in_threadpool(
+            sop_chat.process_query, request.query, request.context_filter, search_options
+        )
         
         return QueryResponse(**response)
         
@@ -322,6 +452,36 @@ async def query_sop(request: QueryRequest):
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest):
+    """Retrieve documents for several queries at once (no LLM generation)"""
+    try:
+        if not request.queries:
+            raise HTTPException(status_code=400, detail="No queries provided")
+        
+        batch_results = await rag_engine.asearch_batch(
+            request.queries,
+            n_results=request.n_results,
+            where=request.where,
+            rerank=request.rerank,
+            mmr=request.mmr,
+            mmr_lambda=request.mmr_lambda
+        )
+        
+        return {
+            "results": [
+                {"query": query, "documents": documents}
+                for query, documents in zip(request.queries, batch_results)
+            ],
+            "total_queries": len(request.queries)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing batch query: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch query failed: {str(e)}")
+
 # Voice endpoints
 @app.post("/voice/upload")
 async def process_voice_upload(audio_file: UploadFile = File(...)):
@@ -345,9 +505,11 @@ async def process_voice_upload(audio_file: UploadFile = File(...)):
             temp_file_path = temp_file.name
         
         try:
-            # Process audio
-            with open(temp_file_path, 'rb') as audio_fp:
-                response = sop_chat.process_voice_input(audio_fp)
+            # Transcription and the answer both block; run them off the event loop
+            def process_audio():
+                with open(temp_file_path, 'rb') as audio_fp:
+                    return sop_chat.process_voice_input(audio_fp)
+            response = await run_in_threadpool(process_audio)
             
             return response
             
@@ -374,7 +536,7 @@ async def synthesize_speech(text: str, voice_id: str = "alloy", speed: float = 1
                 sop_chat.set_user_preferences({"tts_voice": voice_id})
 
         # Generate audio
-        audio_data = voice_handler.text_to_speech(text, voice=voice_id, speed=speed)
+        audio_data = await run_in_threadpool(voice_handler.text_to_speech, text, voice=voice_id, speed=speed)
 
         # Return as streaming response
         return StreamingResponse(
@@ -392,7 +554,8 @@ async def synthesize_speech(text: str, voice_id: str = "alloy", speed: float = 1
 async def start_procedure(request: ProcedureRequest):
     """Start a specific procedure"""
     try:
-        result = sop_chat.start_procedure(request.procedure_name)
+        # Procedure lookup is a retrieval call
+        result = await rag_engine.arun_query(sop_chat.start_procedure, request.procedure_name)
         return result
     except Exception as e:
         logger.error(f"Error starting procedure: {str(e)}")
@@ -452,7 +615,7 @@ async def end_procedure():
 async def get_available_procedures():
     """Get list of available procedures"""
     try:
-        procedures = sop_chat.get_available_procedures()
+        procedures = await rag_engine.arun_query(sop_chat.get_available_procedures)
         return {"procedures": procedures}
     except Exception as e:
         logger.error(f"Error getting procedures: {str(e)}")
@@ -490,6 +653,8 @@ async def get_system_stats():
         return {
             "rag_engine": rag_stats,
             "conversation": conversation_stats,
+            "answer_cache": sop_chat.get_answer_cache_stats(),
+            "upload_registry": upload_registry.get_stats(),
             "voice_handler": voice_info,
             "llm": groq_info,
             "supported_formats": doc_processor.allowed_extensions
@@ -645,13 +810,18 @@ async def delete_document(filename: str):
     try:
         file_path = UPLOAD_DIR / filename
         if not file_path.exists():
+            # An alias of a duplicate upload has no file or vectors of its own
+            if upload_registry.resolve(filename) not in (None, filename):
+                upload_registry.forget(filename)
+                return {"success": True, "message": f"Alias {filename} removed", "vector_deletion": None}
             raise HTTPException(status_code=404, detail="Document not found")
         
         # Delete from vector database
-        delete_result = rag_engine.delete_documents_by_source(filename)
+        delete_result = await rag_engine.adelete_documents_by_source(filename)
         
         # Delete file
         file_path.unlink()
+        upload_registry.forget(filename)
         
         return {
             "success": True,
@@ -671,13 +841,13 @@ async def get_file_chunks():
     """
     try:
         files_chunks = []
+        # One counter lookup for all sources instead of a query per file
+        chunk_counts = rag_engine.get_chunk_counts()
         for file_path in UPLOAD_DIR.glob("*"):
             if file_path.is_file():
-                # Get chunk count from RAG engine
-                chunk_count = rag_engine.get_chunk_count_by_source(file_path.name)
                 files_chunks.append({
                     "name": file_path.name,
-                    "chunk_count": chunk_count
+                    "chunk_count": chunk_counts.get(file_path.name, 0)
                 })
         return {
             "success": True,
@@ -793,10 +963,17 @@ async def update_settings(settings: SettingsRequest):
         # Note: In a production app, you would save these to a database
         # or persistent configuration file
         
+        # Embedding model / chunking changes only take effect through a re-index
+        job = start_reindex_if_needed()
+        message = f"Successfully updated {len(updated_settings)} settings"
+        if job:
+            message += "; re-indexing documents in the background"
+        
         return SettingsResponse(
             success=True,
-            message=f"Successfully updated {len(updated_settings)} settings",
-            settings=updated_settings
+            message=message,
+            settings=updated_settings,
+            reindex=job.status() if job else None
         )
         
     except Exception as e:
@@ -824,16 +1001,154 @@ async def reset_settings():
         for key, value in default_env.items():
             os.environ[key] = value
         
+        job = start_reindex_if_needed()
+        
         return {
             "success": True,
             "message": "Settings reset to default values",
-            "reset_count": len(default_env)
+            "reset_count": len(default_env),
+            "reindex": job.status() if job else None
         }
         
     except Exception as e:
         logger.error(f"Error resetting settings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Re-index (applies EMBEDDING_MODEL / CHUNK_SIZE / CHUNK_OVERLAP changes)
+reindex_job: Optional[ReindexJob] = None
+
+engine_swap_lock = threading.Lock()
+
+def active_record_stamp():
+    """mtime of this store's active collection record (None before the first re-index)"""
+    try:
+        return os.stat(os.path.join(rag_engine.db_path, ACTIVE_COLLECTION_FILE)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+active_record_seen = active_record_stamp()
+
+def swap_engine(engine: RAGEngine, processor: DocumentProcessor):
+    """Swap an engine in; handlers and SOPChat pick it up on their next call"""
+    global rag_engine, doc_processor
+    previous_engine = rag_engine
+    rag_engine, doc_processor = engine, processor
+    sop_chat.set_rag_engine(engine)
+    
+    # Requests still pinned to the previous engine finish on it; it closes when the last one
+    # releases it. Its collection is dropped later by the explicit /reindex/cleanup step
+    previous_engine.retire()
+
+def activate_reindexed_engine(engine: RAGEngine, processor: DocumentProcessor):
+    """on_complete of this worker's re-index job (the active record is already written)"""
+    global active_record_seen
+    with engine_swap_lock:
+        swap_engine(engine, processor)
+        active_record_seen = active_record_stamp()
+
+def follow_active_collection():
+    """Switch to the collection another worker's re-index activated"""
+    global active_record_seen
+    with engine_swap_lock:
+        stamp = active_record_stamp()
+        if stamp == active_record_seen:
+            return
+        record = load_active_collection(rag_engine.db_path)
+        name = record.get("collection_name")
+        if reindex_job and reindex_job.collection_name == name and reindex_job.is_running():
+            return  # this worker's own job is about to swap its engine in
+        if name and name != rag_engine.collection_name:
+            logger.info(f"Active collection changed to {name}; switching this worker")
+            engine = RAGEngine(db_path=rag_engine.db_path)
+            processor = DocumentProcessor(chunk_size=record.get("chunk_size"), chunk_overlap=record.get("chunk_overlap"))
+            swap_engine(engine, processor)
+        active_record_seen = stamp
+
+@app.middleware("http")
+async def sync_active_collection(request, call_next):
+    # A stat per request; loading the new engine happens off the event loop
+    if active_record_stamp() != active_record_seen:
+        await run_in_threadpool(follow_active_collection)
+    # Pin the engine for the whole request so a swap can't close it underneath a long upload
+    engine = rag_engine
+    while not engine.acquire():
+        engine = rag_engine
+    try:
+        return await call_next(request)
+    finally:
+        engine.release()
+
+def active_engine():
+    """The engine and processor currently serving (following another worker's swap first)"""
+    if active_record_stamp() != active_record_seen:
+        follow_active_collection()
+    return rag_engine, doc_processor
+
+def start_reindex_if_needed() -> Optional[ReindexJob]:
+    """Start a background re-index when the configured model or chunking differs from the live index"""
+    global reindex_job
+    target = (
+        os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+        int(os.getenv("CHUNK_SIZE", 1000)),
+        int(os.getenv("CHUNK_OVERLAP", 200))
+    )
+    if reindex_job and reindex_job.is_running():
+        pending = (reindex_job.embedding_model, reindex_job.chunk_size, reindex_job.chunk_overlap)
+        if pending == target:
+            return reindex_job
+        # Newer settings win; the old shadow collection is dropped when its job stops
+        reindex_job.cancel()
+    elif target == (rag_engine.embedding_model_name, doc_processor.chunk_size, doc_processor.chunk_overlap):
+        return None
+    
+    reindex_job = ReindexJob(
+        db_path=rag_engine.db_path,
+        upload_dir=UPLOAD_DIR,
+        embedding_model=target[0],
+        chunk_size=target[1],
+        chunk_overlap=target[2],
+        on_complete=activate_reindexed_engine
+    )
+    reindex_job.start()
+    logger.info(f"Started re-index into {reindex_job.collection_name}")
+    return reindex_job
+
+@app.get("/reindex/status")
+async def get_reindex_status():
+    """Progress of the current (or last) background re-index"""
+    return {
+        "success": True,
+        "active_collection": rag_engine.collection_name,
+        "embedding_model": rag_engine.embedding_model_name,
+        "chunk_size": doc_processor.chunk_size,
+        "chunk_overlap": doc_processor.chunk_overlap,
+        "retired_collections": load_active_collection(rag_engine.db_path).get("retired_collections", []),
+        "job": reindex_job.status() if reindex_job else None
+    }
+
+@app.post("/reindex/cancel")
+async def cancel_reindex():
+    """Cancel a running re-index; the live collection is untouched"""
+    if not reindex_job or not reindex_job.is_running():
+        raise HTTPException(status_code=404, detail="No re-index is running")
+    reindex_job.cancel()
+    return {"success": True, "message": "Re-index cancellation requested"}
+
+@app.post("/reindex/cleanup")
+async def cleanup_reindex():
+    """Drop collections retired by earlier re-indexes.
+    
+    Every API worker switches to the new collection on its next request, so
+    only collections retired at least REINDEX_DRAIN_SECONDS ago are dropped.
+    """
+    try:
+        min_age = float(os.getenv("REINDEX_DRAIN_SECONDS", 60))
+        dropped = await run_in_threadpool(drop_retired_collections, rag_engine.db_path, min_age, rag_engine.client)
+        return {"success": True, "dropped_collections": dropped}
+    except Exception as e:
+        logger.error(f"Error dropping retired collections: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # File information endpoint
 @app.get("/files")
 async def get_uploaded_files():
@@ -861,56 +1176,31 @@ async def get_uploaded_files():
         logger.error(f"Error listing files: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-if __name__ == "__main__":
-    import multiprocessing
-    multiprocessing.set_start_method('spawn', force=True)  # Fix semaphore issues
-    
-    # Configuration
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", 8000))
-    debug = os.getenv("DEBUG", "true").lower() == "true"
-    
+@app.on_event("startup")
+async def log_startup():
     logger.info("🚀 Starting Live SOP Interpreter API...")
     logger.info(f"📝 Upload directory: {UPLOAD_DIR}")
     logger.info(f"🗣️ Voice functionality: {'Enabled' if voice_handler else 'Disabled'}")
-    logger.info(f"🔧 Debug mode: {debug}")
     logger.info("📚 Make sure to set your API keys in .env file")
+
+@app.on_event("shutdown")
+async def cleanup_resources():
+    """Close the engine, registry and KG driver when the server stops"""
+    logger.info("🧹 Cleaning up resources...")
     
+    # Cleanup RAG engine (includes KG driver)
     try:
-        uvicorn.run(
-            "main:app",
-            host=host,
-            port=port,
-            reload=debug,
-            log_level="info"
-        )
-    except KeyboardInterrupt:
-        logger.info("🛑 Server stopped by user")
+        rag_engine.close()
     except Exception as e:
-        logger.error(f"Server error: {e}")
-    finally:
-        # Cleanup resources
-        logger.info("🧹 Cleaning up resources...")
-        
-        # Cleanup RAG engine (includes KG driver)
+        logger.warning(f"RAG engine cleanup error: {e}")
+    upload_registry.close()
+    
+    # Cleanup KG driver
+    if kg_available and kg_driver:
         try:
-            rag_engine.close()
+            kg_driver.close()
+            logger.info("Knowledge Graph driver closed")
         except Exception as e:
-            logger.warning(f"RAG engine cleanup error: {e}")
-        
-        # Cleanup KG driver
-        if kg_available and kg_driver:
-            try:
-                kg_driver.close()
-                logger.info("Knowledge Graph driver closed")
-            except Exception as e:
-                logger.warning(f"KG driver cleanup error: {e}")
-        
-        if voice_handler:
-            try:
-                # Add any voice handler cleanup if needed
-                pass
-            except Exception as e:
-                logger.warning(f"Voice handler cleanup error: {e}")
-        
-        logger.info("✅ Cleanup completed")
+            logger.warning(f"KG driver cleanup error: {e}")
+    
+    logger.info("✅ Cleanup completed")
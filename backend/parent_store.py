@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Any, Tuple
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ParentStore:
+    """Parent windows for small-to-big retrieval, keyed by parent id.
+
+    Only child chunks are embedded; their parent text lives here and is looked
+    up for the final top-k results.
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(store_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS parents (
+                parent_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_parents_source ON parents(source);
+        """)
+        self._conn.commit()
+
+    def add(self, parents: List[Tuple[str, str, str]]):
+        """Store (parent_id, source, text) rows"""
+        if not parents:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO parents (parent_id, source, text) VALUES (?, ?, ?)", parents
+            )
+            self._conn.commit()
+
+    def get_many(self, parent_ids: List[str]) -> Dict[str, str]:
+        """Return {parent_id: text} for the ids that exist"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(parent_ids), 500):
+                batch = parent_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT parent_id, text FROM parents WHERE parent_id IN ({placeholders})", batch
+                ).fetchall())
+        return found
+
+    def iter_all(self, batch_size: int = 1000):
+        """Yield lists of (parent_id, source, text) rows in parent_id order"""
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT parent_id, source, text FROM parents WHERE parent_id > ? ORDER BY parent_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def retain_source(self, source: str, keep_ids: List[str]) -> int:
+        """Delete parents of a source that are not in keep_ids (after a re-upload)"""
+        with self._lock:
+            stored = [row[0] for row in self._conn.execute(
+                "SELECT parent_id FROM parents WHERE source = ?", (source,)
+            )]
+            keep = set(keep_ids)
+            stale = [(parent_id,) for parent_id in stored if parent_id not in keep]
+            self._conn.executemany("DELETE FROM parents WHERE parent_id = ?", stale)
+            self._conn.commit()
+            return len(stale)
+
+    def delete_by_source(self, source: str) -> int:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM parents WHERE source = ?", (source,)).rowcount
+            self._conn.commit()
+            return deleted
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM parents")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "parents": self.count(),
+            "store_path": self.store_path
+        }
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing parent store: {e}")
@@ -0,0 +1,440 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def split_source_filter(where: Optional[Dict]) -> Tuple[Optional[List[str]], Optional[Dict]]:
+    """Split a `where` filter into (sources it is scoped to, remaining filter).
+
+    Returns (None, where) when the filter does not pin the source, so every
+    partition has to be searched.
+    """
+    if not where:
+        return None, where
+
+    def sources_of(condition) -> Optional[List[str]]:
+        if not isinstance(condition, dict):
+            return [condition]
+        if set(condition) == {'$eq'}:
+            return [condition['$eq']]
+        if set(condition) == {'$in'}:
+            return list(condition['$in'])
+        return None
+
+    if set(where) == {'source'}:
+        sources = sources_of(where['source'])
+        return (sources, None) if sources is not None else (None, where)
+
+    if set(where) == {'$and'}:
+        for i, clause in enumerate(where['$and']):
+            if isinstance(clause, dict) and set(clause) == {'source'}:
+                sources = sources_of(clause['source'])
+                if sources is None:
+                    continue
+                rest = where['$and'][:i] + where['$and'][i + 1:]
+                if not rest:
+                    return sources, None
+                return sources, rest[0] if len(rest) == 1 else {'$and': rest}
+
+    return None, where
+
+
+class PartitionedCollection:
+    """Source-partitioned vector collections behind the single-collection interface RAGEngine uses.
+
+    Sources are hashed into at most `groups` partition collections (groups=0
+    keeps one collection per source). A SQLite catalog maps sources to their
+    partition and chunk ids to sources, so source-scoped queries only touch
+    the partitions holding those sources, an unscoped query costs at most
+    `groups` index searches however many sources are stored, and removing the
+    last chunk of a partition drops it. Partitions are searched concurrently
+    on up to query_workers threads.
+    """
+
+    def __init__(self, client, name: str, catalog_path: str, collection_metadata: Optional[Dict] = None,
+                 groups: Optional[int] = None, query_workers: Optional[int] = None):
+        self.client = client
+        self.name = name
+        self.collection_metadata = collection_metadata
+        self.catalog_path = catalog_path
+        self.groups = groups if groups is not None else int(os.getenv('PARTITION_GROUPS', 16))
+        os.makedirs(os.path.dirname(os.path.abspath(catalog_path)), exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._partitions = {}
+        # Partition searches (NumPy matmul, hnswlib, Postgres) release the GIL, so threads overlap them
+        self.query_workers = query_workers or int(os.getenv('PARTITION_QUERY_WORKERS', min(8, os.cpu_count() or 1)))
+        self._query_executor = None
+        self._conn = sqlite3.connect(catalog_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_catalog()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS partitions (
+                source TEXT PRIMARY KEY,
+                collection_name TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_partitions_collection ON partitions(collection_name);
+            CREATE TABLE IF NOT EXISTS chunk_routes (
+                doc_id TEXT PRIMARY KEY,
+                source TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunk_routes_source ON chunk_routes(source);
+        """)
+        self._conn.commit()
+        logger.info(
+            f"Partitioned collection {name} initialized with {len(self._catalog())} sources "
+            f"in {len(self._collection_names())} partitions"
+        )
+
+    def _migrate_catalog(self):
+        """Catalogs written with one collection per source had collection_name UNIQUE; lift it so sources can share"""
+        row = self._conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'partitions'").fetchone()
+        if row and 'UNIQUE' in row[0].upper():
+            self._conn.executescript("""
+                ALTER TABLE partitions RENAME TO partitions_v1;
+                CREATE TABLE partitions (
+                    source TEXT PRIMARY KEY,
+                    collection_name TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL DEFAULT 0
+                );
+                INSERT INTO partitions SELECT source, collection_name, chunk_count FROM partitions_v1;
+                DROP TABLE partitions_v1;
+            """)
+            logger.info("Migrated partition catalog to shared partitions")
+
+    # Catalog
+
+    def _partition_name(self, source: str) -> str:
+        # Collection names must be short and alphanumeric, so partitions are named by source hash
+        digest = hashlib.sha1(source.encode('utf-8')).hexdigest()
+        if self.groups > 0:
+            return f"{self.name}_g{int(digest[:8], 16) % self.groups:03d}"
+        return f"{self.name}_p_{digest[:16]}"
+
+    def _catalog(self, sources: Optional[List[str]] = None) -> List[Tuple[str, str, int]]:
+        sql = "SELECT source, collection_name, chunk_count FROM partitions"
+        params: List[Any] = []
+        if sources is not None:
+            sql += f" WHERE source IN ({','.join('?' * len(sources))})"
+            params = list(sources)
+        return self._conn.execute(sql + " ORDER BY collection_name, source", params).fetchall()
+
+    def _collection_names(self) -> List[str]:
+        return [name for (name,) in self._conn.execute(
+            "SELECT DISTINCT collection_name FROM partitions ORDER BY collection_name"
+        )]
+
+    def _partition(self, collection_name: str):
+        if collection_name not in self._partitions:
+            kwargs = {"metadata": self.collection_metadata} if self.collection_metadata else {}
+            self._partitions[collection_name] = self.client.get_or_create_collection(name=collection_name, **kwargs)
+        return self._partitions[collection_name]
+
+    def _route_ids(self, ids: List[str]) -> Dict[str, List[str]]:
+        """Group chunk ids by the source that holds them"""
+        routed = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for doc_id, source in self._conn.execute(
+                f"SELECT doc_id, source FROM chunk_routes WHERE doc_id IN ({placeholders})", batch
+            ):
+                routed.setdefault(source, []).append(doc_id)
+        return routed
+
+    @staticmethod
+    def _source_filter(sources: List[str]) -> Dict:
+        return {"source": sources[0]} if len(sources) == 1 else {"source": {"$in": sources}}
+
+    def _targets(self, where: Optional[Dict]) -> List[Dict[str, Any]]:
+        """Partitions to visit for a `where` filter.
+
+        Each target has the partition's collection name, its in-scope sources
+        and chunk count, the source filter needed when the partition also holds
+        other sources (`scope`), and `where`: scope and remaining filter combined.
+        """
+        sources, residual = split_source_filter(where)
+        wanted = set(sources) if sources else None
+        targets = {}
+        for source, collection_name, chunk_count in self._catalog():
+            target = targets.setdefault(collection_name, {
+                "collection_name": collection_name, "sources": [], "chunk_count": 0, "shared": False
+            })
+            if wanted is None or source in wanted:
+                target["sources"].append(source)
+                target["chunk_count"] += chunk_count
+            else:
+                target["shared"] = True
+
+        visited = []
+        for target in targets.values():
+            if not target["sources"]:
+                continue
+            target["scope"] = self._source_filter(target["sources"]) if target.pop("shared") else None
+            if target["scope"] and residual:
+                target["where"] = {"$and": [target["scope"], residual]}
+            else:
+                target["where"] = target["scope"] or residual
+            target["residual"] = residual
+            visited.append(target)
+        return visited
+
+    def _id_targets(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """Partitions holding the given chunk ids, with the ids each one holds"""
+        routed = self._route_ids(ids)
+        targets = {}
+        for source, collection_name, _ in self._catalog(list(routed)):
+            target = targets.setdefault(collection_name, {
+                "collection_name": collection_name, "sources": [], "ids": []
+            })
+            target["sources"].append(source)
+            target["ids"].extend(routed[source])
+        return list(targets.values())
+
+    def _recount(self, sources: List[str]):
+        """Refresh the catalog counts of sources from their routes; sources left without chunks leave the catalog"""
+        for source in sources:
+            self._conn.execute(
+                "UPDATE partitions SET chunk_count = (SELECT COUNT(*) FROM chunk_routes WHERE source = ?) "
+                "WHERE source = ?", (source, source)
+            )
+        self._conn.execute("DELETE FROM partitions WHERE chunk_count = 0")
+
+    def list_sources(self) -> List[str]:
+        with self._lock:
+            return [source for (source,) in self._conn.execute("SELECT source FROM partitions ORDER BY source")]
+
+    # Collection surface
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(chunk_count), 0) FROM partitions").fetchone()[0]
+
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict]] = None):
+        metadatas = metadatas or [{} for _ in ids]
+        grouped = {}
+        for i, metadata in enumerate(metadatas):
+            grouped.setdefault((metadata or {}).get('source', 'unknown'), []).append(i)
+
+        with self._lock:
+            for source, positions in grouped.items():
+                row = self._conn.execute(
+                    "SELECT collection_name FROM partitions WHERE source = ?", (source,)
+                ).fetchone()
+                collection_name = row[0] if row else self._partition_name(source)
+
+                partition_ids = [ids[i] for i in positions]
+                self._partition(collection_name).add(
+                    ids=partition_ids,
+                    embeddings=[embeddings[i] for i in positions],
+                    documents=[documents[i] for i in positions] if documents is not None else None,
+                    metadatas=[metadatas[i] for i in positions]
+                )
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunk_routes (doc_id, source) VALUES (?, ?)",
+                    [(doc_id, source) for doc_id in partition_ids]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO partitions (source, collection_name, chunk_count) "
+                    "VALUES (?, ?, (SELECT COUNT(*) FROM chunk_routes WHERE source = ?))",
+                    (source, collection_name, source)
+                )
+            self._conn.commit()
+
+    def query(self, query_embeddings=None, n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        include = include or ['documents', 'metadatas', 'distances']
+        fields = [field for field in ('documents', 'metadatas', 'embeddings') if field in include]
+        rows = [[] for _ in query_embeddings]
+
+        # The lock only covers routing: partition searches run (and are merged) outside it,
+        # so concurrent queries overlap on the query executors
+        with self._lock:
+            # Distances are always needed to merge partitions, even if the caller did not ask for them
+            partition_include = list(dict.fromkeys(include + ['distances']))
+            searches = []
+            for target in self._targets(where):
+                if target["chunk_count"] == 0:
+                    continue
+                params = {
+                    "query_embeddings": query_embeddings,
+                    "n_results": min(n_results, target["chunk_count"]),
+                    "include": partition_include
+                }
+                if target["where"]:
+                    params["where"] = target["where"]
+                searches.append((self._partition(target["collection_name"]), params))
+
+            executor = None
+            if len(searches) > 1 and self.query_workers > 1:
+                if self._query_executor is None:
+                    self._query_executor = ThreadPoolExecutor(
+                        max_workers=self.query_workers, thread_name_prefix="partition-query"
+                    )
+                executor = self._query_executor
+
+        if executor is not None:
+            results = executor.map(lambda search: search[0].query(**search[1]), searches)
+        else:
+            results = (partition.query(**params) for partition, params in searches)
+
+        for result in results:
+            for q in range(len(query_embeddings)):
+                for i, doc_id in enumerate(result['ids'][q]):
+                    hit = {"id": doc_id, "distance": result['distances'][q][i]}
+                    for field in fields:
+                        hit[field] = result[field][q][i] if result.get(field) is not None else None
+                    rows[q].append(hit)
+
+        merged = {"ids": [], "distances": [], "documents": [], "metadatas": [], "embeddings": []}
+        for hits in rows:
+            hits = sorted(hits, key=lambda hit: hit['distance'])[:n_results]
+            merged["ids"].append([hit['id'] for hit in hits])
+            merged["distances"].append([hit['distance'] for hit in hits])
+            for field in fields:
+                merged[field].append([hit[field] for hit in hits])
+        return {key: (value if key == "ids" or key in include else None) for key, value in merged.items()}
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = ['documents', 'metadatas'] if include is None else include
+        fields = [field for field in ('documents', 'metadatas', 'embeddings') if field in include]
+        result = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+
+        with self._lock:
+            if ids is not None:
+                targets = [dict(target, where=where) for target in self._id_targets(list(ids))]
+            else:
+                targets = self._targets(where)
+
+            skip = offset or 0
+            remaining = limit
+            for target in targets:
+                if remaining is not None and remaining <= 0:
+                    break
+                # Unfiltered paging can skip whole partitions by their catalog counts
+                paged = ids is None and not target["where"]
+                if paged and skip >= target["chunk_count"]:
+                    skip -= target["chunk_count"]
+                    continue
+
+                params = {"include": include}
+                if ids is not None:
+                    params["ids"] = target["ids"]
+                if target["where"]:
+                    params["where"] = target["where"]
+                if paged:
+                    params["offset"] = skip
+                    if remaining is not None:
+                        params["limit"] = remaining
+                    skip = 0
+                partition_result = self._partition(target["collection_name"]).get(**params)
+
+                count = len(partition_result['ids'])
+                start = min(skip, count)
+                skip -= start
+                stop = count if remaining is None else min(count, start + remaining)
+                result["ids"].extend(partition_result['ids'][start:stop])
+                for field in fields:
+                    values = partition_result.get(field)
+                    if values is not None:
+                        result[field].extend(list(values[start:stop]))
+                if remaining is not None:
+                    remaining -= stop - start
+
+        return {key: (value if key == "ids" or key in include else None) for key, value in result.items()}
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        if ids is None and where is None:
+            return
+        with self._lock:
+            if ids is not None:
+                targets = [dict(target, where=where, scope=None, residual=where) for target in self._id_targets(list(ids))]
+            else:
+                targets = self._targets(where)
+
+            for target in targets:
+                collection_name, sources = target["collection_name"], target["sources"]
+                partition = self._partition(collection_name)
+                if ids is None and not target["where"]:
+                    # Every chunk of the partition goes: drop it instead of deleting row by row
+                    self._drop_partition(collection_name)
+                    continue
+
+                params = {"ids": target["ids"]} if ids is not None else {}
+                if target["where"]:
+                    params["where"] = target["where"]
+                partition.delete(**params)
+
+                if target["residual"]:
+                    # A metadata filter does not say which ids went, so diff against what is left of these sources
+                    scope = {"where": target["scope"]} if target["scope"] else {}
+                    kept_ids = set(partition.get(include=[], **scope)['ids'])
+                    placeholders = ",".join("?" * len(sources))
+                    doomed = [
+                        doc_id for (doc_id,) in self._conn.execute(
+                            f"SELECT doc_id FROM chunk_routes WHERE source IN ({placeholders})", sources
+                        ) if doc_id not in kept_ids
+                    ]
+                    self._conn.executemany("DELETE FROM chunk_routes WHERE doc_id = ?", [(doc_id,) for doc_id in doomed])
+                elif ids is not None:
+                    self._conn.executemany("DELETE FROM chunk_routes WHERE doc_id = ?", [(doc_id,) for doc_id in target["ids"]])
+                else:
+                    # Only the source scope: these sources are gone from a partition they shared
+                    self._conn.executemany("DELETE FROM chunk_routes WHERE source = ?", [(source,) for source in sources])
+                self._recount(sources)
+
+                if not self._conn.execute(
+                    "SELECT 1 FROM partitions WHERE collection_name = ? LIMIT 1", (collection_name,)
+                ).fetchone():
+                    self._drop_partition(collection_name)
+            self._conn.commit()
+
+    def _drop_partition(self, collection_name: str):
+        try:
+            self.client.delete_collection(name=collection_name)
+        except Exception as e:
+            logger.warning(f"Error dropping partition {collection_name}: {e}")
+        self._partitions.pop(collection_name, None)
+        sources = [source for (source,) in self._conn.execute(
+            "SELECT source FROM partitions WHERE collection_name = ?", (collection_name,)
+        )]
+        self._conn.executemany("DELETE FROM chunk_routes WHERE source = ?", [(source,) for source in sources])
+        self._conn.execute("DELETE FROM partitions WHERE collection_name = ?", (collection_name,))
+        logger.info(f"Dropped partition {collection_name} ({len(sources)} sources)")
+
+    def clear(self):
+        """Drop every partition"""
+        with self._lock:
+            for collection_name in self._collection_names():
+                self._drop_partition(collection_name)
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "partitions": len(self._collection_names()),
+                "sources": self._conn.execute("SELECT COUNT(*) FROM partitions").fetchone()[0],
+                "groups": self.groups,
+                "catalog_path": self.catalog_path
+            }
+
+    def close(self):
+        if self._query_executor is not None:
+            self._query_executor.shutdown(wait=False)
+        try:
+            self._conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing partition catalog: {e}")
@@ -0,0 +1,23 @@
+import logging
+from typing import List
+
+import PyPDF2
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of a PDF ('' for pages without text).
+
+    Runs in spawned worker processes: it opens the file itself, so only the
+    path and page numbers are sent to the worker and only page texts come back.
+    Kept in its own module so workers do not import DocumentProcessor and its
+    NLP models. Spawned workers also re-import a launching script, which is why
+    the API runs as `python -m uvicorn main:app` (`python main.py` hands over
+    to it) and never as a __main__ module that builds the app.
+    """
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[page_num].extract_text() or '' for page_num in range(start, min(stop, len(reader.pages)))]
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Command line maintenance tools for the SOP vector store.
+
+Usage:
+    python rag_cli.py ingest ./sop_backlog --workers 32 --batch-size 128
+    python rag_cli.py export ./backups/sop_2024_06_01
+    python rag_cli.py import ./backups/sop_2024_06_01 --db-path ./vector_db
+    python rag_cli.py cleanup --min-age 60
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import shutil
+import argparse
+from pathlib import Path
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv()
+
+# Fix tokenizers parallelism warning
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+# Add current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from rag_engine import RAGEngine, drop_retired_collections
+from upload_registry import UploadRegistry, StreamingFingerprint
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def iter_input_files(paths, allowed_extensions):
+    """Yield supported files from the given files and directories (recursively)"""
+    for path in map(Path, paths):
+        candidates = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for candidate in candidates:
+            if candidate.is_file() and candidate.suffix.lower() in allowed_extensions:
+                yield candidate
+
+
+def find_name_collisions(files) -> dict:
+    """Basenames shared by several input files (chunks are keyed by basename, so they would replace each other)"""
+    by_name = {}
+    for file_path in files:
+        by_name.setdefault(file_path.name, []).append(str(file_path))
+    return {name: paths for name, paths in by_name.items() if len(paths) > 1}
+
+
+def file_fingerprint(file_path: Path) -> StreamingFingerprint:
+    fingerprint = StreamingFingerprint()
+    with open(file_path, "rb") as f:
+        for data in iter(lambda: f.read(1024 * 1024), b""):
+            fingerprint.update(data)
+    return fingerprint
+
+
+def cmd_ingest(engine: RAGEngine, args) -> dict:
+    from document_processor import DocumentProcessor
+
+    doc_processor = DocumentProcessor()
+    files = list(iter_input_files(args.paths, doc_processor.allowed_extensions))
+    collisions = find_name_collisions(files)
+    if collisions:
+        return {
+            "status": "error",
+            "message": "Input files share a filename; rename them before ingesting",
+            "collisions": collisions
+        }
+
+    # Ingested files are stored and registered like /upload, so /files lists them and a re-index keeps them
+    upload_dir = Path(args.upload_dir)
+    incoming_dir = upload_dir / ".incoming"
+    incoming_dir.mkdir(parents=True, exist_ok=True)
+    registry = UploadRegistry(os.path.join(engine.db_path, "upload_registry.sqlite3"))
+    dedup_enabled = os.getenv("UPLOAD_DEDUP_ENABLED", "true").lower() == "true"
+
+    totals = {"files": 0, "failed_files": 0, "duplicate_files": 0, "chunks": 0,
+              "chunks_added": 0, "chunks_reused": 0, "chunks_removed": 0}
+    start = time.perf_counter()
+
+    def store(file_path: Path, fingerprint: StreamingFingerprint, chunks_created: int):
+        target = upload_dir / file_path.name
+        if not target.exists() or not target.samefile(file_path):
+            staged = incoming_dir / f"{os.getpid()}_{file_path.name}"
+            shutil.copyfile(file_path, staged)
+            os.replace(staged, target)
+        registry.record(fingerprint.hexdigest(), file_path.name, fingerprint.size,
+                        file_path.suffix.lower(), chunks_created)
+
+    def flush(pending, pending_files):
+        if pending:
+            result = engine.add_documents(pending)
+            if result["status"] != "success":
+                raise RuntimeError(result.get("message", "add_documents failed"))
+            totals["chunks_added"] += result["documents_added"]
+            totals["chunks_reused"] += result["chunks_reused"]
+            totals["chunks_removed"] += result["chunks_removed"]
+        for stored in pending_files:
+            store(*stored)
+
+    def run():
+        # Chunks of several files are embedded together so every worker gets full batches
+        pending, pending_files = [], []
+        for file_path in files:
+            try:
+                fingerprint = file_fingerprint(file_path)
+                existing = registry.lookup(fingerprint.hexdigest()) if dedup_enabled else None
+                if existing and existing["filename"] != file_path.name and (upload_dir / existing["filename"]).exists():
+                    # Same bytes already ingested under another name, as /upload does
+                    registry.add_alias(fingerprint.hexdigest(), file_path.name)
+                    totals["duplicate_files"] += 1
+                    continue
+                chunks = doc_processor.process_document(str(file_path))
+            except Exception as e:
+                logger.error(f"Skipping {file_path}: {e}")
+                totals["failed_files"] += 1
+                continue
+            totals["files"] += 1
+            totals["chunks"] += len(chunks)
+            pending.extend(chunks)
+            pending_files.append((file_path, fingerprint, len(chunks)))
+            if len(pending) >= args.flush_chunks:
+                flush(pending, pending_files)
+                pending, pending_files = [], []
+                elapsed = time.perf_counter() - start
+                logger.info(f"{totals['files']} files, {totals['chunks']} chunks, {totals['chunks'] / elapsed:.1f} chunks/sec")
+        if pending_files:
+            flush(pending, pending_files)
+
+    try:
+        if args.single_process:
+            run()
+        else:
+            with engine.multi_process_encoding(workers=args.workers, batch_size=args.batch_size):
+                run()
+    finally:
+        registry.close()
+
+    elapsed = time.perf_counter() - start
+    return dict(
+        totals,
+        status="success",
+        elapsed_sec=round(elapsed, 2),
+        chunks_per_sec=round(totals["chunks"] / elapsed, 2) if elapsed else 0.0,
+        embedded_chunks_per_sec=round(totals["chunks_added"] / elapsed, 2) if elapsed else 0.0
+    )
+
+
+def cmd_export(engine: RAGEngine, args) -> dict:
+    return engine.export_documents(args.directory, batch_size=args.batch_size)
+
+
+def cmd_import(engine: RAGEngine, args) -> dict:
+    return engine.import_documents(args.directory, batch_size=args.batch_size)
+
+
+def cmd_cleanup(engine: RAGEngine, args) -> dict:
+    dropped = drop_retired_collections(engine.db_path, args.min_age, engine.client)
+    return {"status": "success", "dropped_collections": dropped}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="SOP vector store maintenance")
+    parser.add_argument("--db-path", default=None, help="Vector DB path (defaults to VECTOR_DB_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest", help="Bulk-ingest SOP files into the vector store (multi-process CPU embedding)"
+    )
+    ingest_parser.add_argument("paths", nargs="+", help="Files or directories to ingest")
+    ingest_parser.add_argument("--workers", type=int, default=None,
+                               help="Embedding worker processes (defaults to EMBEDDING_POOL_WORKERS or CPU count)")
+    ingest_parser.add_argument("--batch-size", type=int, default=None,
+                               help="Encoder batch size per worker (defaults to EMBEDDING_POOL_BATCH_SIZE)")
+    ingest_parser.add_argument("--flush-chunks", type=int, default=2048,
+                               help="Chunks collected across files before each embedding round")
+    ingest_parser.add_argument("--single-process", action="store_true", help="Encode in this process only")
+    ingest_parser.add_argument("--upload-dir", default=os.getenv("UPLOAD_DIR", "./uploads"),
+                               help="Where ingested files are stored, as for /upload (defaults to UPLOAD_DIR)")
+    ingest_parser.set_defaults(handler=cmd_ingest)
+
+    export_parser = subparsers.add_parser("export", help="Stream the collection to JSONL + .npy")
+    export_parser.add_argument("directory", help="Output directory")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser.set_defaults(handler=cmd_export)
+
+    import_parser = subparsers.add_parser("import", help="Bulk-load an export without re-embedding")
+    import_parser.add_argument("directory", help="Directory written by 'export'")
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.set_defaults(handler=cmd_import)
+
+    cleanup_parser = subparsers.add_parser("cleanup", help="Drop collections retired by earlier re-indexes")
+    cleanup_parser.add_argument("--min-age", type=float, default=float(os.getenv("REINDEX_DRAIN_SECONDS", 60)),
+                                help="Only drop collections retired at least this many seconds ago")
+    cleanup_parser.set_defaults(handler=cmd_cleanup)
+
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    engine = RAGEngine(db_path=args.db_path)
+    try:
+        result = args.handler(engine, args)
+    finally:
+        engine.close()
+
+    print(json.dumps(result, indent=2))
+    return 0 if result.get("status") == "success" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
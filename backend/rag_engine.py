@@ -1,11 +1,18 @@
 import os
 import json
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import hashlib
+import threading
+from functools import partial
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterable
 from pathlib import Path
 import warnings
-from pathlib import Path
 from datetime import datetime
+from collections import OrderedDict
 
 # Knowledge Graph imports
 try:
@@ -23,86 +30,7 @@ except Exception as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ChromaDB import with proper error handling
-try:
-    import chromadb
-    CHROMADB_AVAILABLE = True
-    logger.info("✓ ChromaDB imported successfully")
-    logger.info("✓ ChromaDB imported successfully")
-except Exception as e:
-    logger.warning(f"ChromaDB not available: {e}")
-    CHROMADB_AVAILABLE = False
-    
-    # Create fallback ChromaDB classes
-    class MockCollection:
-        def __init__(self):
-            self.documents = []
-            self.metadatas = []
-            self.ids = []
-            
-        def add(self, documents, metadatas=None, ids=None, embeddings=None):
-            if documents:
-                for i, doc in enumerate(documents):
-                    doc_id = ids[i] if ids else f"doc_{len(self.documents)}"
-                    metadata = metadatas[i] if metadatas else {}
-                    self.documents.append(doc)
-                    self.metadatas.append(metadata)
-                    self.ids.append(doc_id)
-                    
-        def query(self, query_texts, n_results=5, **kwargs):
-            # Simple text matching for fallback
-            if not self.documents:
-                return {"documents": [[]], "metadatas": [[]], "distances": [[]]}
-                
-            results = []
-            for query in query_texts:
-                matches = []
-                for i, doc in enumerate(self.documents):
-                    if any(word.lower() in doc.lower() for word in query.lower().split()):
-                        matches.append((doc, self.metadatas[i], 0.5))
-                
-                # Sort by relevance and limit results
-                matches = matches[:n_results]
-                docs = [match[0] for match in matches]
-                metas = [match[1] for match in matches]
-                distances = [match[2] for match in matches]
-                results.append((docs, metas, distances))
-                
-            return {
-                "documents": [result[0] for result in results],
-                "metadatas": [result[1] for result in results], 
-                "distances": [result[2] for result in results]
-            }
-            
-        def delete(self, ids=None):
-            if ids:
-                for doc_id in ids:
-                    if doc_id in self.ids:
-                        idx = self.ids.index(doc_id)
-                        del self.documents[idx]
-                        del self.metadatas[idx]
-                        del self.ids[idx]
-                        
-        def count(self):
-            return len(self.documents)
-    
-    class MockClient:
-        def __init__(self, path=None):
-            self.collections = {}
-            
-        def get_or_create_collection(self, name):
-            if name not in self.collections:
-                self.collections[name] = MockCollection()
-            return self.collections[name]
-            
-        def delete_collection(self, name):
-            if name in self.collections:
-                del self.collections[name]
-    
-    chromadb = type('chromadb', (), {
-        'Client': MockClient,
-        'PersistentClient': MockClient
-    })
+from vector_store import create_vector_store
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -112,6 +40,12 @@ except ImportError:
     SENTENCE_TRANSFORMERS_AVAILABLE = False
     SentenceTransformer = None
 
+from lexical_index import LexicalIndex
+from collection_stats import CollectionStats
+from partitioned_collection import PartitionedCollection
+from parent_store import ParentStore
+from reranker import CrossEncoderReranker
+
 try:
     import numpy as np
     NUMPY_AVAILABLE = True
@@ -120,35 +54,259 @@ except ImportError:
     NUMPY_AVAILABLE = False
     np = None
 
+try:
+    from embedding_cache import EmbeddingCache
+    EMBEDDING_CACHE_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    EmbeddingCache = None
+    EMBEDDING_CACHE_AVAILABLE = False
+
+# Collection export layout (see RAGEngine.export_documents)
+EXPORT_FORMAT_VERSION = 1
+EXPORT_MANIFEST_FILE = "manifest.json"
+EXPORT_DOCUMENTS_FILE = "documents.jsonl"
+EXPORT_EMBEDDINGS_FILE = "embeddings.npy"
+EXPORT_PARENTS_FILE = "parents.jsonl"
+
+# Records which collection (and embedding model) is live after a re-index swap
+ACTIVE_COLLECTION_FILE = "active_collection.json"
+DEFAULT_COLLECTION_NAME = "sop_documents"
+
+
+def load_active_collection(db_path: str) -> Dict[str, Any]:
+    """Return the persisted active collection record, or {} when none was written"""
+    try:
+        with open(os.path.join(db_path, ACTIVE_COLLECTION_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Could not read active collection record: {e}")
+        return {}
+
+
+def save_active_collection(db_path: str, record: Dict[str, Any]):
+    """Atomically persist the active collection record"""
+    os.makedirs(db_path, exist_ok=True)
+    path = os.path.join(db_path, ACTIVE_COLLECTION_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+SIDECAR_SUFFIXES = ('lexical', 'stats', 'parents', 'partitions')
+
+
+def remove_collection_sidecars(db_path: str, collection_name: str):
+    """Delete the SQLite sidecar indexes kept next to a collection"""
+    for suffix in SIDECAR_SUFFIXES:
+        base_path = os.path.join(db_path, f"{collection_name}_{suffix}.sqlite3")
+        for path in (base_path, base_path + "-wal", base_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def drop_retired_collections(db_path: str, min_age_seconds: float = 0, client=None) -> List[str]:
+    """Drop collections a re-index retired at least min_age_seconds ago; returns their names.
+    
+    Re-index swaps only record the previous collection as retired, because
+    other API workers may still be serving from it until they notice the new
+    active collection. Run this once every worker has switched.
+    """
+    now = time.time()
+    retired = load_active_collection(db_path).get('retired_collections', [])
+    due = [entry['collection_name'] for entry in retired if now - entry['retired_at'] >= min_age_seconds]
+    if not due:
+        return []
+    
+    owns_client = client is None
+    client = client or create_vector_store(os.getenv('VECTOR_BACKEND'), db_path)
+    try:
+        for name in due:
+            catalog_path = os.path.join(db_path, f"{name}_partitions.sqlite3")
+            try:
+                if os.path.exists(catalog_path):
+                    partitioned = PartitionedCollection(client, name, catalog_path)
+                    partitioned.clear()
+                    partitioned.close()
+                else:
+                    client.delete_collection(name=name)
+            except Exception as e:
+                logger.warning(f"Error deleting retired collection {name}: {e}")
+            remove_collection_sidecars(db_path, name)
+            logger.info(f"Dropped retired collection {name}")
+    finally:
+        if owns_client:
+            client.close()
+    
+    # Re-read: a re-index may have retired another collection meanwhile
+    record = load_active_collection(db_path)
+    record['retired_collections'] = [
+        entry for entry in record.get('retired_collections', []) if entry['collection_name'] not in due
+    ]
+    save_active_collection(db_path, record)
+    return due
+
+
 class RAGEngine:
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, collection_name: str = None, embedding_model_name: str = None,
+                 embedding_model=None):
+        """embedding_model: an already loaded encoder (encode() + get_sentence_embedding_dimension()),
+        used instead of loading embedding_model_name with sentence-transformers"""
         self.db_path = db_path or os.getenv('VECTOR_DB_PATH', './vector_db')
-        self.embedding_model_name = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+        
+        # Collection and model default to the last re-index result, so stored vectors and queries match
+        active = load_active_collection(self.db_path)
+        self.collection_name = collection_name or active.get('collection_name', DEFAULT_COLLECTION_NAME)
+        self.embedding_model_name = (
+            embedding_model_name or active.get('embedding_model') or os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+        )
+        env_model = os.getenv('EMBEDDING_MODEL')
+        if not embedding_model_name and active.get('embedding_model') and env_model and env_model != active['embedding_model']:
+            logger.warning(
+                f"EMBEDDING_MODEL={env_model} differs from the indexed model "
+                f"{active['embedding_model']}; re-index to apply it"
+            )
         self.max_search_results = int(os.getenv('MAX_SEARCH_RESULTS', 5))
         
-        # Initialize ChromaDB
+        # Hybrid (BM25 + dense) retrieval settings
+        self.hybrid_search = os.getenv('HYBRID_SEARCH', 'true').lower() == 'true'
+        self.rrf_k = int(os.getenv('RRF_K', 60))
+        self.hybrid_candidate_multiplier = int(os.getenv('HYBRID_CANDIDATE_MULTIPLIER', 3))
+        
+        # Cross-encoder re-ranking settings
+        self.rerank_enabled = os.getenv('RERANK_ENABLED', 'false').lower() == 'true'
+        self.rerank_candidates = int(os.getenv('RERANK_CANDIDATES', 20))
+        self.reranker = CrossEncoderReranker(
+            model_name=os.getenv('RERANKER_MODEL', 'cross-encoder/ms-marco-MiniLM-L-6-v2'),
+            batch_size=int(os.getenv('RERANK_BATCH_SIZE', 16)),
+            timeout_ms=int(os.getenv('RERANK_TIMEOUT_MS', 250)),
+            cache_size=int(os.getenv('RERANK_CACHE_SIZE', 4096))
+        )
+        if self.rerank_enabled:
+            self.reranker.warm_up()
+        
+        # Max-marginal-relevance diversification settings
+        self.mmr_enabled = os.getenv('MMR_ENABLED', 'false').lower() == 'true'
+        self.mmr_lambda = float(os.getenv('MMR_LAMBDA', 0.5))
+        self.mmr_fetch_k = int(os.getenv('MMR_FETCH_K', 20))
+        
+        # Small-to-big retrieval: match child chunks, return their parent windows
+        self.small_to_big = os.getenv('SMALL_TO_BIG', 'false').lower() == 'true'
+        self.small_to_big_fetch_multiplier = int(os.getenv('SMALL_TO_BIG_FETCH_MULTIPLIER', 3))
+        
+        # Query embedding cache (LRU, keyed by model name + normalized query)
+        self.query_cache_size = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', 1024))
+        self._query_embedding_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
+        
+        # Callbacks told which sources changed (answer caches etc.), see add_change_listener
+        self._change_listeners = []
+        
+        # In-flight users (see acquire/release); a retired engine closes when the last one finishes
+        self._users = 0
+        self._retired = False
+        self._users_lock = threading.Lock()
+        
+        # Dedicated executors for the async facade: interactive queries never queue behind bulk ingest
+        self._query_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('RAG_QUERY_WORKERS', 4)), thread_name_prefix="rag-query"
+        )
+        self._ingest_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('RAG_INGEST_WORKERS', 1)), thread_name_prefix="rag-ingest"
+        )
+        
+        # Initialize vector store (ChromaDB, the in-process NumPy index, or Postgres + pgvector)
         try:
-            self.client = chromadb.PersistentClient(path=self.db_path)
-            self.collection = self.client.get_or_create_collection(
-                name="sop_documents"
+            self.client = create_vector_store(os.getenv('VECTOR_BACKEND'), self.db_path)
+            self.vector_backend = self.client.backend
+            
+            # Optional partitioning: one collection per source behind a routing catalog
+            self.vector_partitioning = os.getenv('VECTOR_PARTITIONING', 'none').lower()
+            if self.vector_partitioning == 'source':
+                self.collection = PartitionedCollection(
+                    self.client,
+                    self.collection_name,
+                    os.path.join(self.db_path, f"{self.collection_name}_partitions.sqlite3"),
+                    collection_metadata={"hnsw:space": "cosine"}
+                )
+            else:
+                self.vector_partitioning = 'none'
+                self.collection = self.client.get_or_create_collection(
+                    name=self.collection_name,
+                    metadata={"hnsw:space": "cosine"}
+                )
+            self.distance_space = self._collection_distance_space()
+            logger.info(
+                f"Vector store ({self.vector_backend}, partitioning={self.vector_partitioning}) "
+                f"initialized at {self.db_path}"
             )
-            logger.info(f"ChromaDB initialized at {self.db_path}")
         except Exception as e:
-            logger.error(f"Error initializing ChromaDB: {str(e)}")
+            logger.error(f"Error initializing vector store: {str(e)}")
             raise
         
+        # Initialize lexical (BM25) index
+        self.lexical_index = None
+        if self.hybrid_search:
+            try:
+                self.lexical_index = LexicalIndex(
+                    os.path.join(self.db_path, f"{self.collection_name}_lexical.sqlite3")
+                )
+                if self.lexical_index.count() == 0 and self.collection.count() > 0:
+                    self._backfill_lexical_index()
+            except Exception as e:
+                logger.warning(f"Lexical index not available, using dense retrieval only: {e}")
+                self.lexical_index = None
+        
+        # Initialize per-source / per-file-type chunk counters
+        self.collection_stats = CollectionStats(
+            os.path.join(self.db_path, f"{self.collection_name}_stats.sqlite3")
+        )
+        if not self.collection_stats.is_initialized() or self.collection_stats.total() != self.collection.count():
+            self._rebuild_collection_stats()
+        
+        # Parent windows of small-to-big child chunks
+        self.parent_store = ParentStore(
+            os.path.join(self.db_path, f"{self.collection_name}_parents.sqlite3")
+        )
+        
         # Initialize embedding model
         try:
-            self.embedding_model = SentenceTransformer(self.embedding_model_name)
+            if embedding_model is not None:
+                self.embedding_model = embedding_model
+            else:
+                self.embedding_model = SentenceTransformer(self.embedding_model_name)
             logger.info(f"Embedding model {self.embedding_model_name} loaded successfully")
         except Exception as e:
             logger.error(f"Error loading embedding model: {str(e)}")
             raise
         
+        # Multi-process encoding pool, only started for bulk ingest (see multi_process_encoding)
+        self._embedding_pool = None
+        self._embedding_pool_batch_size = 32
+        
+        # Initialize persistent embedding cache (shared by all workers on this host)
+        self.embedding_cache = None
+        if EMBEDDING_CACHE_AVAILABLE and os.getenv('EMBEDDING_CACHE_ENABLED', 'true').lower() == 'true':
+            try:
+                self.embedding_cache = EmbeddingCache(
+                    cache_dir=os.getenv('EMBEDDING_CACHE_DIR', os.path.join(self.db_path, 'embedding_cache')),
+                    model_name=self.embedding_model_name,
+                    dimension=self.embedding_model.get_sentence_embedding_dimension(),
+                    max_entries=int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 200000)),
+                    dtype=os.getenv('EMBEDDING_CACHE_DTYPE', 'float16')
+                )
+            except Exception as e:
+                logger.warning(f"Embedding cache not available: {e}")
+                self.embedding_cache = None
+        
         # Initialize Knowledge Graph driver
         self.kg_driver = None
         self.kg_available = False
-        if KG_AVAILABLE:
+        if KG_AVAILABLE and os.getenv('KG_ENABLED', 'true').lower() == 'true':
             try:
                 self.kg_driver = get_neo4j_driver()
                 # Test connection
@@ -161,47 +319,170 @@ class RAGEngine:
                 self.kg_driver = None
                 self.kg_available = False
     
-    def add_documents(self, documents: List[Dict]) -> Dict[str, Any]:
-        """Add documents to vector database"""
+    def _chunk_content_id(self, source: str, text: str, parent_id: str = None) -> str:
+        """Content-addressed chunk ID: hash of source (and parent, for child chunks) plus whitespace-normalized text"""
+        normalized_text = " ".join(text.split())
+        key = f"{source}\x00{parent_id}\x00{normalized_text}" if parent_id else f"{source}\x00{normalized_text}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+    
+    def _encode_texts(self, texts: List[str], show_progress_bar: bool = False) -> List[List[float]]:
+        """Encode texts with the embedding model, reading through the disk embedding cache"""
+        if not texts:
+            return []
+        if not self.embedding_cache:
+            return self._encode_uncached(texts, show_progress_bar).tolist()
+        
+        cached = {}
+        try:
+            cached = self.embedding_cache.get_many(texts)
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+        
+        missing_positions = [i for i in range(len(texts)) if i not in cached]
+        if missing_positions:
+            missing_texts = [texts[i] for i in missing_positions]
+            encoded = self._encode_uncached(missing_texts, show_progress_bar)
+            try:
+                self.embedding_cache.put_many(missing_texts, encoded)
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+            for position, embedding in zip(missing_positions, encoded):
+                cached[position] = embedding
+        
+        return [np.asarray(cached[i], dtype=np.float32).tolist() for i in range(len(texts))]
+    
+    def _encode_uncached(self, texts: List[str], show_progress_bar: bool = False):
+        """Run the embedding model, sharded across the worker pool when one is active"""
+        # Small batches (e.g. single queries) are cheaper in-process than shipped to workers
+        if self._embedding_pool is not None and len(texts) > self._embedding_pool_batch_size:
+            return self.embedding_model.encode_multi_process(
+                texts, self._embedding_pool, batch_size=self._embedding_pool_batch_size
+            )
+        return self.embedding_model.encode(texts, show_progress_bar=show_progress_bar)
+    
+    @contextmanager
+    def multi_process_encoding(self, workers: int = None, batch_size: int = None):
+        """Encode with one CPU worker process per model copy while the context is open.
+        
+        Meant for bulk ingest; the pool is stopped on exit. Must be entered from
+        a `if __name__ == "__main__"` guarded entry point.
+        """
+        workers = workers or int(os.getenv('EMBEDDING_POOL_WORKERS', os.cpu_count() or 1))
+        batch_size = batch_size or int(os.getenv('EMBEDDING_POOL_BATCH_SIZE', 64))
+        
+        if self._embedding_pool is not None or not hasattr(self.embedding_model, 'start_multi_process_pool'):
+            # Nested use, or a model without pool support: keep single-process encoding
+            yield self
+            return
+        
+        logger.info(f"Starting embedding pool with {workers} CPU workers (batch size {batch_size})")
+        self._embedding_pool = self.embedding_model.start_multi_process_pool(target_devices=['cpu'] * workers)
+        self._embedding_pool_batch_size = batch_size
+        try:
+            yield self
+        finally:
+            pool, self._embedding_pool = self._embedding_pool, None
+            self.embedding_model.stop_multi_process_pool(pool)
+            logger.info("Embedding pool stopped")
+    
+    def _existing_ids(self, ids: List[str], batch_size: int = 500) -> set:
+        """Return the subset of ids already stored in the collection"""
+        existing = set()
+        for start in range(0, len(ids), batch_size):
+            result = self.collection.get(ids=ids[start:start + batch_size], include=[])
+            existing.update(result['ids'])
+        return existing
+    
+    def add_documents(self, documents: List[Dict], replace_sources: bool = True) -> Dict[str, Any]:
+        """Add documents to vector database.
+        
+        Chunks are stored under content-addressed IDs, so chunks that are already
+        stored are reused instead of re-embedded. With replace_sources, chunks of
+        the same source that are no longer present are removed.
+        """
         try:
             if not documents:
                 return {"status": "error", "message": "No documents provided"}
             
-            texts = [doc['text'] for doc in documents]
+            # Create content-addressed IDs (duplicate chunks within a document collapse)
+            unique_documents = OrderedDict()
+            parents = OrderedDict()
+            for doc in documents:
+                doc_id, parent_id = self._document_ids(doc)
+                if parent_id:
+                    # Small-to-big child chunk: its parent window goes to the parent store
+                    parents.setdefault(parent_id, (parent_id, doc['source'], doc['parent_text']))
+                if doc_id not in unique_documents:
+                    unique_documents[doc_id] = dict(doc, parent_id=parent_id) if parent_id else doc
             
-            # Generate embeddings
-            logger.info(f"Generating embeddings for {len(texts)} documents...")
-            embeddings = self.embedding_model.encode(texts, show_progress_bar=True).tolist()
+            # Look up which chunks are already stored before touching the encoder
+            existing_ids = self._existing_ids(list(unique_documents.keys()))
+            new_ids = [doc_id for doc_id in unique_documents if doc_id not in existing_ids]
+            new_documents = [unique_documents[doc_id] for doc_id in new_ids]
             
-            # Create unique IDs
-            ids = [f"{doc['source']}_{doc['chunk_id']}_{datetime.now().timestamp()}" for doc in documents]
+            self.parent_store.add(list(parents.values()))
             
-            # Prepare metadata
-            metadatas = []
-            for doc in documents:
-                metadata = {
-                    'source': doc['source'],
-                    'chunk_id': doc['chunk_id'],
-                    'file_type': doc['file_type'],
-                    'chunk_size': doc['chunk_size'],
-                    'steps_count': len(doc['steps']),
-                    'safety_notes_count': len(doc['safety_notes']),
-                    'added_timestamp': datetime.now().isoformat()
-                }
-                metadatas.append(metadata)
-            
-            # Add to collection
-            self.collection.add(
-                embeddings=embeddings,
-                documents=texts,
-                metadatas=metadatas,
-                ids=ids
-            )
+            if new_documents:
+                texts = [doc['text'] for doc in new_documents]
+                
+                # Generate embeddings for new chunks only
+                logger.info(f"Generating embeddings for {len(texts)} new chunks ({len(existing_ids)} reused)...")
+                embeddings = self._encode_texts(texts, show_progress_bar=True)
+                
+                # Prepare metadata
+                metadatas = []
+                for doc in new_documents:
+                    metadata = {
+                        'source': doc['source'],
+                        'chunk_id': doc['chunk_id'],
+                        'file_type': doc['file_type'],
+                        'chunk_size': doc['chunk_size'],
+                        'steps_count': len(doc['steps']),
+                        'safety_notes_count': len(doc['safety_notes']),
+                        'added_timestamp': datetime.now().isoformat()
+                    }
+                    if doc.get('parent_id'):
+                        metadata['parent_id'] = doc['parent_id']
+                    metadatas.append(metadata)
+                
+                # Add to collection
+                self.collection.add(
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=metadatas,
+                    ids=new_ids
+                )
+                
+                # Keep the lexical index in step with the collection
+                if self.lexical_index:
+                    self.lexical_index.add(new_ids, texts, [doc['source'] for doc in new_documents])
+                self.collection_stats.add(metadatas)
             
-            logger.info(f"Successfully added {len(documents)} documents to vector database")
+            # Remove chunks of re-uploaded sources that are no longer in the document; only once the
+            # new chunks are stored, so a failed encode or add leaves the previous version intact
+            removed_count = 0
+            changed_sources = {doc['source'] for doc in new_documents}
+            if replace_sources:
+                for source in {doc['source'] for doc in documents}:
+                    removed = self._prune_source(
+                        source, unique_documents,
+                        [parent_id for parent_id, parent_source, _ in parents.values() if parent_source == source]
+                    )
+                    if removed:
+                        removed_count += removed
+                        changed_sources.add(source)
+            
+            logger.info(
+                f"Vector database updated: {len(new_documents)} added, "
+                f"{len(existing_ids)} reused, {removed_count} removed"
+            )
+            if changed_sources:
+                self._notify_change(sorted(changed_sources))
             return {
                 "status": "success",
-                "documents_added": len(documents),
+                "documents_added": len(new_documents),
+                "chunks_reused": len(existing_ids),
+                "chunks_removed": removed_count,
                 "total_documents": self.collection.count()
             }
             
@@ -209,69 +490,466 @@ class RAGEngine:
             logger.error(f"Error adding documents to vector database: {str(e)}")
             return {"status": "error", "message": str(e)}
     
-    def search_documents(self, query: str, n_results: int = None, filter_metadata: Dict = None) -> List[Dict]:
-        """Search for relevant documents with Knowledge Graph filtering"""
+    def _document_ids(self, doc: Dict) -> tuple:
+        """(chunk id, parent id or None) of a processed chunk"""
+        parent_id = self._chunk_content_id(doc['source'], doc['parent_text']) if doc.get('parent_text') else None
+        return self._chunk_content_id(doc['source'], doc['text'], parent_id), parent_id
+    
+    def _prune_source(self, source: str, keep_ids, keep_parent_ids: List[str]) -> int:
+        """Remove stored chunks (and parent windows) of a source that are not in keep_ids"""
+        stored = self.collection.get(where={"source": source}, include=['metadatas'])
+        stale = [
+            (doc_id, metadata) for doc_id, metadata in zip(stored['ids'], stored['metadatas'])
+            if doc_id not in keep_ids
+        ]
+        if stale:
+            stale_ids = [doc_id for doc_id, _ in stale]
+            self.collection.delete(ids=stale_ids)
+            if self.lexical_index:
+                self.lexical_index.delete(stale_ids)
+            self.collection_stats.remove([metadata for _, metadata in stale])
+        self.parent_store.retain_source(source, keep_parent_ids)
+        return len(stale)
+    
+    def add_document_batches(self, batches: Iterable[List[Dict]],
+                             on_batch: Callable[[List[Dict], Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """Add a document that arrives as chunk batches (DocumentProcessor.iter_chunk_batches).
+        
+        Each batch is stored as it comes, so only one batch of chunks and
+        embeddings is held at a time. Once the last batch is in, chunks of the
+        same sources that did not reappear are removed, as add_documents does
+        for a re-upload. on_batch(batch, result) runs after every stored batch.
+        """
         try:
-            n_results = n_results or self.max_search_results
+            totals = {"documents_added": 0, "chunks_reused": 0, "chunks_removed": 0, "chunks": 0}
+            seen = {}
+            for batch in batches:
+                result = self.add_documents(batch, replace_sources=False)
+                if result["status"] != "success":
+                    return result
+                totals["documents_added"] += result["documents_added"]
+                totals["chunks_reused"] += result["chunks_reused"]
+                totals["chunks"] += len(batch)
+                for doc in batch:
+                    doc_id, parent_id = self._document_ids(doc)
+                    ids, parent_ids = seen.setdefault(doc['source'], (set(), set()))
+                    ids.add(doc_id)
+                    if parent_id:
+                        parent_ids.add(parent_id)
+                if on_batch:
+                    on_batch(batch, result)
             
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode([query]).tolist()
+            if not seen:
+                return {"status": "error", "message": "No documents provided"}
             
-            # Prepare search parameters for ChromaDB 0.5.x
-            search_params = {
-                "query_texts": [query],  # Use query_texts instead of query_embeddings
-                "n_results": min(n_results, self.collection.count()),
-                "include": ['documents', 'metadatas', 'distances']
-            }
+            changed_sources = []
+            for source, (ids, parent_ids) in seen.items():
+                removed = self._prune_source(source, ids, list(parent_ids))
+                if removed:
+                    totals["chunks_removed"] += removed
+                    changed_sources.append(source)
+            if changed_sources:
+                self._notify_change(changed_sources)
             
-            # Add metadata filter if provided
-            if filter_metadata:
-                search_params["where"] = filter_metadata
+            return dict(totals, status="success", total_documents=self.collection.count())
             
-            # Perform search
-            results = self.collection.query(**search_params)
-            
-            # Format initial results
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    relevance_score = 1 - results['distances'][0][i]
-                    formatted_results.append({
-                        'text': results['documents'][0][i],
-                        'metadata': results['metadatas'][0][i],
-                        'relevance_score': relevance_score,
-                        'distance': results['distances'][0][i]
-                    })
-            
-            # Apply Knowledge Graph filtering if available
-            if self.kg_available and KG_AVAILABLE:
-                try:
-                    logger.info(f"Applying Knowledge Graph filtering for query: {query[:50]}...")
-                    
-                    # Extract entities from query
-                    entities = extract_entities_from_query(query)
-                    logger.info(f"Extracted entities: {entities}")
-                    
-                    # Apply KG filtering
-                    kg_filtered_results = filter_rag_results_with_kg(
-                        rag_results=formatted_results,
-                        query=query,
-                        driver=self.kg_driver
-                    )
+        except Exception as e:
+            logger.error(f"Error adding document batches to vector database: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
+    def add_change_listener(self, listener: Callable[[Optional[List[str]]], None]):
+        """Call listener(sources) after chunks of those sources were added or removed.
+        
+        sources is None when the whole collection was cleared.
+        """
+        if listener not in self._change_listeners:
+            self._change_listeners.append(listener)
+    
+    def remove_change_listener(self, listener: Callable[[Optional[List[str]]], None]):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+    
+    def get_changes_since(self, version: int) -> tuple:
+        """(index version, sources changed after version, None for all), as seen by every worker.
+
+        Change listeners only hear about changes made through this engine; the
+        version lives in the shared counters file, so it also covers other
+        workers writing to the same collection.
+        """
+        return self.collection_stats.changes_since(version)
+    
+    def _notify_change(self, sources: Optional[List[str]]):
+        for listener in list(self._change_listeners):
+            try:
+                listener(sources)
+            except Exception as e:
+                logger.warning(f"Change listener failed: {e}")
+    
+    def _normalize_query(self, query: str) -> str:
+        """Normalize query text for embedding cache lookups"""
+        return " ".join(query.lower().split())
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the configured model, using the LRU query cache"""
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries, encoding all cache misses in one forward pass"""
+        embeddings = [None] * len(queries)
+        missing = {}
+        
+        with self._query_cache_lock:
+            for i, query in enumerate(queries):
+                cache_key = (self.embedding_model_name, self._normalize_query(query))
+                cached = self._query_embedding_cache.get(cache_key)
+                if cached is not None:
+                    self._query_embedding_cache.move_to_end(cache_key)
+                    self.query_cache_hits += 1
+                    embeddings[i] = cached
+                else:
+                    # Identical queries in one batch share a single encoder row
+                    missing.setdefault(cache_key, []).append(i)
+            self.query_cache_misses += sum(len(positions) for positions in missing.values())
+        
+        if missing:
+            # Encode outside the lock so concurrent cache hits are not held up
+            keys = list(missing.keys())
+            encoded = self._encode_texts([queries[missing[key][0]] for key in keys])
+            
+            with self._query_cache_lock:
+                for key, embedding in zip(keys, encoded):
+                    for i in missing[key]:
+                        embeddings[i] = embedding
+                    if self.query_cache_size > 0:
+                        self._query_embedding_cache[key] = embedding
+                
+                while len(self._query_embedding_cache) > self.query_cache_size:
+                    self._query_embedding_cache.popitem(last=False)
+        
+        return embeddings
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Get query embedding cache statistics"""
+        lookups = self.query_cache_hits + self.query_cache_misses
+        return {
+            "hits": self.query_cache_hits,
+            "misses": self.query_cache_misses,
+            "hit_rate": round(self.query_cache_hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._query_embedding_cache),
+            "max_size": self.query_cache_size
+        }
+    
+    def _collection_distance_space(self) -> str:
+        """Distance the collection reports: Chroma collections created before cosine was requested keep L2"""
+        if self.vector_backend != 'chroma' or isinstance(self.collection, PartitionedCollection):
+            return 'cosine'
+        space = (getattr(self.collection, 'metadata', None) or {}).get('hnsw:space', 'l2')
+        if space != 'cosine':
+            logger.warning(
+                f"Collection {self.collection_name} uses {space} distance; scores are converted "
+                f"to cosine similarity, re-index to store it with cosine distance"
+            )
+        return space
+    
+    def _format_query_results(self, results: Dict, row: int = 0) -> List[Dict]:
+        """Format one row of a collection.query result, scored as cosine similarity"""
+        formatted_results = []
+        if results['documents'] and results['documents'][row]:
+            for i in range(len(results['documents'][row])):
+                distance = results['distances'][row][i]
+                if self.distance_space == 'l2':
+                    # Squared L2 is 2 - 2 * cosine for unit-length embeddings (all-MiniLM-L6-v2 and most sentence-transformers models)
+                    distance = distance / 2
+                relevance_score = 1 - distance
+                formatted_results.append({
+                    'id': results['ids'][row][i] if results.get('ids') else None,
+                    'text': results['documents'][row][i],
+                    'metadata': results['metadatas'][row][i],
+                    'relevance_score': relevance_score,
+                    'distance': distance
+                })
+        return formatted_results
+    
+    def _apply_kg_filter(self, query: str, formatted_results: List[Dict]) -> List[Dict]:
+        """Filter search results through the Knowledge Graph when it is available"""
+        if self.kg_available and KG_AVAILABLE:
+            try:
+                logger.info(f"Applying Knowledge Graph filtering for query: {query[:50]}...")
+                
+                # Extract entities from query
+                entities = extract_entities_from_query(query)
+                logger.info(f"Extracted entities: {entities}")
+                
+                # Apply KG filtering
+                kg_filtered_results = filter_rag_results_with_kg(
+                    rag_results=formatted_results,
+                    query=query,
+                    driver=self.kg_driver
+                )
+                
+                if kg_filtered_results:
+                    formatted_results = kg_filtered_results
+                    logger.info(f"Knowledge Graph filtering applied: {len(formatted_results)} results after KG filtering")
+                else:
+                    logger.info("No KG filtering applied - using original RAG results")
                     
-                    if kg_filtered_results:
-                        formatted_results = kg_filtered_results
-                        logger.info(f"Knowledge Graph filtering applied: {len(formatted_results)} results after KG filtering")
-                    else:
-                        logger.info("No KG filtering applied - using original RAG results")
-                        
+            except Exception as e:
+                logger.warning(f"Knowledge Graph filtering failed, using RAG results only: {str(e)}")
+        else:
+            logger.info("Knowledge Graph not available - using RAG results only")
+        
+        return formatted_results
+    
+    def _dense_search(self, query_embeddings: List[List[float]], n_results: int, where: Dict = None) -> List[List[Dict]]:
+        """Run one (possibly multi-row) embedding query against the collection"""
+        total_count = self.collection.count()
+        if total_count == 0:
+            return [[] for _ in query_embeddings]
+        
+        # Prepare search parameters for ChromaDB 0.5.x
+        search_params = {
+            "query_embeddings": query_embeddings,
+            "n_results": min(n_results, total_count),
+            "include": ['documents', 'metadatas', 'distances']
+        }
+        
+        # Add metadata filter if provided
+        if where:
+            search_params["where"] = where
+        
+        results = self.collection.query(**search_params)
+        return [self._format_query_results(results, row) for row in range(len(query_embeddings))]
+    
+    def _lexical_sources(self, where: Dict = None):
+        """Translate a metadata filter into a lexical source filter.
+        
+        Returns (supported, sources); only unfiltered and source-only filters
+        can be answered by the lexical index.
+        """
+        if not where:
+            return True, None
+        if set(where.keys()) != {"source"}:
+            return False, None
+        
+        condition = where["source"]
+        if isinstance(condition, str):
+            return True, [condition]
+        if isinstance(condition, dict) and len(condition) == 1:
+            if "$eq" in condition:
+                return True, [condition["$eq"]]
+            if "$in" in condition:
+                return True, list(condition["$in"])
+        return False, None
+    
+    def _cosine_similarity(self, a, b) -> float:
+        if NUMPY_AVAILABLE:
+            a = np.asarray(a, dtype=np.float32)
+            b = np.asarray(b, dtype=np.float32)
+            denominator = float(np.linalg.norm(a) * np.linalg.norm(b))
+            return float(np.dot(a, b)) / denominator if denominator else 0.0
+        dot = sum(x * y for x, y in zip(a, b))
+        denominator = (sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5)
+        return dot / denominator if denominator else 0.0
+    
+    def _hybrid_fuse(self, query: str, query_embedding: List[float], dense_results: List[Dict],
+                     n_candidates: int, where: Dict = None) -> List[Dict]:
+        """Fuse dense and BM25 rankings with reciprocal-rank fusion"""
+        supported, sources = self._lexical_sources(where)
+        if not supported:
+            return dense_results
+        
+        lexical_hits = self.lexical_index.search(query, n_results=n_candidates, sources=sources)
+        if not lexical_hits:
+            return dense_results
+        
+        fused_scores = {}
+        for rank, result in enumerate(dense_results):
+            fused_scores[result['id']] = 1.0 / (self.rrf_k + rank + 1)
+        for rank, (doc_id, _) in enumerate(lexical_hits):
+            fused_scores[doc_id] = fused_scores.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        
+        results_by_id = {result['id']: result for result in dense_results}
+        lexical_ids = {doc_id for doc_id, _ in lexical_hits}
+        
+        # Fetch chunks that only the lexical index found, scoring them against the query vector
+        missing_ids = [doc_id for doc_id, _ in lexical_hits if doc_id not in results_by_id]
+        if missing_ids:
+            fetched = self.collection.get(
+                ids=missing_ids,
+                include=['documents', 'metadatas', 'embeddings']
+            )
+            for i, doc_id in enumerate(fetched['ids']):
+                similarity = self._cosine_similarity(query_embedding, fetched['embeddings'][i])
+                results_by_id[doc_id] = {
+                    'id': doc_id,
+                    'text': fetched['documents'][i],
+                    'metadata': fetched['metadatas'][i],
+                    'relevance_score': similarity,
+                    'distance': 1 - similarity
+                }
+        
+        fused_results = []
+        for doc_id, score in sorted(fused_scores.items(), key=lambda item: item[1], reverse=True):
+            result = results_by_id.get(doc_id)
+            if result is None:
+                continue
+            result['rank_score'] = score
+            result['lexical_match'] = doc_id in lexical_ids
+            fused_results.append(result)
+        
+        return fused_results
+    
+    def _candidate_embeddings(self, rows: List[List[Dict]]) -> Dict[str, Any]:
+        """Fetch stored embeddings for every candidate in one collection lookup"""
+        ids = list(dict.fromkeys(result['id'] for row in rows for result in row if result.get('id')))
+        if not ids:
+            return {}
+        stored = self.collection.get(ids=ids, include=['embeddings'])
+        if stored.get('embeddings') is None:
+            return {}
+        return dict(zip(stored['ids'], stored['embeddings']))
+    
+    def _mmr_select(self, query_embedding: List[float], candidates: List[Dict], embeddings: Dict[str, Any],
+                    k: int, lambda_mult: float) -> List[Dict]:
+        """Pick k candidates trading relevance against redundancy (max marginal relevance)"""
+        usable = [candidate for candidate in candidates if candidate.get('id') in embeddings]
+        if len(usable) <= k:
+            return candidates[:k]
+        
+        vectors = np.asarray([embeddings[candidate['id']] for candidate in usable], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+        
+        relevance = vectors @ query_vector
+        similarity = vectors @ vectors.T
+        
+        selected = [int(np.argmax(relevance))]
+        max_similarity = similarity[selected[0]].copy()
+        available = np.ones(len(usable), dtype=bool)
+        available[selected[0]] = False
+        
+        while len(selected) < k:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+            scores[~available] = -np.inf
+            pick = int(np.argmax(scores))
+            selected.append(pick)
+            available[pick] = False
+            np.maximum(max_similarity, similarity[pick], out=max_similarity)
+        
+        return [usable[i] for i in selected]
+    
+    def _retrieve(self, queries: List[str], query_embeddings: List[List[float]], n_results: int,
+                  where: Dict = None, rerank: bool = None, mmr: bool = None,
+                  mmr_lambda: float = None) -> List[List[Dict]]:
+        """Retrieve ranked candidates for each query (dense, optionally fused with BM25, re-ranked and diversified)"""
+        rerank = self.rerank_enabled if rerank is None else rerank
+        mmr = (self.mmr_enabled if mmr is None else mmr) and NUMPY_AVAILABLE
+        mmr_lambda = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+        use_hybrid = self.hybrid_search and self.lexical_index is not None
+        
+        # Several child chunks can share a parent, so small-to-big ranks more children than results
+        n_ranked = n_results * self.small_to_big_fetch_multiplier if self.small_to_big else n_results
+        
+        # Re-ranking and MMR need a wider candidate pool than the final top-k
+        n_fetch = n_ranked
+        if rerank:
+            n_fetch = max(n_fetch, self.rerank_candidates)
+        if mmr:
+            n_fetch = max(n_fetch, self.mmr_fetch_k)
+        n_candidates = n_fetch * self.hybrid_candidate_multiplier if use_hybrid else n_fetch
+        
+        dense_rows = self._dense_search(query_embeddings, n_candidates, where)
+        
+        ranked_rows = []
+        for query, query_embedding, dense_results in zip(queries, query_embeddings, dense_rows):
+            if use_hybrid:
+                try:
+                    dense_results = self._hybrid_fuse(query, query_embedding, dense_results, n_candidates, where)
                 except Exception as e:
-                    logger.warning(f"Knowledge Graph filtering failed, using RAG results only: {str(e)}")
-            else:
-                logger.info("Knowledge Graph not available - using RAG results only")
+                    logger.warning(f"Hybrid fusion failed, using dense results only: {str(e)}")
+            
+            candidates = dense_results[:n_fetch]
+            if rerank:
+                try:
+                    reranked = self.reranker.rerank(query, candidates)
+                    if reranked is not None:
+                        candidates = reranked
+                except Exception as e:
+                    logger.warning(f"Re-ranking failed, using retrieval order: {str(e)}")
+            
+            ranked_rows.append(candidates)
+        
+        if mmr:
+            try:
+                embeddings = self._candidate_embeddings(ranked_rows)
+                ranked_rows = [
+                    self._mmr_select(query_embedding, candidates, embeddings, n_ranked, mmr_lambda)
+                    for query_embedding, candidates in zip(query_embeddings, ranked_rows)
+                ]
+            except Exception as e:
+                logger.warning(f"MMR diversification failed, using ranked order: {str(e)}")
+        
+        return [self._expand_to_parents(candidates, n_results) for candidates in ranked_rows]
+    
+    def _expand_to_parents(self, candidates: List[Dict], n_results: int) -> List[Dict]:
+        """Replace child chunks with their parent windows, merging children of the same parent"""
+        parent_ids = list(dict.fromkeys(
+            candidate['metadata']['parent_id'] for candidate in candidates
+            if candidate.get('metadata') and candidate['metadata'].get('parent_id')
+        ))
+        if not parent_ids:
+            return candidates[:n_results]
+        
+        parent_texts = self.parent_store.get_many(parent_ids)
+        expanded = []
+        by_parent = {}
+        for candidate in candidates:
+            parent_id = (candidate.get('metadata') or {}).get('parent_id')
+            if parent_id in by_parent:
+                by_parent[parent_id]['child_matches'] += 1
+                continue
+            if len(expanded) >= n_results:
+                continue
+            if parent_id and parent_id in parent_texts:
+                candidate = dict(
+                    candidate,
+                    text=parent_texts[parent_id],
+                    matched_text=candidate['text'],
+                    parent_id=parent_id,
+                    child_matches=1
+                )
+                by_parent[parent_id] = candidate
+            expanded.append(candidate)
+        return expanded
+    
+    def _rank_key(self, result: Dict) -> float:
+        """Ordering key: fused/reranked score when present, otherwise vector relevance"""
+        return result.get('rank_score', result['relevance_score'])
+    
+    def search_documents(self, query: str, n_results: int = None, filter_metadata: Dict = None,
+                         rerank: bool = None, mmr: bool = None, mmr_lambda: float = None) -> List[Dict]:
+        """Search for relevant documents with Knowledge Graph filtering.
+        
+        rerank and mmr override RERANK_ENABLED and MMR_ENABLED for this request;
+        mmr_lambda (1.0 = pure relevance, 0.0 = pure diversity) overrides MMR_LAMBDA.
+        """
+        try:
+            n_results = n_results or self.max_search_results
+            
+            # Generate query embedding with the same model used at ingest
+            query_embedding = self.embed_query(query)
+            
+            # Perform search
+            formatted_results = self._retrieve(
+                [query], [query_embedding], n_results, filter_metadata, rerank, mmr, mmr_lambda
+            )[0]
+            
+            # Apply Knowledge Graph filtering
+            formatted_results = self._apply_kg_filter(query, formatted_results)
             
             # Sort by relevance score
-            formatted_results.sort(key=lambda x: x['relevance_score'], reverse=True)
+            formatted_results.sort(key=self._rank_key, reverse=True)
             
             logger.info(f"Final results: {len(formatted_results)} documents for query: {query[:50]}...")
             return formatted_results
@@ -280,6 +958,71 @@ class RAGEngine:
             logger.error(f"Error searching documents: {str(e)}")
             return []
     
+    def search_documents_batch(self, queries: List[str], n_results: int = None, where: Dict = None,
+                               rerank: bool = None, mmr: bool = None,
+                               mmr_lambda: float = None) -> List[List[Dict]]:
+        """Search for several queries with one encoder pass and one collection query"""
+        try:
+            if not queries:
+                return []
+            
+            n_results = n_results or self.max_search_results
+            
+            # Encode every query in a single forward pass
+            query_embeddings = self.embed_queries(queries)
+            
+            # One multi-row query returns one result row per query
+            ranked_rows = self._retrieve(queries, query_embeddings, n_results, where, rerank, mmr, mmr_lambda)
+            
+            batch_results = []
+            for query, formatted_results in zip(queries, ranked_rows):
+                formatted_results = self._apply_kg_filter(query, formatted_results)
+                formatted_results.sort(key=self._rank_key, reverse=True)
+                batch_results.append(formatted_results)
+            
+            logger.info(f"Batch search completed for {len(queries)} queries")
+            return batch_results
+            
+        except Exception as e:
+            logger.error(f"Error in batch search: {str(e)}")
+            return [[] for _ in queries]
+    
+    # Async facade: blocking encoder and vector store work runs on the dedicated executors
+    
+    async def _run_on(self, executor: ThreadPoolExecutor, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+    
+    async def arun_query(self, func, *args, **kwargs):
+        """Run a blocking retrieval call on the query executor"""
+        return await self._run_on(self._query_executor, func, *args, **kwargs)
+    
+    def run_query(self, func, *args, **kwargs):
+        """Blocking counterpart of arun_query for worker threads (SOPChat runs its LLM calls elsewhere)"""
+        if threading.current_thread().name.startswith("rag-query"):
+            return func(*args, **kwargs)  # already on the query executor; waiting on it could deadlock
+        return self._query_executor.submit(func, *args, **kwargs).result()
+    
+    async def asearch(self, query: str, **kwargs) -> List[Dict]:
+        """Async search_documents on the query executor"""
+        return await self._run_on(self._query_executor, self.search_documents, query, **kwargs)
+    
+    async def asearch_batch(self, queries: List[str], **kwargs) -> List[List[Dict]]:
+        """Async search_documents_batch on the query executor"""
+        return await self._run_on(self._query_executor, self.search_documents_batch, queries, **kwargs)
+    
+    async def aadd_documents(self, documents: List[Dict], **kwargs) -> Dict[str, Any]:
+        """Async add_documents on the ingest executor"""
+        return await self._run_on(self._ingest_executor, self.add_documents, documents, **kwargs)
+    
+    async def aadd_document_batches(self, batches: Iterable[List[Dict]], **kwargs) -> Dict[str, Any]:
+        """Async add_document_batches on the ingest executor (the batches are produced there too)"""
+        return await self._run_on(self._ingest_executor, self.add_document_batches, batches, **kwargs)
+    
+    async def adelete_documents_by_source(self, source_filename: str) -> Dict[str, Any]:
+        """Async delete_documents_by_source on the ingest executor"""
+        return await self._run_on(self._ingest_executor, self.delete_documents_by_source, source_filename)
+    
     def search_by_source(self, source_filename: str, query: str = None) -> List[Dict]:
         """Search documents from specific source file"""
         try:
@@ -312,43 +1055,38 @@ class RAGEngine:
     
     def get_similar_documents(self, document_id: str, n_results: int = 3) -> List[Dict]:
         """Find documents similar to a specific document"""
+        return self.get_similar_documents_batch([document_id], n_results).get(document_id, [])
+    
+    def get_similar_documents_batch(self, document_ids: List[str], n_results: int = 3) -> Dict[str, List[Dict]]:
+        """Find similar documents for several chunks with one lookup and one query.
+        
+        Uses the stored embeddings of the given chunks, so nothing is re-embedded,
+        and excludes each chunk from its own results by id.
+        """
         try:
-            # Get the document
-            doc_result = self.collection.get(
-                ids=[document_id],
-                include=['documents', 'metadatas']
-            )
+            unique_ids = list(dict.fromkeys(document_ids))
+            if not unique_ids:
+                return {}
             
-            if not doc_result['documents'] or not doc_result['documents'][0]:
-                return []
+            stored = self.collection.get(ids=unique_ids, include=['embeddings'])
+            stored_embeddings = stored.get('embeddings')
+            if stored_embeddings is None or not stored['ids']:
+                return {document_id: [] for document_id in unique_ids}
             
-            # Use the document's text to find similar ones via text search
-            # (ChromaDB 0.5.x handles embeddings internally when using query_texts)
-            original_text = doc_result['documents'][0]
+            found_ids = list(stored['ids'])
+            query_embeddings = [np.asarray(embedding, dtype=np.float32).tolist() for embedding in stored_embeddings]
             
-            results = self.collection.query(
-                query_texts=[original_text],
-                n_results=n_results + 1,  # +1 to exclude the original document
-                include=['documents', 'metadatas', 'distances']
-            )
+            # +1 so each chunk can drop itself and still return n_results neighbours
+            rows = self._dense_search(query_embeddings, n_results + 1)
             
-            # Format and filter out the original document
-            formatted_results = []
-            if results['documents'] and results['documents'][0]:
-                for i in range(len(results['documents'][0])):
-                    if results['documents'][0][i] != original_text:
-                        formatted_results.append({
-                            'text': results['documents'][0][i],
-                            'metadata': results['metadatas'][0][i],
-                            'relevance_score': 1 - results['distances'][0][i],
-                            'distance': results['distances'][0][i]
-                        })
-            
-            return formatted_results[:n_results]
+            similar = {document_id: [] for document_id in unique_ids}
+            for document_id, row in zip(found_ids, rows):
+                similar[document_id] = [result for result in row if result['id'] != document_id][:n_results]
+            return similar
             
         except Exception as e:
             logger.error(f"Error finding similar documents: {str(e)}")
-            return []
+            return {document_id: [] for document_id in document_ids}
     
     def delete_documents_by_source(self, source_filename: str) -> Dict[str, Any]:
         """Delete all documents from a specific source"""
@@ -356,16 +1094,21 @@ class RAGEngine:
             # Get all documents from this source
             results = self.collection.get(
                 where={"source": source_filename},
-                include=['metadatas']
+                include=[]
             )
             
             if not results['ids']:
                 return {"status": "info", "message": "No documents found for this source"}
             
-            # Delete documents
-            self.collection.delete(ids=results['ids'])
+            # Delete documents (a partitioned collection drops the source's partition)
+            self.collection.delete(where={"source": source_filename})
+            if self.lexical_index:
+                self.lexical_index.delete_by_source(source_filename)
+            self.collection_stats.remove_source(source_filename)
+            self.parent_store.delete_by_source(source_filename)
             
             logger.info(f"Deleted {len(results['ids'])} documents from source: {source_filename}")
+            self._notify_change([source_filename])
             return {
                 "status": "success",
                 "deleted_count": len(results['ids']),
@@ -379,40 +1122,24 @@ class RAGEngine:
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get collection statistics"""
         try:
-            total_count = self.collection.count()
-            
-            # Get all documents to analyze
-            if total_count > 0:
-                all_docs = self.collection.get(include=['metadatas'])
-                
-                # Analyze sources
-                sources = {}
-                file_types = {}
-                
-                for metadata in all_docs['metadatas']:
-                    source = metadata.get('source', 'unknown')
-                    file_type = metadata.get('file_type', 'unknown')
-                    
-                    sources[source] = sources.get(source, 0) + 1
-                    file_types[file_type] = file_types.get(file_type, 0) + 1
-                
-                return {
-                    "total_documents": total_count,
-                    "collection_name": self.collection.name,
-                    "sources": sources,
-                    "file_types": file_types,
-                    "embedding_model": self.embedding_model_name,
-                    "db_path": self.db_path
-                }
-            else:
-                return {
-                    "total_documents": 0,
-                    "collection_name": self.collection.name,
-                    "sources": {},
-                    "file_types": {},
-                    "embedding_model": self.embedding_model_name,
-                    "db_path": self.db_path
-                }
+            # Counters are maintained on add/delete, so no metadata scan is needed
+            return {
+                "total_documents": self.collection.count(),
+                "collection_name": self.collection.name,
+                "sources": self.collection_stats.get_source_counts(),
+                "file_types": self.collection_stats.get_file_type_counts(),
+                "embedding_model": self.embedding_model_name,
+                "vector_backend": self.vector_backend,
+                "vector_partitioning": self.vector_partitioning,
+                "partitions": self.collection.get_stats()["partitions"] if isinstance(self.collection, PartitionedCollection) else None,
+                "db_path": self.db_path,
+                "query_embedding_cache": self.get_query_cache_stats(),
+                "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else None,
+                "hybrid_search": self.lexical_index is not None,
+                "small_to_big": self.small_to_big,
+                "parent_windows": self.parent_store.count(),
+                "reranker": dict(self.reranker.get_stats(), enabled=self.rerank_enabled)
+            }
                 
         except Exception as e:
             logger.error(f"Error getting collection stats: {str(e)}")
@@ -421,56 +1148,313 @@ class RAGEngine:
     def clear_collection(self) -> Dict[str, Any]:
         """Clear all documents from collection"""
         try:
-            # Delete the collection and recreate it
-            self.client.delete_collection(name="sop_documents")
-            self.collection = self.client.get_or_create_collection(
-                name="sop_documents",
-                metadata={"hnsw:space": "cosine"}
-            )
+            if isinstance(self.collection, PartitionedCollection):
+                self.collection.clear()
+            else:
+                # Delete the collection and recreate it
+                self.client.delete_collection(name=self.collection_name)
+                self.collection = self.client.get_or_create_collection(
+                    name=self.collection_name,
+                    metadata={"hnsw:space": "cosine"}
+                )
+                self.distance_space = self._collection_distance_space()
+            if self.lexical_index:
+                self.lexical_index.clear()
+            self.collection_stats.clear()
+            self.parent_store.clear()
             
             logger.info("Collection cleared successfully")
+            self._notify_change(None)
             return {"status": "success", "message": "Collection cleared"}
             
         except Exception as e:
             logger.error(f"Error clearing collection: {str(e)}")
             return {"status": "error", "message": str(e)}
     
-    def export_documents(self, output_path: str) -> Dict[str, Any]:
-        """Export all documents to a file"""
+    def export_documents(self, output_dir: str, batch_size: int = 1000) -> Dict[str, Any]:
+        """Export the collection to a directory, one page at a time.
+        
+        Writes documents.jsonl (id, text, metadata per line), embeddings.npy
+        (float32 rows in the same order), parents.jsonl (small-to-big parent
+        windows, when there are any) and manifest.json.
+        """
         try:
-            import json
+            os.makedirs(output_dir, exist_ok=True)
+            documents_path = os.path.join(output_dir, EXPORT_DOCUMENTS_FILE)
+            embeddings_path = os.path.join(output_dir, EXPORT_EMBEDDINGS_FILE)
             
-            all_docs = self.collection.get(
-                include=['documents', 'metadatas', 'embeddings']
-            )
+            total_count = self.collection.count()
+            embeddings_out = None
+            exported_count = 0
             
-            export_data = {
+            with open(documents_path, 'w', encoding='utf-8') as f:
+                for offset in range(0, total_count, batch_size):
+                    batch = self.collection.get(
+                        include=['documents', 'metadatas', 'embeddings'],
+                        limit=batch_size,
+                        offset=offset
+                    )
+                    if not batch['ids']:
+                        break
+                    
+                    # Rows past the count taken at the start (concurrent adds) are left for the next export
+                    rows = min(len(batch['ids']), total_count - exported_count)
+                    if rows <= 0:
+                        break
+                    
+                    batch_embeddings = batch.get('embeddings')
+                    if batch_embeddings is not None and len(batch_embeddings):
+                        batch_embeddings = np.asarray(batch_embeddings[:rows], dtype=np.float32)
+                        if embeddings_out is None:
+                            embeddings_out = np.lib.format.open_memmap(
+                                embeddings_path, mode='w+', dtype=np.float32,
+                                shape=(total_count, batch_embeddings.shape[1])
+                            )
+                        embeddings_out[exported_count:exported_count + rows] = batch_embeddings
+                    
+                    for i in range(rows):
+                        f.write(json.dumps({
+                            "id": batch['ids'][i],
+                            "text": batch['documents'][i],
+                            "metadata": batch['metadatas'][i]
+                        }, ensure_ascii=False) + "\n")
+                    exported_count += rows
+            
+            parent_count = 0
+            if self.parent_store.count():
+                with open(os.path.join(output_dir, EXPORT_PARENTS_FILE), 'w', encoding='utf-8') as f:
+                    for rows in self.parent_store.iter_all(batch_size):
+                        for parent_id, source, text in rows:
+                            f.write(json.dumps({"id": parent_id, "source": source, "text": text}, ensure_ascii=False) + "\n")
+                        parent_count += len(rows)
+            
+            embedding_dimension = None
+            if embeddings_out is not None:
+                embedding_dimension = int(embeddings_out.shape[1])
+                embeddings_out.flush()
+                del embeddings_out
+            
+            manifest = {
+                "format_version": EXPORT_FORMAT_VERSION,
                 "collection_name": self.collection.name,
-                "total_documents": len(all_docs['documents']),
+                "embedding_model": self.embedding_model_name,
+                "embedding_dimension": embedding_dimension,
+                "total_documents": exported_count,
                 "export_timestamp": datetime.now().isoformat(),
-                "documents": []
+                "documents_file": EXPORT_DOCUMENTS_FILE,
+                "embeddings_file": EXPORT_EMBEDDINGS_FILE if embedding_dimension else None,
+                "parents_file": EXPORT_PARENTS_FILE if parent_count else None,
+                "total_parents": parent_count
             }
+            with open(os.path.join(output_dir, EXPORT_MANIFEST_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
             
-            for i in range(len(all_docs['documents'])):
-                export_data["documents"].append({
-                    "id": all_docs['ids'][i],
-                    "text": all_docs['documents'][i],
-                    "metadata": all_docs['metadatas'][i],
-                    "embedding": all_docs['embeddings'][i] if all_docs['embeddings'] else None
-                })
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            if exported_count < total_count:
+                logger.warning(f"Collection shrank during export: {exported_count} of {total_count} rows written")
             
-            logger.info(f"Exported {len(all_docs['documents'])} documents to {output_path}")
-            return {"status": "success", "exported_count": len(all_docs['documents'])}
+            logger.info(f"Exported {exported_count} documents to {output_dir}")
+            return {"status": "success", "exported_count": exported_count, "output_dir": output_dir}
             
         except Exception as e:
             logger.error(f"Error exporting documents: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    def import_documents(self, input_dir: str, batch_size: int = 1000) -> Dict[str, Any]:
+        """Bulk-load a directory written by export_documents.
+        
+        Stored embeddings are inserted as-is, so nothing is re-embedded unless
+        the export has no embeddings. Chunks whose IDs already exist are skipped.
+        """
+        try:
+            with open(os.path.join(input_dir, EXPORT_MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            
+            if manifest.get("format_version") != EXPORT_FORMAT_VERSION:
+                return {"status": "error", "message": f"Unsupported export format: {manifest.get('format_version')}"}
+            
+            embeddings = None
+            if manifest.get("embeddings_file"):
+                expected_dimension = self.embedding_model.get_sentence_embedding_dimension()
+                if manifest.get("embedding_dimension") != expected_dimension:
+                    return {
+                        "status": "error",
+                        "message": (
+                            f"Export embeddings have dimension {manifest.get('embedding_dimension')}, "
+                            f"but {self.embedding_model_name} produces {expected_dimension}"
+                        )
+                    }
+                if manifest.get("embedding_model") != self.embedding_model_name:
+                    logger.warning(
+                        f"Importing embeddings from {manifest.get('embedding_model')} "
+                        f"into a collection using {self.embedding_model_name}"
+                    )
+                embeddings = np.load(os.path.join(input_dir, manifest["embeddings_file"]), mmap_mode='r')
+            
+            if manifest.get("parents_file"):
+                with open(os.path.join(input_dir, manifest["parents_file"]), 'r', encoding='utf-8') as f:
+                    parents = []
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        parent = json.loads(line)
+                        parents.append((parent['id'], parent['source'], parent['text']))
+                        if len(parents) >= batch_size:
+                            self.parent_store.add(parents)
+                            parents = []
+                    self.parent_store.add(parents)
+            
+            imported_count = 0
+            skipped_count = 0
+            imported_sources = set()
+            row = 0
+            
+            def flush(records: List[Dict], start_row: int):
+                nonlocal imported_count, skipped_count
+                existing_ids = self._existing_ids([record['id'] for record in records])
+                keep = [i for i, record in enumerate(records) if record['id'] not in existing_ids]
+                skipped_count += len(records) - len(keep)
+                if not keep:
+                    return
+                
+                ids = [records[i]['id'] for i in keep]
+                texts = [records[i]['text'] for i in keep]
+                metadatas = [records[i]['metadata'] for i in keep]
+                if embeddings is not None:
+                    batch_embeddings = np.asarray(embeddings[[start_row + i for i in keep]], dtype=np.float32).tolist()
+                else:
+                    batch_embeddings = self._encode_texts(texts)
+                
+                self.collection.add(embeddings=batch_embeddings, documents=texts, metadatas=metadatas, ids=ids)
+                if self.lexical_index:
+                    self.lexical_index.add(ids, texts, [metadata.get('source', 'unknown') for metadata in metadatas])
+                self.collection_stats.add(metadatas)
+                imported_sources.update(metadata.get('source', 'unknown') for metadata in metadatas)
+                imported_count += len(ids)
+            
+            records = []
+            with open(os.path.join(input_dir, manifest["documents_file"]), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    records.append(json.loads(line))
+                    if len(records) >= batch_size:
+                        flush(records, row)
+                        row += len(records)
+                        records = []
+                if records:
+                    flush(records, row)
+                    row += len(records)
+            
+            logger.info(f"Imported {imported_count} documents from {input_dir} ({skipped_count} already present)")
+            if imported_sources:
+                self._notify_change(sorted(imported_sources))
+            return {
+                "status": "success",
+                "imported_count": imported_count,
+                "skipped_count": skipped_count,
+                "total_documents": self.collection.count()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error importing documents: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
+    def _backfill_lexical_index(self, batch_size: int = 500):
+        """Index chunks that were stored before the lexical index existed"""
+        total_count = self.collection.count()
+        logger.info(f"Building lexical index for {total_count} existing chunks...")
+        
+        for offset in range(0, total_count, batch_size):
+            batch = self.collection.get(
+                include=['documents', 'metadatas'],
+                limit=batch_size,
+                offset=offset
+            )
+            self.lexical_index.add(
+                batch['ids'],
+                batch['documents'],
+                [metadata.get('source', 'unknown') for metadata in batch['metadatas']]
+            )
+        
+        logger.info(f"Lexical index built with {self.lexical_index.count()} chunks")
+    
+    def _rebuild_collection_stats(self, batch_size: int = 1000):
+        """Recount chunks per source from collection metadata (first run, or after counters drifted)"""
+        total_count = self.collection.count()
+        logger.info(f"Building chunk counters for {total_count} existing chunks...")
+        
+        self.collection_stats.clear()
+        for offset in range(0, total_count, batch_size):
+            batch = self.collection.get(include=['metadatas'], limit=batch_size, offset=offset)
+            self.collection_stats.add(batch['metadatas'])
+        self.collection_stats.mark_initialized()
+    
+    def drop_collection(self):
+        """Delete this engine's collection and its sidecar indexes, then close it.
+        
+        Used to discard the shadow collection of a failed or cancelled
+        re-index; retired live collections go through drop_retired_collections.
+        """
+        try:
+            if isinstance(self.collection, PartitionedCollection):
+                self.collection.clear()
+            else:
+                self.client.delete_collection(name=self.collection_name)
+        except Exception as e:
+            logger.warning(f"Error deleting collection {self.collection_name}: {e}")
+        
+        self.close()
+        remove_collection_sidecars(self.db_path, self.collection_name)
+        logger.info(f"Dropped collection {self.collection_name}")
+    
+    def acquire(self) -> bool:
+        """Pin the engine for an in-flight request; False once it has been retired"""
+        with self._users_lock:
+            if self._retired:
+                return False
+            self._users += 1
+            return True
+    
+    def release(self):
+        """Unpin after acquire(); closes a retired engine when its last user finishes"""
+        with self._users_lock:
+            self._users -= 1
+            close = self._retired and self._users == 0
+        if close:
+            self.close()
+    
+    def retire(self):
+        """Stop handing the engine out and close it once every in-flight user has released it"""
+        with self._users_lock:
+            self._retired = True
+            close = self._users == 0
+        if close:
+            self.close()
+    
     def close(self):
         """Close KG driver and cleanup resources"""
+        for executor_name in ('_query_executor', '_ingest_executor'):
+            executor = getattr(self, executor_name, None)
+            if executor:
+                executor.shutdown(wait=False)
+                setattr(self, executor_name, None)
+        if getattr(self, 'lexical_index', None):
+            self.lexical_index.close()
+            self.lexical_index = None
+        if isinstance(getattr(self, 'collection', None), PartitionedCollection):
+            self.collection.close()
+        if getattr(self, 'client', None):
+            self.client.close()
+            self.client = None
+        if getattr(self, 'parent_store', None):
+            self.parent_store.close()
+            self.parent_store = None
+        if getattr(self, 'collection_stats', None):
+            self.collection_stats.close()
+            self.collection_stats = None
+        if getattr(self, 'embedding_cache', None):
+            self.embedding_cache.close()
+            self.embedding_cache = None
         if self.kg_driver:
             try:
                 self.kg_driver.close()
@@ -487,15 +1471,15 @@ class RAGEngine:
         Return the number of chunks for a given source filename.
         """
         try:
-            # Get all documents/chunks for this source
-            results = self.collection.get(
-                where={"source": filename},
-                include=['documents']
-            )
-            if results and 'documents' in results and results['documents']:
-                return len(results['documents'])
-            else:
-                return 0
+            return self.collection_stats.get_source_count(filename)
         except Exception as e:
             logger.error(f"Error getting chunk count for {filename}: {str(e)}")
             return 0
+    
+    def get_chunk_counts(self) -> Dict[str, int]:
+        """Return {source filename: chunk count} for every stored source"""
+        try:
+            return self.collection_stats.get_source_counts()
+        except Exception as e:
+            logger.error(f"Error getting chunk counts: {str(e)}")
+            return {}
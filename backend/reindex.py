@@ -0,0 +1,213 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+from rag_engine import RAGEngine, load_active_collection, save_active_collection, DEFAULT_COLLECTION_NAME
+from document_processor import DocumentProcessor
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ReindexCancelled(Exception):
+    pass
+
+
+class ReindexJob:
+    """Rebuild the vector store from the uploaded source files into a shadow collection.
+
+    The live engine keeps serving while the shadow collection is built with the
+    new embedding model / chunking. When it is complete, on_complete(engine,
+    processor) swaps it in and the new collection is recorded as active; other
+    API workers follow the active collection record on their next request.
+    A file that fails to index fails the job (the shadow is dropped) unless
+    allow_failed_files is set.
+    """
+
+    def __init__(self, db_path: str, upload_dir: Path, embedding_model: str, chunk_size: int,
+                 chunk_overlap: int, on_complete: Callable[[RAGEngine, DocumentProcessor], None],
+                 allow_failed_files: bool = None):
+        self.db_path = db_path
+        self.upload_dir = Path(upload_dir)
+        self.embedding_model = embedding_model
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.on_complete = on_complete
+        if allow_failed_files is None:
+            allow_failed_files = os.getenv("REINDEX_ALLOW_FAILED_FILES", "false").lower() == "true"
+        self.allow_failed_files = allow_failed_files
+
+        self.collection_name = f"{DEFAULT_COLLECTION_NAME}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        self.state = "pending"
+        self.error = None
+        self.total_files = 0
+        self.processed_files = 0
+        self.failed_files = []
+        self.chunks_indexed = 0
+        self.started_at = None
+        self.finished_at = None
+
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="rag-reindex", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self.state in ("pending", "running", "swapping")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "collection_name": self.collection_name,
+            "embedding_model": self.embedding_model,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "total_files": self.total_files,
+            "processed_files": self.processed_files,
+            "failed_files": self.failed_files,
+            "chunks_indexed": self.chunks_indexed,
+            "progress": round(self.processed_files / self.total_files, 4) if self.total_files else 0.0,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+    def _source_files(self) -> Dict[str, Path]:
+        return {path.name: path for path in self.upload_dir.glob("*") if path.is_file()}
+
+    @staticmethod
+    def _signature(file_path: Path):
+        # Uploads land with os.replace, so a new version always changes the inode
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _index_file(self, engine: RAGEngine, processor: DocumentProcessor, file_path: Path,
+                    indexed: Dict[str, Any]) -> bool:
+        if self._cancel.is_set():
+            raise ReindexCancelled()
+        signature = self._signature(file_path)
+        try:
+            result = engine.add_document_batches(processor.iter_chunk_batches(str(file_path)))
+            if result["status"] != "success":
+                raise RuntimeError(result.get("message", "add_document_batches failed"))
+            self.chunks_indexed += result["chunks"]
+            if file_path.name in self.failed_files:
+                self.failed_files.remove(file_path.name)
+            indexed[file_path.name] = signature
+            return True
+        except ReindexCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Re-index failed for {file_path.name}: {e}")
+            if file_path.name not in self.failed_files:
+                self.failed_files.append(file_path.name)
+            # Not retried until the file changes again
+            indexed[file_path.name] = signature
+            return False
+
+    def _catch_up(self, engine: RAGEngine, processor: DocumentProcessor, indexed: Dict[str, Any]) -> bool:
+        """Index files uploaded or replaced since they were last indexed and drop deleted ones.
+
+        Returns True if anything changed.
+        """
+        changed = False
+        current = self._source_files()
+        for name, file_path in current.items():
+            if indexed.get(name) != self._signature(file_path):
+                self.total_files += 1
+                self._index_file(engine, processor, file_path, indexed)
+                self.processed_files += 1
+                changed = True
+        for name in set(indexed) - set(current):
+            engine.delete_documents_by_source(name)
+            del indexed[name]
+            if name in self.failed_files:
+                self.failed_files.remove(name)
+            changed = True
+        return changed
+
+    def _run(self):
+        self.state = "running"
+        self.started_at = datetime.now().isoformat()
+        engine = None
+        activated = False
+        try:
+            engine = RAGEngine(
+                db_path=self.db_path,
+                collection_name=self.collection_name,
+                embedding_model_name=self.embedding_model
+            )
+            processor = DocumentProcessor(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+
+            files = self._source_files()
+            self.total_files = len(files)
+            logger.info(f"Re-indexing {self.total_files} files into {self.collection_name}")
+            indexed = {}
+            for file_path in files.values():
+                self._index_file(engine, processor, file_path, indexed)
+                self.processed_files += 1
+
+            # Catch up with uploads and deletes that happened while the shadow was built,
+            # until a pass finds nothing new
+            while self._catch_up(engine, processor, indexed):
+                pass
+
+            if self._cancel.is_set():
+                raise ReindexCancelled()
+            if self.failed_files and not self.allow_failed_files:
+                raise RuntimeError(
+                    f"{len(self.failed_files)} file(s) failed to index: {', '.join(self.failed_files)}"
+                )
+
+            # Record the new collection first so a restart never comes back to a half-swapped state
+            # The previous collection is only retired: other API workers may still be
+            # serving it, so it is dropped later by drop_retired_collections
+            self.state = "swapping"
+            previous = load_active_collection(self.db_path)
+            retired = previous.get("retired_collections", []) + [{
+                "collection_name": previous.get("collection_name", DEFAULT_COLLECTION_NAME),
+                "retired_at": time.time()
+            }]
+            save_active_collection(self.db_path, {
+                "collection_name": self.collection_name,
+                "embedding_model": self.embedding_model,
+                "chunk_size": self.chunk_size,
+                "chunk_overlap": self.chunk_overlap,
+                "activated_at": datetime.now().isoformat(),
+                "retired_collections": retired
+            })
+            activated = True
+            self.on_complete(engine, processor)
+
+            # Uploads that finished against the previous engine between the last pass and the swap
+            try:
+                self._catch_up(engine, processor, indexed)
+            except Exception as e:
+                logger.error(f"Post-swap catch-up into {self.collection_name} failed: {e}")
+            self.state = "completed"
+            logger.info(f"Re-index complete: {self.collection_name} is now active")
+
+        except ReindexCancelled:
+            self.state = "cancelled"
+            logger.info(f"Re-index into {self.collection_name} cancelled")
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Re-index into {self.collection_name} failed: {e}")
+        finally:
+            self.finished_at = datetime.now().isoformat()
+            if engine is not None and not activated:
+                engine.drop_collection()
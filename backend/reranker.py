@@ -0,0 +1,129 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CrossEncoder = None
+    CROSS_ENCODER_AVAILABLE = False
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Re-score (query, chunk) pairs with a local cross-encoder under a latency budget"""
+
+    def __init__(self, model_name: str, batch_size: int = 16, timeout_ms: int = 250, cache_size: int = 4096):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.timeout_ms = timeout_ms
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_failed = False
+        self._load_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._score_cache = OrderedDict()
+
+        self.reranked_queries = 0
+        self.budget_exceeded = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _get_model(self):
+        """Load the cross-encoder on first use"""
+        if self._model is not None or self._model_failed:
+            return self._model
+        with self._load_lock:
+            if self._model is None and not self._model_failed:
+                try:
+                    if not CROSS_ENCODER_AVAILABLE:
+                        raise ImportError("sentence-transformers CrossEncoder not available")
+                    self._model = CrossEncoder(self.model_name)
+                    logger.info(f"Re-ranker model {self.model_name} loaded successfully")
+                except Exception as e:
+                    logger.warning(f"Re-ranker not available: {e}")
+                    self._model_failed = True
+        return self._model
+
+    def warm_up(self):
+        """Load the model ahead of the first request"""
+        self._get_model()
+
+    def _query_hash(self, query: str) -> str:
+        return hashlib.sha1(" ".join(query.lower().split()).encode('utf-8')).hexdigest()
+
+    def rerank(self, query: str, candidates: List[Dict]) -> Optional[List[Dict]]:
+        """Return candidates ordered by cross-encoder score.
+
+        Returns None when the model is unavailable or scoring overruns the
+        latency budget, so the caller keeps its existing order.
+        """
+        if not candidates:
+            return candidates
+
+        model = self._get_model()
+        if model is None:
+            return None
+
+        query_hash = self._query_hash(query)
+        scores = [None] * len(candidates)
+        pending = []
+
+        with self._cache_lock:
+            for i, candidate in enumerate(candidates):
+                cache_key = (query_hash, candidate.get('id') or hashlib.sha1(candidate['text'].encode('utf-8')).hexdigest())
+                cached = self._score_cache.get(cache_key)
+                if cached is not None:
+                    self._score_cache.move_to_end(cache_key)
+                    self.cache_hits += 1
+                    scores[i] = cached
+                else:
+                    self.cache_misses += 1
+                    pending.append((i, cache_key))
+
+        start = time.perf_counter()
+        for batch_start in range(0, len(pending), self.batch_size):
+            batch = pending[batch_start:batch_start + self.batch_size]
+            pairs = [(query, candidates[i]['text']) for i, _ in batch]
+            batch_scores = model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+
+            with self._cache_lock:
+                for (i, cache_key), score in zip(batch, batch_scores):
+                    scores[i] = float(score)
+                    self._score_cache[cache_key] = float(score)
+                while len(self._score_cache) > self.cache_size:
+                    self._score_cache.popitem(last=False)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms > self.timeout_ms and batch_start + self.batch_size < len(pending):
+                # Scores computed so far stay cached for the next identical query
+                self.budget_exceeded += 1
+                logger.warning(f"Re-ranking exceeded {self.timeout_ms}ms budget ({elapsed_ms:.0f}ms), keeping dense order")
+                return None
+
+        self.reranked_queries += 1
+        for candidate, score in zip(candidates, scores):
+            candidate['rerank_score'] = score
+            candidate['rank_score'] = score
+
+        return sorted(candidates, key=lambda candidate: candidate['rerank_score'], reverse=True)
+
+    def get_stats(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "reranked_queries": self.reranked_queries,
+            "budget_exceeded": self.budget_exceeded,
+            "timeout_ms": self.timeout_ms,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_size": len(self._score_cache)
+        }
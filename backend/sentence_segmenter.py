@@ -0,0 +1,101 @@
+import os
+import re
+import logging
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# full:        trained dependency parser decides sentence boundaries (tagger, NER, lemmatizer not loaded)
+# senter:      the model's small statistical sentence recognizer instead of the parser
+# sentencizer: rule-based punctuation splitter on a blank pipeline, no model download needed
+# none:        no spaCy; DocumentProcessor falls back to its character splitter
+SEGMENTATION_BACKENDS = ("full", "senter", "sentencizer", "none")
+
+# Components that only produce annotations the chunker never reads
+_UNUSED_COMPONENTS = ["tagger", "attribute_ruler", "lemmatizer", "ner"]
+
+
+@lru_cache(maxsize=None)
+def load_pipeline(backend: str, model_name: str = "en_core_web_sm"):
+    """Load (once per process) the smallest spaCy pipeline that yields doc.sents for the backend"""
+    if backend not in SEGMENTATION_BACKENDS:
+        raise ValueError(f"Unknown segmentation backend: {backend} (expected one of {', '.join(SEGMENTATION_BACKENDS)})")
+    if backend == "none":
+        return None
+    try:
+        import spacy
+        if backend == "sentencizer":
+            nlp = spacy.blank("en")
+            nlp.add_pipe("sentencizer")
+        elif backend == "senter":
+            nlp = spacy.load(model_name, exclude=_UNUSED_COMPONENTS + ["parser"])
+            nlp.enable_pipe("senter")
+        else:
+            nlp = spacy.load(model_name, exclude=_UNUSED_COMPONENTS + ["senter"])
+        logger.info(f"Sentence segmentation: {backend} pipeline {nlp.pipe_names}")
+        return nlp
+    except Exception as e:
+        logger.warning(f"spaCy {backend} pipeline unavailable ({str(e)}); using the character splitter")
+        return None
+
+
+class SentenceSegmenter:
+    """Sentence segmentation of streamed text blocks with a reusable spaCy pipeline.
+
+    Blocks (PDF pages, whole DOCX/TXT documents) are cut at paragraph breaks
+    into pieces of at most block_chars, so long documents never reach spaCy's
+    max_length, and the pieces go through nlp.pipe in batches, optionally
+    across n_process worker processes.
+    """
+
+    def __init__(self, backend: str = "full", model_name: str = "en_core_web_sm", n_process: int = 1,
+                 batch_size: int = 16, block_chars: int = 100000):
+        self.backend = backend
+        self.model_name = model_name
+        self.n_process = max(1, n_process)
+        self.batch_size = batch_size
+        self.nlp = load_pipeline(backend, model_name)
+        self.block_chars = min(block_chars, self.nlp.max_length) if self.nlp else block_chars
+
+    @classmethod
+    def from_config(cls) -> "SentenceSegmenter":
+        return cls(
+            backend=os.getenv('SEGMENTATION_BACKEND', 'full').lower(),
+            model_name=os.getenv('SPACY_MODEL', 'en_core_web_sm'),
+            n_process=int(os.getenv('SEGMENTATION_N_PROCESS', 1)),
+            batch_size=int(os.getenv('SEGMENTATION_BATCH_SIZE', 16)),
+            block_chars=int(os.getenv('SEGMENTATION_BLOCK_CHARS', 100000))
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.nlp is not None
+
+    def _pieces(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Split each block at paragraph (then line) breaks into pieces of at most block_chars"""
+        for block in blocks:
+            while len(block) > self.block_chars:
+                window = block[:self.block_chars]
+                cut = window.rfind('\n\n')
+                if cut <= 0:
+                    cut = window.rfind('\n')
+                cut = cut + 1 if cut > 0 else self.block_chars
+                yield block[:cut]
+                block = block[cut:]
+            if block.strip():
+                yield block
+
+    def sentences(self, blocks: Iterable[str]) -> Iterator[str]:
+        """Yield the sentences of the blocks, in order, keeping only one batch of Docs alive"""
+        if self.nlp is None:
+            # Coarse fallback when called without a pipeline
+            for piece in self._pieces(blocks):
+                yield from (s for s in re.split(r'(?<=[.!?])\s+|\n{2,}', piece) if s.strip())
+            return
+        docs = self.nlp.pipe(self._pieces(blocks), batch_size=self.batch_size, n_process=self.n_process)
+        for doc in docs:
+            for sent in doc.sents:
+                yield sent.text
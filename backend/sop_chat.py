@@ -2,6 +2,8 @@ from typing import List, Dict, Optional, Any, BinaryIO
 from rag_engine import RAGEngine
 from groq_client import GroqClient
 from voice_handler import VoiceHandler, DEFAULT_FRIENDLY_VOICE
+from answer_cache import SemanticAnswerCache
+import os
 import json
 import logging
 from datetime import datetime
@@ -12,6 +14,11 @@ from Knowledge_Graph.kg_utils import get_neo4j_driver
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+NEXT_STEP_PHRASES = ["next step", "continue", "move forward", "proceed"]
+PREVIOUS_STEP_PHRASES = ["previous step", "go back", "move back", "last step"]
+CURRENT_STEP_PHRASES = ["current step", "where am i", "what step"]
+START_PROCEDURE_PHRASES = ["start procedure", "begin procedure"]
+
 class SOPChat:
     def __init__(self, rag_engine: RAGEngine, groq_client: GroqClient, voice_handler: VoiceHandler = None):
         self.rag_engine = rag_engine
@@ -28,6 +35,32 @@ class SOPChat:
             "auto_advance_steps": False,
             "safety_reminders": True
         }
+        
+        # Semantic answer cache: repeated questions skip intent extraction, retrieval and generation.
+        # Each worker has its own cache; the collection's shared change version keeps them all fresh.
+        self.answer_cache = None
+        self._index_version = 0
+        if os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true':
+            self.answer_cache = SemanticAnswerCache(
+                max_entries=int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 512)),
+                ttl_seconds=float(os.getenv('ANSWER_CACHE_TTL_SECONDS', 3600)),
+                similarity_threshold=float(os.getenv('ANSWER_CACHE_SIMILARITY', 0.92))
+            )
+            self._index_version, _ = self.rag_engine.get_changes_since(0)
+    
+    def set_rag_engine(self, rag_engine: RAGEngine):
+        """Switch to another engine (re-index swap); cached answers of the old collection are dropped"""
+        if self.answer_cache:
+            self.answer_cache.clear()
+            self._index_version, _ = rag_engine.get_changes_since(0)
+        self.rag_engine = rag_engine
+    
+    def _sync_answer_cache(self):
+        """Drop cached answers whose sources changed since the last lookup, in any worker"""
+        version, sources = self.rag_engine.get_changes_since(self._index_version)
+        if version != self._index_version:
+            self.answer_cache.invalidate_sources(sources)
+            self._index_version = version
 
     def set_user_preferences(self, preferences: Dict[str, Any]):
         """Update user preferences"""
@@ -163,7 +196,7 @@ class SOPChat:
             "is_last_step": self.current_step == len(steps) - 1
         }
     
-    def process_query(self, query: str, context_filter: Dict = None) -> Dict[str, Any]:
+    def process_query(self, query: str, context_filter: Dict = None, search_options: Dict = None) -> Dict[str, Any]:
         """Process user query and return response"""
         try:
             # Add query to conversation history
@@ -173,6 +206,16 @@ class SOPChat:
                 "timestamp": datetime.now().isoformat()
             })
             
+            # Serve repeated questions from the answer cache
+            query_embedding = cache_key = None
+            if self.answer_cache and not self._is_navigation_query(query):
+                self._sync_answer_cache()
+                query_embedding = self.rag_engine.run_query(self.rag_engine.embed_query, query)
+                cache_key = self._answer_cache_key(context_filter, search_options)
+                cached = self.answer_cache.lookup(query_embedding, cache_key)
+                if cached:
+                    return self._cached_response(query, cached)
+            
             # Extract intent
             intent_data = self.groq_client.extract_intent(query)
             
@@ -186,8 +229,10 @@ class SOPChat:
             search_params = {"n_results": 5}
             if context_filter:
                 search_params.update(context_filter)
+            if search_options:
+                search_params.update(search_options)
             
-            relevant_docs = self.rag_engine.search_documents(query, **search_params)
+            relevant_docs = self.rag_engine.run_query(self.rag_engine.search_documents, query, **search_params)
 
             # Knowledge Graph filtering is now integrated into search_documents method
             # No need for separate KG filtering step - it's automatically applied
@@ -235,6 +280,17 @@ class SOPChat:
                 if safety_info:
                     response["safety_information"] = safety_info
             
+            if query_embedding is not None and "error" not in response_data:
+                # A copy: the audio added below must not be cached and replayed
+                self.answer_cache.store(
+                    query_embedding,
+                    dict(response),
+                    sources=[doc['metadata'].get('source') for doc in relevant_docs],
+                    chunk_ids=[doc.get('id') for doc in relevant_docs],
+                    tokens=response["usage"].get("total_tokens", 0) + intent_data.get("usage", {}).get("total_tokens", 0),
+                    context_key=cache_key
+                )
+            
             # Generate audio response if voice is enabled
             if self.user_preferences["voice_enabled"] and self.voice_handler:
                 response["audio"] = self._generate_audio_response(response_data["response"])
@@ -258,17 +314,53 @@ class SOPChat:
             
             return error_response
     
+    def _is_navigation_query(self, query: str) -> bool:
+        query_lower = query.lower()
+        return any(
+            phrase in query_lower
+            for phrase in NEXT_STEP_PHRASES + PREVIOUS_STEP_PHRASES + CURRENT_STEP_PHRASES + START_PROCEDURE_PHRASES
+        )
+    
+    def _answer_cache_key(self, context_filter: Dict = None, search_options: Dict = None) -> str:
+        """Answers are only shared between queries asked at the same procedure step with the same search settings"""
+        procedure = None
+        if self.current_procedure:
+            procedure = [self.current_procedure["name"], self.current_step]
+        return json.dumps(
+            {"procedure": procedure, "filter": context_filter, "options": search_options},
+            sort_keys=True, default=str
+        )
+    
+    def _cached_response(self, query: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+        response = dict(
+            cached,
+            intent=dict(cached["intent"], query=query),
+            usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            cached=True
+        )
+        self.conversation_history.append({
+            "role": "assistant",
+            "content": response["response"],
+            "timestamp": datetime.now().isoformat()
+        })
+        if self.user_preferences["voice_enabled"] and self.voice_handler:
+            response["audio"] = self._generate_audio_response(response["response"])
+        return response
+    
+    def get_answer_cache_stats(self) -> Optional[Dict[str, Any]]:
+        return self.answer_cache.get_stats() if self.answer_cache else None
+    
     def _handle_navigation(self, query: str) -> Optional[Dict[str, Any]]:
         """Handle navigation commands"""
         query_lower = query.lower()
         
-        if any(phrase in query_lower for phrase in ["next step", "continue", "move forward", "proceed"]):
+        if any(phrase in query_lower for phrase in NEXT_STEP_PHRASES):
             return self.next_step()
-        elif any(phrase in query_lower for phrase in ["previous step", "go back", "move back", "last step"]):
+        elif any(phrase in query_lower for phrase in PREVIOUS_STEP_PHRASES):
             return self.previous_step()
-        elif any(phrase in query_lower for phrase in ["current step", "where am i", "what step"]):
+        elif any(phrase in query_lower for phrase in CURRENT_STEP_PHRASES):
             return self.get_current_step()
-        elif any(phrase in query_lower for phrase in ["start procedure", "begin procedure"]):
+        elif any(phrase in query_lower for phrase in START_PROCEDURE_PHRASES):
             # Extract procedure name
             import re
             procedure_match = re.search(r'(?:start|begin)\s+(?:procedure\s+)?([^.!?]+)', query_lower)
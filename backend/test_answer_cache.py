@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for the semantic answer cache: similarity hits, invalidation by
+source change, TTL and LRU eviction, and SOPChat keying answers by procedure
+step and search options.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pytest
+
+# Offline run: in-process vector index, no Neo4j
+os.environ.setdefault("VECTOR_BACKEND", "numpy")
+os.environ.setdefault("KG_ENABLED", "false")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ["ANSWER_CACHE_ENABLED"] = "true"
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "benchmarks"))
+
+from answer_cache import SemanticAnswerCache
+
+try:
+    from sop_chat import SOPChat
+    from rag_engine import RAGEngine
+    from retrieval_benchmark import HashingEmbedder
+    SOP_CHAT_AVAILABLE = True
+except ImportError:
+    SOP_CHAT_AVAILABLE = False
+
+
+class StubEmbedder:
+    """Fixed query embeddings: paraphrases share a direction, other questions are orthogonal"""
+
+    VECTORS = {
+        "how do I replace the pump seal": [1.0, 0.0, 0.0],
+        "how should the pump seal be replaced": [0.98, 0.05, 0.0],
+        "where is the forklift charger": [0.0, 1.0, 0.0],
+        "what PPE do I need": [0.0, 0.0, 1.0]
+    }
+
+    def embed(self, query):
+        return np.asarray(self.VECTORS[query], dtype=np.float32)
+
+
+def answer(text):
+    return {"response": text, "sources": []}
+
+
+def test_similar_query_hits():
+    embedder = StubEmbedder()
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    cache.store(embedder.embed("how do I replace the pump seal"), answer("Use kit A"), ["pump.pdf"], ["c1"], tokens=120)
+
+    hit = cache.lookup(embedder.embed("how should the pump seal be replaced"))
+    assert hit["response"] == "Use kit A" and hit["cache_similarity"] >= 0.9
+    assert cache.lookup(embedder.embed("where is the forklift charger")) is None
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["saved_tokens"]) == (1, 1, 120)
+    print("✅ paraphrase served from the cache")
+
+
+def test_invalidation_by_source_change():
+    embedder = StubEmbedder()
+    cache = SemanticAnswerCache()
+    cache.store(embedder.embed("how do I replace the pump seal"), answer("Use kit A"), ["pump.pdf"], ["c1"])
+    cache.store(embedder.embed("where is the forklift charger"), answer("Bay 4"), ["forklift.pdf"], ["c2"])
+    cache.store(embedder.embed("what PPE do I need"), answer("No context"), [], [])
+
+    cache.invalidate_sources(["pump.pdf"])
+    assert cache.lookup(embedder.embed("how do I replace the pump seal")) is None
+    assert cache.lookup(embedder.embed("where is the forklift charger"))["response"] == "Bay 4"
+    # Answered without retrieved context: any change may now answer it
+    assert cache.lookup(embedder.embed("what PPE do I need")) is None
+
+    cache.invalidate_sources(None)
+    assert cache.get_stats()["entries"] == 0
+    print("✅ entries dropped when their sources change")
+
+
+def test_ttl_and_lru_eviction():
+    embedder = StubEmbedder()
+    cache = SemanticAnswerCache(ttl_seconds=0.05)
+    cache.store(embedder.embed("how do I replace the pump seal"), answer("Use kit A"), ["pump.pdf"], ["c1"])
+    time.sleep(0.1)
+    assert cache.lookup(embedder.embed("how do I replace the pump seal")) is None
+    assert cache.get_stats()["expirations"] == 1
+    print("✅ entries expire after the TTL")
+
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.store(embedder.embed("how do I replace the pump seal"), answer("Use kit A"), ["pump.pdf"], ["c1"])
+    cache.store(embedder.embed("where is the forklift charger"), answer("Bay 4"), ["forklift.pdf"], ["c2"])
+    # A hit makes the pump answer the most recently used, so the forklift answer is evicted
+    assert cache.lookup(embedder.embed("how do I replace the pump seal"))
+    cache.store(embedder.embed("what PPE do I need"), answer("Gloves"), ["ppe.pdf"], ["c3"])
+    assert cache.lookup(embedder.embed("where is the forklift charger")) is None
+    assert cache.lookup(embedder.embed("how do I replace the pump seal"))["response"] == "Use kit A"
+    assert cache.get_stats()["entries"] == 2
+    print("✅ least recently used entry evicted")
+
+
+def test_context_key_isolation():
+    embedder = StubEmbedder()
+    cache = SemanticAnswerCache()
+    cache.store(embedder.embed("how do I replace the pump seal"), answer("Step 2 answer"), ["pump.pdf"], ["c1"],
+                context_key="step-2")
+    assert cache.lookup(embedder.embed("how do I replace the pump seal"), context_key="step-3") is None
+    assert cache.lookup(embedder.embed("how do I replace the pump seal"), context_key="step-2")
+    print("✅ answers only shared within the same context key")
+
+
+class StubGroqClient:
+    def __init__(self):
+        self.generations = 0
+
+    def extract_intent(self, query):
+        return {"intent": "question", "confidence": 0.9, "query": query, "usage": {"total_tokens": 10}}
+
+    def generate_response(self, query, context, conversation_history):
+        self.generations += 1
+        return {
+            "response": f"Answer {self.generations}",
+            "sources": [doc["metadata"]["source"] for doc in context],
+            "usage": {"total_tokens": 100}
+        }
+
+
+@pytest.mark.skipif(not SOP_CHAT_AVAILABLE, reason="needs the SOPChat dependencies (groq, whisper, neo4j)")
+def test_sop_chat_keys_answers_by_step_and_search_options():
+    with tempfile.TemporaryDirectory() as db_path:
+        engine = RAGEngine(db_path=db_path, embedding_model_name="hashing-384", embedding_model=HashingEmbedder(384))
+        engine.add_documents([{
+            "text": "Replace the pump seal with seal kit A after draining the casing.",
+            "source": "pump_sop.pdf", "chunk_id": 0, "file_type": ".pdf", "chunk_size": 64,
+            "steps": [], "safety_notes": []
+        }])
+        groq = StubGroqClient()
+        chat = SOPChat(engine, groq)
+        query = "How do I replace the pump seal?"
+
+        assert not chat.process_query(query).get("cached")
+        assert chat.process_query(query).get("cached")
+        assert not chat.process_query(query, search_options={"rerank": False}).get("cached")
+
+        chat.current_procedure = {"name": "Pump seal replacement", "steps": ["Drain", "Replace seal"]}
+        assert not chat.process_query(query).get("cached")
+        chat.current_step = 1
+        assert not chat.process_query(query).get("cached")
+        assert chat.process_query(query).get("cached")
+        assert groq.generations == 4
+        print("✅ SOPChat answers keyed by procedure step and search options")
+
+        engine.close()
+
+
+if __name__ == "__main__":
+    test_similar_query_hits()
+    test_invalidation_by_source_change()
+    test_ttl_and_lru_eviction()
+    test_context_key_isolation()
+    if SOP_CHAT_AVAILABLE:
+        test_sop_chat_keys_answers_by_step_and_search_options()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the sentence segmenter's block splitting: long blocks must be
+cut at paragraph breaks before falling back to line breaks. Runs without spaCy;
+the sentencizer-backend tests need spaCy (no model download).
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sentence_segmenter import SentenceSegmenter
+
+SOP_TEXT = (
+    "Step 1. Isolate the pump at the main breaker. Apply a lockout tag.\n\n"
+    "Step 2. Drain the line into the sump. Wait until the gauge reads zero!\n"
+    "Step 3. Remove the seal. Is the shaft scored? Replace it if so."
+)
+
+
+def test_pieces_prefer_paragraph_breaks():
+    """The cut lands on the last paragraph break even when a line break follows it"""
+    segmenter = SentenceSegmenter(backend="none", block_chars=60)
+    first = "Step 1. Isolate the pump.\n\n"
+    second = "Step 2. Drain the line.\nStep 3. Remove the seal."
+    pieces = list(segmenter._pieces([first + second]))
+
+    assert pieces[0] == first[:-1]
+    assert "".join(pieces) == first + second
+    print("✅ long block cut at the paragraph break")
+
+
+def test_pieces_fall_back_to_line_breaks():
+    segmenter = SentenceSegmenter(backend="none", block_chars=40)
+    text = "Lockout applied to the main breaker.\nValve V-101 closed and tagged."
+    pieces = list(segmenter._pieces([text]))
+
+    assert pieces[0] == "Lockout applied to the main breaker.\n"
+    assert all(len(piece) <= 40 for piece in pieces)
+    assert "".join(pieces) == text
+    print("✅ block without paragraph breaks cut at the line break")
+
+
+def test_sentencizer_backend_sentences():
+    """The rule-based backend splits streamed pieces into sentences without losing text"""
+    pytest.importorskip("spacy")
+    segmenter = SentenceSegmenter(backend="sentencizer", block_chars=80)
+    assert segmenter.available
+
+    sentences = [sentence.strip() for sentence in segmenter.sentences([SOP_TEXT]) if sentence.strip()]
+    assert "".join("".join(sentences).split()) == "".join(SOP_TEXT.split())
+    assert all(len(sentence) <= 80 for sentence in sentences)
+    assert not any("tag" in sentence and "Drain" in sentence for sentence in sentences)
+    assert any(sentence.endswith("scored?") for sentence in sentences)
+    print(f"✅ sentencizer backend produced {len(sentences)} sentences")
+
+
+def test_document_processor_chunks_with_sentencizer():
+    """DocumentProcessor groups sentencizer sentences into chunks of at most chunk_size"""
+    pytest.importorskip("spacy")
+    document_processor = pytest.importorskip("document_processor")
+
+    previous = os.environ.get("SEGMENTATION_BACKEND")
+    os.environ["SEGMENTATION_BACKEND"] = "sentencizer"
+    try:
+        processor = document_processor.DocumentProcessor(chunk_size=90, chunk_overlap=0)
+    finally:
+        if previous is None:
+            del os.environ["SEGMENTATION_BACKEND"]
+        else:
+            os.environ["SEGMENTATION_BACKEND"] = previous
+    assert processor.segmenter.backend == "sentencizer" and processor.segmenter.available
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "pump_sop.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(SOP_TEXT)
+        chunks = processor.process_document(path)
+
+    assert len(chunks) > 1
+    assert all(len(chunk["text"].strip()) <= 90 for chunk in chunks)
+    assert [chunk["chunk_id"] for chunk in chunks] == list(range(len(chunks)))
+    assert "".join("".join(chunk["text"] for chunk in chunks).split()) == "".join(SOP_TEXT.split())
+    print(f"✅ DocumentProcessor built {len(chunks)} chunks from sentencizer sentences")
+
+
+if __name__ == "__main__":
+    test_pieces_prefer_paragraph_breaks()
+    test_pieces_fall_back_to_line_breaks()
+    test_sentencizer_backend_sentences()
+    test_document_processor_chunks_with_sentencizer()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process NumPy vector index: filtering and deletes,
+journaled persistence and compaction, and quantized storage with re-scoring.
+"""
+
+import os
+import sys
+import logging
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import vector_index
+from vector_index import NumpyCollection
+
+DIMENSION = 16
+
+
+def make_vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIMENSION)).astype(np.float32)
+
+
+def add_rows(collection, start, n, seed=0):
+    ids = [f"doc{i}" for i in range(start, start + n)]
+    collection.add(
+        ids=ids,
+        embeddings=make_vectors(n, seed),
+        documents=[f"text {i}" for i in range(start, start + n)],
+        metadatas=[{"source": "a.pdf" if i % 2 else "b.pdf", "chunk_id": i} for i in range(start, start + n)]
+    )
+    return ids
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_add_delete_and_where_filter():
+    collection = NumpyCollection("test")
+    add_rows(collection, 0, 10)
+    add_rows(collection, 5, 2)  # existing IDs are ignored
+    assert collection.count() == 10
+
+    result = collection.query(query_embeddings=make_vectors(1, seed=7), n_results=3, where={"source": "a.pdf"})
+    assert len(result["ids"][0]) == 3
+    assert all(metadata["source"] == "a.pdf" for metadata in result["metadatas"][0])
+    assert collection.get(where={"chunk_id": {"$gte": 8}})["ids"] == ["doc8", "doc9"]
+
+    collection.delete(where={"source": "b.pdf"})
+    collection.delete(ids=["doc1"])
+    assert collection.count() == 4
+    assert collection.get()["ids"] == ["doc3", "doc5", "doc7", "doc9"]
+    assert collection.get(ids=["doc2"])["ids"] == []
+    print("✅ add / delete / where filter")
+
+
+def test_reload_after_journaled_write():
+    with tempfile.TemporaryDirectory() as persist_dir:
+        collection = NumpyCollection("test", persist_dir)
+        add_rows(collection, 0, 8)
+        add_rows(collection, 8, 4, seed=1)
+        collection.delete(ids=["doc0"])
+        # Only the first write created a snapshot; the rest sit in the journal
+        assert os.path.exists(os.path.join(persist_dir, "journal.jsonl"))
+
+        reloaded = NumpyCollection("test", persist_dir)
+        assert reloaded.get()["ids"] == collection.get()["ids"]
+        query = make_vectors(1, seed=3)
+        expected = collection.query(query_embeddings=query, n_results=5)
+        actual = reloaded.query(query_embeddings=query, n_results=5)
+        assert actual["ids"] == expected["ids"]
+        np.testing.assert_allclose(actual["distances"], expected["distances"], atol=1e-6)
+        print("✅ reload replays journaled writes")
+
+
+def test_compaction():
+    with tempfile.TemporaryDirectory() as persist_dir:
+        compact_min_rows = vector_index.COMPACT_MIN_ROWS
+        vector_index.COMPACT_MIN_ROWS = 4
+        try:
+            collection = NumpyCollection("test", persist_dir)
+            add_rows(collection, 0, 4)
+            add_rows(collection, 4, 4, seed=1)
+            assert os.path.exists(os.path.join(persist_dir, "journal.jsonl"))
+            # Once the journal holds more rows than the collection it is folded into the snapshot
+            collection.delete(ids=["doc0", "doc1", "doc2", "doc3", "doc4", "doc5"])
+            assert not os.path.exists(os.path.join(persist_dir, "journal.jsonl"))
+            assert NumpyCollection("test", persist_dir).get()["ids"] == ["doc6", "doc7"]
+
+            add_rows(collection, 8, 2, seed=2)
+            collection.flush()
+            assert not os.path.exists(os.path.join(persist_dir, "journal.jsonl"))
+            assert NumpyCollection("test", persist_dir).get()["ids"] == collection.get()["ids"]
+        finally:
+            vector_index.COMPACT_MIN_ROWS = compact_min_rows
+        print("✅ journal compacted into the snapshot")
+
+
+def test_quantized_rescoring():
+    vectors = make_vectors(200)
+    query = make_vectors(1, seed=9)[0]
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact_scores = normalized @ (query / np.linalg.norm(query))
+    expected_ids = [f"doc{i}" for i in np.argsort(-exact_scores)[:5]]
+
+    for dtype in ("float16", "int8"):
+        with tempfile.TemporaryDirectory() as persist_dir:
+            collection = NumpyCollection("test", persist_dir, dtype=dtype, rescore_factor=4)
+            collection.add(ids=[f"doc{i}" for i in range(200)], embeddings=vectors)
+            assert collection.memory_bytes() < 200 * DIMENSION * 4
+
+            for candidate in (collection, NumpyCollection("test", persist_dir, dtype=dtype, rescore_factor=4)):
+                result = candidate.query(query_embeddings=[query], n_results=5)
+                assert result["ids"][0] == expected_ids
+                # Re-scored with the exact float32 vectors, not the quantized ones
+                np.testing.assert_allclose(result["distances"][0], 1.0 - np.sort(exact_scores)[::-1][:5], atol=1e-6)
+        print(f"✅ {dtype} storage re-scores with exact vectors")
+
+
+def test_dtype_conversion_keeps_rescoring_without_warning():
+    handler = RecordingHandler()
+    logging.getLogger("vector_index").addHandler(handler)
+    try:
+        with tempfile.TemporaryDirectory() as persist_dir:
+            collection = NumpyCollection("test", persist_dir)
+            add_rows(collection, 0, 20)
+            collection.flush()
+
+            converted = NumpyCollection("test", persist_dir, dtype="int8", rescore_factor=4)
+            assert converted.count() == 20
+            assert os.path.exists(os.path.join(persist_dir, "exact.f32"))
+            assert (converted._exact_rows[:converted.count()] >= 0).all()
+    finally:
+        logging.getLogger("vector_index").removeHandler(handler)
+    assert not any("out of sync" in message for message in handler.messages), handler.messages
+    print("✅ float32 -> int8 conversion rebuilds exact vectors without an out-of-sync warning")
+
+
+if __name__ == "__main__":
+    test_add_delete_and_where_filter()
+    test_reload_after_journaled_write()
+    test_compaction()
+    test_quantized_rescoring()
+    test_dtype_conversion_keeps_rescoring_without_warning()
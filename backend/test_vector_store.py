@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared pgvector backend: a second store (another API
+worker, or a restart) must see a collection another store created and filled.
+
+Needs a Postgres with the pgvector extension: set PGVECTOR_URL to run it.
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from vector_store import PgVectorStore, SQLALCHEMY_AVAILABLE
+
+PGVECTOR_URL = os.getenv("PGVECTOR_URL")
+
+pytestmark = pytest.mark.skipif(
+    not (PGVECTOR_URL and SQLALCHEMY_AVAILABLE), reason="needs PGVECTOR_URL and SQLAlchemy/psycopg2"
+)
+
+
+def test_second_store_sees_populated_collection():
+    """A collection object cached before the table existed answers once another worker fills it"""
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    writer = PgVectorStore(PGVECTOR_URL)
+    reader = PgVectorStore(PGVECTOR_URL)
+    try:
+        # Cached by the reader while the table does not exist yet
+        early = reader.get_or_create_collection(name)
+        assert early.count() == 0
+
+        writer.get_or_create_collection(name).add(
+            ids=["a", "b"],
+            embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]],
+            documents=["alpha", "beta"],
+            metadatas=[{"source": "a.pdf"}, {"source": "b.pdf"}]
+        )
+
+        assert early.count() == 2
+        result = early.query(query_embeddings=[[1.0, 0.1, 0.0]], n_results=1)
+        assert result["ids"] == [["a"]]
+        assert early.get(where={"source": "b.pdf"})["ids"] == ["b"]
+
+        # A store opened after the table exists (e.g. after a restart)
+        restarted = PgVectorStore(PGVECTOR_URL)
+        try:
+            assert restarted.get_or_create_collection(name).count() == 2
+        finally:
+            restarted.close()
+
+        early.delete(ids=["b"])
+        assert writer.get_or_create_collection(name).count() == 1
+        print("✅ pgvector collection shared across stores")
+    finally:
+        writer.delete_collection(name)
+        writer.close()
+        reader.close()
+
+
+if __name__ == "__main__":
+    if not (PGVECTOR_URL and SQLALCHEMY_AVAILABLE):
+        print("⚠️ Set PGVECTOR_URL (and install SQLAlchemy/psycopg2) to run this test")
+        sys.exit(0)
+    test_second_store_sees_populated_collection()
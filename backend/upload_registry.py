@@ -0,0 +1,135 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, List
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StreamingFingerprint:
+    """SHA-256 and byte count of an upload, updated chunk by chunk while it is written"""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def update(self, data: bytes):
+        self._hash.update(data)
+        self.size += len(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class UploadRegistry:
+    """Fingerprint -> ingested document registry kept next to the vector store.
+
+    Each SHA-256 maps to the filename its content was ingested under, plus the
+    ingest result. Uploads of the same bytes under another name are recorded
+    as aliases of that document instead of being processed again.
+    """
+
+    def __init__(self, registry_path: str):
+        self.registry_path = registry_path
+        os.makedirs(os.path.dirname(os.path.abspath(registry_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(registry_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                sha256 TEXT PRIMARY KEY,
+                filename TEXT NOT NULL UNIQUE,
+                file_size INTEGER NOT NULL,
+                file_type TEXT,
+                chunks_created INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS upload_aliases (
+                alias TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL REFERENCES uploads (sha256) ON DELETE CASCADE,
+                created_at REAL NOT NULL
+            );
+        """)
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.commit()
+
+    def lookup(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """The document ingested with this fingerprint, with its aliases, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM uploads WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is None:
+                return None
+            aliases = [
+                alias for (alias,) in self._conn.execute(
+                    "SELECT alias FROM upload_aliases WHERE sha256 = ? ORDER BY alias", (sha256,)
+                )
+            ]
+        return dict(row, aliases=aliases)
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """The filename a (possibly alias) name is stored under, or None if it is unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT u.filename FROM upload_aliases a JOIN uploads u ON u.sha256 = a.sha256 WHERE a.alias = ?",
+                (filename,)
+            ).fetchone()
+            if row is None:
+                row = self._conn.execute("SELECT filename FROM uploads WHERE filename = ?", (filename,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, sha256: str, filename: str, file_size: int, file_type: str, chunks_created: int):
+        """Register an ingested upload; replaces whatever this filename or fingerprint pointed to before"""
+        with self._lock:
+            # Content previously stored under this name was just replaced in the index, aliases included
+            self._conn.execute("DELETE FROM uploads WHERE filename = ? OR sha256 = ?", (filename, sha256))
+            self._conn.execute("DELETE FROM upload_aliases WHERE alias = ?", (filename,))
+            self._conn.execute(
+                "INSERT INTO uploads (sha256, filename, file_size, file_type, chunks_created, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, filename, file_size, file_type, chunks_created, time.time())
+            )
+            self._conn.commit()
+
+    def add_alias(self, sha256: str, alias: str):
+        """Attach another filename to an already ingested document"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO upload_aliases (alias, sha256, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (alias) DO UPDATE SET sha256 = excluded.sha256, created_at = excluded.created_at",
+                (alias, sha256, time.time())
+            )
+            self._conn.commit()
+
+    def forget(self, filename: str) -> List[str]:
+        """Drop a document (and its aliases) or a single alias; returns the names that were removed"""
+        with self._lock:
+            removed = [
+                alias for (alias,) in self._conn.execute(
+                    "SELECT a.alias FROM upload_aliases a JOIN uploads u ON u.sha256 = a.sha256 WHERE u.filename = ?",
+                    (filename,)
+                )
+            ]
+            deleted = self._conn.execute("DELETE FROM uploads WHERE filename = ?", (filename,)).rowcount
+            deleted += self._conn.execute("DELETE FROM upload_aliases WHERE alias = ?", (filename,)).rowcount
+            self._conn.commit()
+        return ([filename] if deleted else []) + removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            documents, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM uploads"
+            ).fetchone()
+            (aliases,) = self._conn.execute("SELECT COUNT(*) FROM upload_aliases").fetchone()
+        return {"documents": documents, "aliases": aliases, "total_bytes": total_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
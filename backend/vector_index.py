@@ -0,0 +1,568 @@
+import os
+import json
+import shutil
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _match_condition(value, condition) -> bool:
+    """Evaluate one Chroma-style field condition against a metadata value"""
+    if not isinstance(condition, dict):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == '$eq' and not value == operand:
+            return False
+        if operator == '$ne' and not value != operand:
+            return False
+        if operator == '$in' and value not in operand:
+            return False
+        if operator == '$nin' and value in operand:
+            return False
+        if operator in ('$gt', '$gte', '$lt', '$lte'):
+            if value is None:
+                return False
+            if operator == '$gt' and not value > operand:
+                return False
+            if operator == '$gte' and not value >= operand:
+                return False
+            if operator == '$lt' and not value < operand:
+                return False
+            if operator == '$lte' and not value <= operand:
+                return False
+    return True
+
+
+def match_where(metadata: Dict, where: Optional[Dict]) -> bool:
+    """Evaluate a Chroma-style `where` filter ($and/$or and field operators) against metadata"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(match_where(metadata, clause) for clause in condition):
+                return False
+        elif key == '$or':
+            if not any(match_where(metadata, clause) for clause in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+STORAGE_DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+
+# Rows widened to float32 at a time when scoring quantized storage: a cache-sized reusable
+# buffer instead of a float32 copy of the matrix per query
+SCORE_BLOCK_ROWS = 512
+
+# The snapshot is rewritten once more rows than it holds (and at least this many) were journaled
+COMPACT_MIN_ROWS = 4096
+
+
+class NumpyCollection:
+    """In-process vector collection with the add/query/get/delete/count surface RAGEngine uses.
+
+    Embeddings are kept L2-normalized in one contiguous matrix, so a query is
+    a matrix-vector product followed by argpartition top-k. Distances are
+    cosine distances (1 - cosine similarity).
+
+    The matrix can be stored as float32, float16, or int8 with one scale per
+    vector. With re-scoring enabled, quantized storage also appends the exact
+    float32 vectors to a file on disk, memory-mapped and read only for the
+    top candidates of each query.
+
+    On disk a collection is a snapshot (embeddings.npy, scales.npy,
+    records.json) plus an append-only journal of the adds and deletes made
+    since. The snapshot is only rewritten when the journal outgrows it, on
+    flush() and on close(), so batched ingest costs I/O proportional to the
+    batch rather than to the collection.
+    """
+
+    def __init__(self, name: str, persist_dir: Optional[str] = None, metadata: Optional[Dict] = None,
+                 dtype: str = 'float32', rescore_factor: int = 4):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported vector storage dtype: {dtype}")
+
+        self.name = name
+        self.metadata = metadata or {"hnsw:space": "cosine"}
+        self.persist_dir = persist_dir
+        self.dtype = dtype
+        self.rescore_factor = rescore_factor
+
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Dict] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._matrix = np.zeros((0, 0), dtype=STORAGE_DTYPES[dtype])
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._size = 0
+
+        # Row of each vector in exact.f32 (-1 when it has no exact copy), and that file's row count
+        self._exact_rows = np.zeros(0, dtype=np.int64)
+        self._exact_file_rows = 0
+        self._exact_map = None
+        # Rows added or deleted since the snapshot was written
+        self._journal_rows = 0
+
+        if persist_dir and os.path.exists(self._path("records.json")):
+            self._load()
+
+    # Storage helpers
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.persist_dir, filename)
+
+    def _normalize(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(vectors / norms)
+
+    def _quantize(self, vectors: np.ndarray):
+        """Convert normalized float32 vectors to the storage dtype plus per-vector scales"""
+        if self.dtype == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+            scales[scales == 0] = 1.0
+            quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return vectors.astype(STORAGE_DTYPES[self.dtype]), np.ones(len(vectors), dtype=np.float32)
+
+    def _dequantize(self, rows) -> np.ndarray:
+        vectors = self._matrix[rows].astype(np.float32)
+        if self._matrix.dtype == np.int8:
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    @property
+    def _exact_path(self) -> Optional[str]:
+        """exact.f32, kept only for quantized storage that re-scores"""
+        if self.dtype == 'float32' or self.rescore_factor <= 0 or not self.persist_dir:
+            return None
+        return self._path("exact.f32")
+
+    def _exact_for_rows(self, rows) -> Optional[np.ndarray]:
+        """Exact float32 vectors for rows: from the matrix, or the on-disk copy kept for quantized storage"""
+        if self.dtype == 'float32':
+            return self._matrix[rows]
+        if not self._exact_path or self._exact_file_rows == 0 or len(rows) == 0:
+            return None
+        file_rows = self._exact_rows[rows]
+        if (file_rows < 0).any():
+            return None
+        if self._exact_map is None or self._exact_map.shape[0] != self._exact_file_rows:
+            self._exact_map = np.memmap(self._exact_path, dtype=np.float32, mode='r',
+                                        shape=(self._exact_file_rows, self._matrix.shape[1]))
+        return np.asarray(self._exact_map[file_rows], dtype=np.float32)
+
+    def _vectors_for_rows(self, rows) -> np.ndarray:
+        """Best available float32 vectors for rows: exact when stored, otherwise dequantized"""
+        exact = self._exact_for_rows(rows)
+        return exact if exact is not None else self._dequantize(rows)
+
+    def _ensure_capacity(self, extra_rows: int, dimension: int):
+        if self._matrix.shape[1] not in (0, dimension):
+            raise ValueError(f"Embedding dimension {dimension} does not match collection dimension {self._matrix.shape[1]}")
+        required = self._size + extra_rows
+        if required > self._matrix.shape[0] or self._matrix.shape[1] == 0:
+            capacity = max(required, 2 * self._matrix.shape[0], 64)
+            grown = np.zeros((capacity, dimension), dtype=self._matrix.dtype)
+            grown_scales = np.ones(capacity, dtype=np.float32)
+            grown_exact_rows = np.full(capacity, -1, dtype=np.int64)
+            if self._size:
+                grown[:self._size] = self._matrix[:self._size]
+                grown_scales[:self._size] = self._scales[:self._size]
+                grown_exact_rows[:self._size] = self._exact_rows[:self._size]
+            self._matrix = grown
+            self._scales = grown_scales
+            self._exact_rows = grown_exact_rows
+
+    def _rows_for(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None) -> List[int]:
+        if ids is not None:
+            rows = [self._id_to_row[doc_id] for doc_id in ids if doc_id in self._id_to_row]
+        else:
+            rows = range(self._size)
+        if where:
+            rows = [row for row in rows if match_where(self._metadatas[row], where)]
+        return list(rows)
+
+    def _append_rows(self, ids: List[str], documents: List[Optional[str]], metadatas: List[Dict],
+                     quantized: np.ndarray, scales: np.ndarray, exact_start: Optional[int]):
+        self._ensure_capacity(len(ids), quantized.shape[1])
+        start = self._size
+        self._matrix[start:start + len(ids)] = quantized
+        self._scales[start:start + len(ids)] = scales
+        if exact_start is not None:
+            self._exact_rows[start:start + len(ids)] = np.arange(exact_start, exact_start + len(ids))
+        else:
+            self._exact_rows[start:start + len(ids)] = -1
+        for offset, doc_id in enumerate(ids):
+            self._ids.append(doc_id)
+            self._documents.append(documents[offset])
+            self._metadatas.append(metadatas[offset])
+            self._id_to_row[doc_id] = start + offset
+        self._size += len(ids)
+
+    def _remove_rows(self, doomed: set):
+        keep = [row for row in range(self._size) if row not in doomed]
+        dimension = self._matrix.shape[1]
+        self._matrix = np.ascontiguousarray(self._matrix[keep]) if keep else np.zeros((0, dimension), dtype=self._matrix.dtype)
+        self._scales = np.ascontiguousarray(self._scales[keep]) if keep else np.zeros(0, dtype=np.float32)
+        self._exact_rows = self._exact_rows[keep] if keep else np.zeros(0, dtype=np.int64)
+        self._ids = [self._ids[row] for row in keep]
+        self._documents = [self._documents[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._size = len(keep)
+
+    def _scores(self, query_vector: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of the query against stored rows (all rows when None), on stored precision"""
+        matrix = self._matrix[:self._size] if rows is None else self._matrix[rows]
+        if self.dtype == 'float32':
+            return matrix @ query_vector
+
+        # Quantized rows are widened into one small float32 buffer, block by block, for BLAS
+        scores = np.empty(len(matrix), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(matrix)), matrix.shape[1]), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS]
+            widened = buffer[:len(block)]
+            np.copyto(widened, block, casting='unsafe')
+            np.dot(widened, query_vector, out=scores[start:start + len(block)])
+        if self.dtype == 'int8':
+            scores *= self._scales[:self._size] if rows is None else self._scales[rows]
+        return scores
+
+    def memory_bytes(self) -> int:
+        """RAM held by the stored vectors and scales (excluding unused capacity)"""
+        if self._size == 0:
+            return 0
+        vector_bytes = self._size * self._matrix.shape[1] * self._matrix.itemsize
+        scale_bytes = self._size * 4 if self.dtype == 'int8' else 0
+        return vector_bytes + scale_bytes
+
+    # Collection surface
+
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict]] = None):
+        with self._lock:
+            vectors = self._normalize(embeddings)
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._id_to_row]
+            if len(keep) < len(ids):
+                logger.warning(f"Add of existing embedding ID(s) ignored: {len(ids) - len(keep)}")
+            if not keep:
+                return
+
+            vectors = vectors[keep]
+            quantized, scales = self._quantize(vectors)
+            kept_ids = [ids[i] for i in keep]
+            kept_documents = [documents[i] if documents else None for i in keep]
+            kept_metadatas = [dict(metadatas[i]) if metadatas else {} for i in keep]
+
+            exact_start = None
+            if self._exact_path:
+                os.makedirs(self.persist_dir, exist_ok=True)
+                with open(self._exact_path, 'ab') as f:
+                    f.write(vectors.tobytes())
+                exact_start = self._exact_file_rows
+                self._exact_file_rows += len(keep)
+
+            self._append_rows(kept_ids, kept_documents, kept_metadatas, quantized, scales, exact_start)
+            self._journal(
+                {"op": "add", "ids": kept_ids, "documents": kept_documents, "metadatas": kept_metadatas,
+                 "dim": vectors.shape[1], "exact_start": exact_start},
+                quantized.tobytes() + scales.tobytes()
+            )
+
+    def query(self, query_embeddings=None, n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None, query_texts=None, **kwargs) -> Dict[str, Any]:
+        if query_embeddings is None:
+            raise ValueError("NumpyCollection requires query_embeddings; embed queries before querying")
+        include = include or ['documents', 'metadatas', 'distances']
+
+        with self._lock:
+            queries = self._normalize(query_embeddings)
+            result = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+
+            candidate_rows = None
+            if where:
+                candidate_rows = np.asarray(self._rows_for(where=where), dtype=np.int64)
+
+            # Quantized storage re-scores an over-fetched candidate set with exact vectors
+            rescore = self.dtype != 'float32' and self.rescore_factor > 0 and self._exact_path is not None
+
+            for query_vector in queries:
+                if candidate_rows is not None and len(candidate_rows) == 0:
+                    similarities = np.zeros(0, dtype=np.float32)
+                else:
+                    similarities = self._scores(query_vector, candidate_rows)
+
+                k = min(n_results, len(similarities))
+                fetch_k = min(k * self.rescore_factor, len(similarities)) if rescore else k
+                if fetch_k == 0:
+                    top = np.zeros(0, dtype=np.int64)
+                elif fetch_k < len(similarities):
+                    top = np.argpartition(-similarities, fetch_k - 1)[:fetch_k]
+                else:
+                    top = np.arange(len(similarities))
+
+                rows = candidate_rows[top] if candidate_rows is not None else top
+                scores = similarities[top]
+                if rescore and len(rows):
+                    exact = self._exact_for_rows(rows)
+                    if exact is not None:
+                        scores = np.asarray(exact @ query_vector, dtype=np.float32)
+
+                order = np.argsort(-scores, kind='stable')[:k]
+                rows, scores = rows[order], scores[order]
+
+                result["ids"].append([self._ids[row] for row in rows])
+                result["documents"].append([self._documents[row] for row in rows])
+                result["metadatas"].append([self._metadatas[row] for row in rows])
+                result["distances"].append([float(1.0 - score) for score in scores])
+                result["embeddings"].append(self._vectors_for_rows(rows).tolist() if 'embeddings' in include else None)
+
+        return {key: (value if key == "ids" or key in include else None) for key, value in result.items()}
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = ['documents', 'metadatas'] if include is None else include
+        with self._lock:
+            rows = self._rows_for(ids, where)
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows] if 'documents' in include else None,
+                "metadatas": [self._metadatas[row] for row in rows] if 'metadatas' in include else None,
+                "embeddings": self._vectors_for_rows(rows).tolist() if 'embeddings' in include else None
+            }
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        with self._lock:
+            if ids is None and where is None:
+                return
+            doomed = set(self._rows_for(ids, where))
+            if not doomed:
+                return
+            doomed_ids = [self._ids[row] for row in sorted(doomed)]
+            # Rows left in exact.f32 are reclaimed when the snapshot is compacted
+            self._remove_rows(doomed)
+            self._journal({"op": "delete", "ids": doomed_ids})
+
+    def count(self) -> int:
+        return self._size
+
+    def flush(self):
+        """Write a snapshot of pending journal entries (also called on close)"""
+        with self._lock:
+            if self.persist_dir and self._journal_rows:
+                self._compact()
+
+    def close(self):
+        # Journaled writes are already durable; a compaction failing here (e.g. at interpreter exit) loses nothing
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Could not compact collection {self.name} on close: {e}")
+
+    # Persistence
+
+    def _journal(self, entry: Dict[str, Any], payload: bytes = b""):
+        """Append one add/delete to the journal; compacts once the journal outgrows the snapshot"""
+        if not self.persist_dir:
+            return
+        rows = len(entry["ids"])
+        if not os.path.exists(self._path("records.json")):
+            self._compact()
+            return
+
+        # Payload first: a journal line only ever refers to bytes already written
+        with open(self._path("journal.bin"), 'ab') as f:
+            f.write(payload)
+        with open(self._path("journal.jsonl"), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        self._journal_rows += rows
+        if self._journal_rows > max(COMPACT_MIN_ROWS, self._size):
+            self._compact()
+
+    def _replay_journal(self) -> bool:
+        """Apply journal entries written after the snapshot; returns whether there were any"""
+        log_path = self._path("journal.jsonl")
+        if not os.path.exists(log_path):
+            return False
+
+        itemsize = self._matrix.dtype.itemsize
+        with open(self._path("journal.bin"), 'rb') as payload, open(log_path, 'r', encoding='utf-8') as log:
+            for line in log:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring truncated journal entry for collection {self.name}")
+                    break
+                if entry["op"] == "delete":
+                    self._remove_rows(set(self._rows_for(entry["ids"])))
+                    continue
+
+                n, dimension = len(entry["ids"]), entry["dim"]
+                vector_bytes = n * dimension * itemsize
+                data = payload.read(vector_bytes + n * 4)
+                if len(data) < vector_bytes + n * 4:
+                    logger.warning(f"Ignoring truncated journal entry for collection {self.name}")
+                    break
+                quantized = np.frombuffer(data[:vector_bytes], dtype=self._matrix.dtype).reshape(n, dimension)
+                scales = np.frombuffer(data[vector_bytes:], dtype=np.float32)
+                self._append_rows(entry["ids"], entry["documents"], entry["metadatas"],
+                                  quantized, scales, entry.get("exact_start"))
+        return True
+
+    def _compact(self):
+        """Rewrite the snapshot (and exact.f32) from memory and drop the journal"""
+        os.makedirs(self.persist_dir, exist_ok=True)
+        self._exact_map = None
+
+        if self._exact_path and os.path.exists(self._exact_path):
+            in_order = np.array_equal(self._exact_rows[:self._size], np.arange(self._size))
+            if not (in_order and self._exact_file_rows == self._size):
+                if (self._exact_rows[:self._size] >= 0).all():
+                    compacted = self._exact_for_rows(np.arange(self._size))
+                    compacted = compacted if compacted is not None else np.zeros((0, self._matrix.shape[1]), dtype=np.float32)
+                    tmp_path = self._exact_path + ".tmp"
+                    compacted.tofile(tmp_path)
+                    os.replace(tmp_path, self._exact_path)
+                    self._exact_rows[:self._size] = np.arange(self._size)
+                    self._exact_file_rows = self._size
+                else:
+                    os.remove(self._exact_path)
+                    self._exact_rows[:self._size] = -1
+                    self._exact_file_rows = 0
+
+        embeddings_tmp = self._path("embeddings.tmp.npy")
+        scales_tmp = self._path("scales.tmp.npy")
+        records_tmp = self._path("records.json.tmp")
+        np.save(embeddings_tmp, self._matrix[:self._size])
+        np.save(scales_tmp, self._scales[:self._size])
+        with open(records_tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "name": self.name,
+                "metadata": self.metadata,
+                "dtype": self.dtype,
+                "ids": self._ids,
+                "documents": self._documents,
+                "metadatas": self._metadatas
+            }, f, ensure_ascii=False)
+
+        os.replace(embeddings_tmp, self._path("embeddings.npy"))
+        os.replace(scales_tmp, self._path("scales.npy"))
+        os.replace(records_tmp, self._path("records.json"))
+        for filename in ("journal.jsonl", "journal.bin"):
+            if os.path.exists(self._path(filename)):
+                os.remove(self._path(filename))
+        self._journal_rows = 0
+
+    def _load(self):
+        with open(self._path("records.json"), 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        matrix = np.load(self._path("embeddings.npy"))
+        scales_path = self._path("scales.npy")
+        scales = np.load(scales_path) if os.path.exists(scales_path) else np.ones(len(matrix), dtype=np.float32)
+
+        self.metadata = records.get("metadata", self.metadata)
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._size = len(self._ids)
+        self._matrix = np.ascontiguousarray(matrix)
+        self._scales = np.asarray(scales, dtype=np.float32)
+
+        # The snapshot's rows come first in exact.f32, journaled adds record where theirs start
+        self._exact_rows = np.arange(self._size, dtype=np.int64)
+        replayed = self._replay_journal()
+        exact_path = self._path("exact.f32")
+        dimension = self._matrix.shape[1]
+        if os.path.exists(exact_path) and dimension:
+            self._exact_file_rows = os.path.getsize(exact_path) // (dimension * 4)
+        stored_dtype = records.get("dtype", "float32")
+        if (self._exact_rows[:self._size] >= self._exact_file_rows).any():
+            # A dtype conversion rewrites exact.f32 below, so a missing file is expected there
+            if self._exact_path and stored_dtype == self.dtype:
+                logger.warning(f"Exact vector file for {self.name} is missing or out of sync; re-scoring disabled")
+            self._exact_rows[:self._size] = -1
+
+        if stored_dtype != self.dtype:
+            # Storage dtype changed: rebuild from the most precise vectors on disk
+            rows = np.arange(self._size)
+            if stored_dtype == 'float32':
+                vectors = np.asarray(self._matrix[:self._size], dtype=np.float32)
+            elif self._size and (self._exact_rows[:self._size] >= 0).all():
+                exact = np.memmap(exact_path, dtype=np.float32, mode='r', shape=(self._exact_file_rows, dimension))
+                vectors = np.array(exact[self._exact_rows[:self._size]], dtype=np.float32)
+                del exact
+            else:
+                vectors = self._dequantize(rows)
+
+            self._matrix, self._scales = self._quantize(vectors)
+            if self._exact_path:
+                vectors.tofile(self._exact_path)
+                self._exact_rows = np.arange(self._size, dtype=np.int64)
+                self._exact_file_rows = self._size
+            else:
+                if os.path.exists(exact_path):
+                    os.remove(exact_path)
+                self._exact_rows = np.full(self._size, -1, dtype=np.int64)
+                self._exact_file_rows = 0
+            self._compact()
+            logger.info(f"Converted collection {self.name} storage from {stored_dtype} to {self.dtype}")
+        elif replayed:
+            self._compact()
+
+        if not self._exact_path and os.path.exists(exact_path):
+            # Re-scoring is off: the exact copy would only cost disk
+            os.remove(exact_path)
+            self._exact_rows[:self._size] = -1
+            self._exact_file_rows = 0
+
+        logger.info(f"Loaded {self._size} vectors ({self.dtype}) for collection {self.name} from {self.persist_dir}")
+
+
+class NumpyClient:
+    """Client for NumpyCollection mirroring the parts of chromadb.PersistentClient RAGEngine uses"""
+
+    def __init__(self, path: Optional[str] = None, dtype: str = 'float32', rescore_factor: int = 4):
+        self.path = path
+        self.dtype = dtype
+        self.rescore_factor = rescore_factor
+        self.collections: Dict[str, NumpyCollection] = {}
+
+    def _collection_dir(self, name: str) -> Optional[str]:
+        return os.path.join(self.path, f"numpy_{name}") if self.path else None
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None) -> NumpyCollection:
+        if name not in self.collections:
+            self.collections[name] = NumpyCollection(
+                name, self._collection_dir(name), metadata,
+                dtype=self.dtype, rescore_factor=self.rescore_factor
+            )
+        return self.collections[name]
+
+    def delete_collection(self, name: str):
+        self.collections.pop(name, None)
+        collection_dir = self._collection_dir(name)
+        if collection_dir and os.path.exists(collection_dir):
+            shutil.rmtree(collection_dir)
+
+    def close(self):
+        """Flush journaled writes of every open collection into its snapshot"""
+        for collection in self.collections.values():
+            collection.close()
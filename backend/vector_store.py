@@ -0,0 +1,492 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import chromadb
+    CHROMADB_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"ChromaDB not available: {e}")
+    CHROMADB_AVAILABLE = False
+    chromadb = None
+
+try:
+    from sqlalchemy import create_engine, text
+    SQLALCHEMY_AVAILABLE = True
+except ImportError:
+    logger.warning("SQLAlchemy not available, pgvector backend disabled")
+    SQLALCHEMY_AVAILABLE = False
+
+from vector_index import NumpyClient
+
+VECTOR_BACKENDS = ('chroma', 'numpy', 'pgvector')
+
+
+class VectorStore(ABC):
+    """Client side of a vector backend.
+
+    Collections returned by get_or_create_collection expose the Chroma-style
+    add/query/get/delete/count surface and a `name` attribute, which is all
+    RAGEngine, PartitionedCollection and the export/re-index tools rely on.
+    """
+
+    backend = None
+
+    @abstractmethod
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None):
+        pass
+
+    @abstractmethod
+    def delete_collection(self, name: str):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    def close(self):
+        pass
+
+
+class ChromaVectorStore(VectorStore):
+    """Embedded ChromaDB directory (one process per path)"""
+
+    backend = 'chroma'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.client = chromadb.PersistentClient(path=path)
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None):
+        kwargs = {"metadata": metadata} if metadata else {}
+        return self.client.get_or_create_collection(name=name, **kwargs)
+
+    def delete_collection(self, name: str):
+        self.client.delete_collection(name=name)
+
+
+class NumpyVectorStore(NumpyClient, VectorStore):
+    """In-process NumPy index persisted under the vector DB path"""
+
+    backend = 'numpy'
+
+
+def _vector_literal(embedding) -> str:
+    return json.dumps(np.asarray(embedding, dtype=np.float32).tolist())
+
+
+def _parse_vector(value) -> Optional[List[float]]:
+    if value is None:
+        return None
+    return json.loads(value) if isinstance(value, str) else list(value)
+
+
+class _WhereCompiler:
+    """Translate a Chroma-style `where` filter into SQL over the JSONB metadata column"""
+
+    def __init__(self):
+        self.params: Dict[str, Any] = {}
+
+    def _param(self, value) -> str:
+        name = f"w{len(self.params)}"
+        self.params[name] = value
+        return f":{name}"
+
+    def _field(self, field: str, condition) -> str:
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+
+        key = None
+        clauses = []
+        for operator, operand in condition.items():
+            if operator in ('$eq', '$ne'):
+                # Containment keeps JSON types (1 != "1") and can use the GIN index
+                contains = f"metadata @> CAST({self._param(json.dumps({field: operand}))} AS jsonb)"
+                clauses.append(contains if operator == '$eq' else f"NOT ({contains})")
+            elif operator in ('$in', '$nin'):
+                key = key or self._param(field)
+                if not operand:
+                    clauses.append("FALSE" if operator == '$in' else "TRUE")
+                    continue
+                values = ", ".join(f"CAST({self._param(json.dumps(value))} AS jsonb)" for value in operand)
+                member = f"(metadata -> {key}) IN ({values})"
+                clauses.append(member if operator == '$in' else f"NOT COALESCE({member}, FALSE)")
+            elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                key = key or self._param(field)
+                sql_operator = {'$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}[operator]
+                if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+                    # CASE guards the cast: AND does not promise to short-circuit in Postgres
+                    clauses.append(
+                        f"(CASE WHEN jsonb_typeof(metadata -> {key}) = 'number' "
+                        f"THEN (metadata ->> {key})::double precision END) {sql_operator} {self._param(operand)}"
+                    )
+                else:
+                    clauses.append(f"(metadata ->> {key}) {sql_operator} {self._param(operand)}")
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+        return " AND ".join(clauses) if clauses else "TRUE"
+
+    def compile(self, where: Optional[Dict]) -> str:
+        if not where:
+            return "TRUE"
+        clauses = []
+        for key, condition in where.items():
+            if key == '$and':
+                clauses.append("(" + " AND ".join(self.compile(clause) for clause in condition) + ")")
+            elif key == '$or':
+                clauses.append("(" + " OR ".join(self.compile(clause) for clause in condition) + ")")
+            else:
+                clauses.append(self._field(key, condition))
+        return " AND ".join(clauses)
+
+
+class PgVectorCollection:
+    """Collection stored as one Postgres table with a pgvector column.
+
+    Rows are (id, document, metadata JSONB, embedding vector(dim)). The table
+    and its ANN index are created on the first add, once the dimension is
+    known. Distances are cosine distances, as in the NumPy backend.
+    """
+
+    def __init__(self, store: "PgVectorStore", name: str, table: str, dimension: Optional[int]):
+        self.store = store
+        self.name = name
+        self.table = table
+        self.dimension = dimension
+
+    def _ensure_table(self, dimension: int):
+        if self.dimension is not None:
+            if dimension != self.dimension:
+                raise ValueError(
+                    f"Collection {self.name} stores {self.dimension}-d vectors, got {dimension}-d"
+                )
+            return
+        self.store._create_table(self.name, self.table, dimension)
+        self.dimension = dimension
+
+    def _has_table(self) -> bool:
+        """Whether the table exists, checking the registry while this process has not seen it yet.
+
+        Another worker (or an earlier run) may have created the table after
+        this collection object was cached by the store.
+        """
+        if self.dimension is None:
+            self.dimension = self.store._stored_dimension(self.name)
+        return self.dimension is not None
+
+    def count(self) -> int:
+        if not self._has_table():
+            return 0
+        with self.store.engine.connect() as conn:
+            return conn.execute(text(f"SELECT COUNT(*) FROM {self.table}")).scalar_one()
+
+    def add(self, ids: List[str], embeddings, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict]] = None):
+        if not ids:
+            return
+        self._ensure_table(len(embeddings[0]))
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [{} for _ in ids]
+
+        # Multi-row VALUES: one round trip per batch instead of one per row
+        batch_size = self.store.insert_batch_size
+        with self.store.engine.begin() as conn:
+            for start in range(0, len(ids), batch_size):
+                rows, params = [], {}
+                for i in range(start, min(start + batch_size, len(ids))):
+                    rows.append(f"(:id{i}, :doc{i}, CAST(:meta{i} AS jsonb), CAST(:emb{i} AS vector))")
+                    params[f"id{i}"] = ids[i]
+                    params[f"doc{i}"] = documents[i]
+                    params[f"meta{i}"] = json.dumps(metadatas[i] or {})
+                    params[f"emb{i}"] = _vector_literal(embeddings[i])
+                conn.execute(text(
+                    f"INSERT INTO {self.table} (id, document, metadata, embedding) VALUES {', '.join(rows)} "
+                    "ON CONFLICT (id) DO NOTHING"
+                ), params)
+
+    def _columns(self, include: List[str]) -> List[str]:
+        columns = ["id"]
+        if 'documents' in include:
+            columns.append("document")
+        if 'metadatas' in include:
+            columns.append("metadata")
+        if 'embeddings' in include:
+            columns.append("embedding::text AS embedding")
+        return columns
+
+    def _search_settings(self, conn):
+        # SET LOCAL only lasts for this transaction, so pooled connections are left untouched
+        if self.store.index_type == 'hnsw':
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {int(self.store.ef_search)}"))
+            if self.store.iterative_scan:
+                conn.execute(text(f"SET LOCAL hnsw.iterative_scan = {self.store.iterative_scan}"))
+        elif self.store.index_type == 'ivfflat':
+            conn.execute(text(f"SET LOCAL ivfflat.probes = {int(self.store.probes)}"))
+            if self.store.iterative_scan:
+                conn.execute(text(f"SET LOCAL ivfflat.iterative_scan = {self.store.iterative_scan}"))
+
+    def query(self, query_embeddings=None, n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        if query_embeddings is None:
+            raise ValueError("PgVectorCollection requires query_embeddings; embed queries before querying")
+        include = include or ['documents', 'metadatas', 'distances']
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+        if not self._has_table():
+            for _ in query_embeddings:
+                for key in result:
+                    result[key].append([])
+            return {key: (value if key == "ids" or key in include else None) for key, value in result.items()}
+
+        compiler = _WhereCompiler()
+        condition = compiler.compile(where)
+        sql = text(
+            f"SELECT {', '.join(self._columns(include))}, embedding <=> CAST(:query AS vector) AS distance "
+            f"FROM {self.table} WHERE {condition} ORDER BY embedding <=> CAST(:query AS vector) LIMIT :limit"
+        )
+        with self.store.engine.begin() as conn:
+            self._search_settings(conn)
+            for query_embedding in query_embeddings:
+                rows = conn.execute(sql, dict(
+                    compiler.params, query=_vector_literal(query_embedding), limit=n_results
+                )).mappings().all()
+                result["ids"].append([row["id"] for row in rows])
+                result["distances"].append([float(row["distance"]) for row in rows])
+                result["documents"].append([row["document"] for row in rows] if 'documents' in include else None)
+                result["metadatas"].append([row["metadata"] for row in rows] if 'metadatas' in include else None)
+                result["embeddings"].append(
+                    [_parse_vector(row["embedding"]) for row in rows] if 'embeddings' in include else None
+                )
+
+        return {key: (value if key == "ids" or key in include else None) for key, value in result.items()}
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = ['documents', 'metadatas'] if include is None else include
+        result = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        if (ids is not None and not ids) or not self._has_table():
+            return {key: (value if key == "ids" or key in include else None) for key, value in result.items()}
+
+        compiler = _WhereCompiler()
+        conditions = [compiler.compile(where)]
+        params = compiler.params
+        if ids is not None:
+            conditions.append("id = ANY(:ids)")
+            params["ids"] = list(ids)
+        sql = f"SELECT {', '.join(self._columns(include))} FROM {self.table} WHERE {' AND '.join(conditions)} ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        if offset:
+            sql += " OFFSET :offset"
+            params["offset"] = offset
+
+        with self.store.engine.connect() as conn:
+            rows = conn.execute(text(sql), params).mappings().all()
+        result["ids"] = [row["id"] for row in rows]
+        if 'documents' in include:
+            result["documents"] = [row["document"] for row in rows]
+        if 'metadatas' in include:
+            result["metadatas"] = [row["metadata"] for row in rows]
+        if 'embeddings' in include:
+            result["embeddings"] = [_parse_vector(row["embedding"]) for row in rows]
+        return {key: (value if key == "ids" or key in include else None) for key, value in result.items()}
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        if (ids is None and where is None) or not self._has_table():
+            return
+        compiler = _WhereCompiler()
+        conditions = [compiler.compile(where)]
+        params = compiler.params
+        if ids is not None:
+            conditions.append("id = ANY(:ids)")
+            params["ids"] = list(ids)
+        with self.store.engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {self.table} WHERE {' AND '.join(conditions)}"), params)
+
+
+class PgVectorStore(VectorStore):
+    """Postgres + pgvector backend shared by every API worker.
+
+    Connections come from a SQLAlchemy pool. Each collection is a table
+    registered in `vector_collections`, with an HNSW (or IVFFlat) cosine index
+    on the embedding column and a GIN index on the metadata.
+    """
+
+    backend = 'pgvector'
+
+    def __init__(self, database_url: str, index_type: str = 'hnsw', pool_size: int = 5, max_overflow: int = 10,
+                 insert_batch_size: int = 500, hnsw_m: int = 16, hnsw_ef_construction: int = 64,
+                 ef_search: int = 100, ivfflat_lists: int = 100, probes: int = 10,
+                 iterative_scan: Optional[str] = None):
+        if not SQLALCHEMY_AVAILABLE:
+            raise RuntimeError("pgvector backend requires SQLAlchemy and psycopg2")
+        if index_type not in ('hnsw', 'ivfflat', 'none'):
+            raise ValueError(f"Unsupported pgvector index type: {index_type}")
+        if iterative_scan not in (None, 'relaxed_order', 'strict_order'):
+            raise ValueError(f"Unsupported pgvector iterative scan mode: {iterative_scan}")
+
+        self.index_type = index_type
+        self.insert_batch_size = insert_batch_size
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ef_search = ef_search
+        self.ivfflat_lists = ivfflat_lists
+        self.probes = probes
+        self.iterative_scan = iterative_scan
+
+        self.engine = create_engine(
+            database_url,
+            pool_pre_ping=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow
+        )
+        self._lock = threading.Lock()
+        self.collections: Dict[str, PgVectorCollection] = {}
+
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS vector_collections (
+                    name TEXT PRIMARY KEY,
+                    table_name TEXT UNIQUE NOT NULL,
+                    dimension INTEGER,
+                    metadata JSONB NOT NULL DEFAULT '{}'::jsonb
+                )
+            """))
+        logger.info(f"pgvector store initialized ({index_type} index, pool_size={pool_size})")
+
+    @staticmethod
+    def _table_name(name: str) -> str:
+        # Postgres identifiers are limited to 63 bytes; the hash keeps truncated names unique
+        slug = re.sub(r'[^a-z0-9_]', '_', name.lower())[:40]
+        return f"vec_{slug}_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+
+    def _registry_row(self, conn, name: str) -> Optional[Tuple[str, Optional[int]]]:
+        row = conn.execute(
+            text("SELECT table_name, dimension FROM vector_collections WHERE name = :name"), {"name": name}
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _stored_dimension(self, name: str) -> Optional[int]:
+        with self.engine.connect() as conn:
+            row = self._registry_row(conn, name)
+        return row[1] if row else None
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict] = None) -> PgVectorCollection:
+        with self._lock:
+            if name in self.collections:
+                return self.collections[name]
+            with self.engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO vector_collections (name, table_name, metadata)
+                    VALUES (:name, :table_name, CAST(:metadata AS jsonb))
+                    ON CONFLICT (name) DO NOTHING
+                """), {"name": name, "table_name": self._table_name(name), "metadata": json.dumps(metadata or {})})
+                table, dimension = self._registry_row(conn, name)
+            self.collections[name] = PgVectorCollection(self, name, table, dimension)
+            return self.collections[name]
+
+    def _create_table(self, name: str, table: str, dimension: int):
+        with self.engine.begin() as conn:
+            # Serialize DDL across workers that hit the first add of a collection together
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+            stored = self._registry_row(conn, name)
+            if stored and stored[1] is not None:
+                if stored[1] != dimension:
+                    raise ValueError(f"Collection {name} stores {stored[1]}-d vectors, got {dimension}-d")
+                return
+
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    seq BIGSERIAL,
+                    id TEXT PRIMARY KEY,
+                    document TEXT,
+                    metadata JSONB NOT NULL DEFAULT '{{}}'::jsonb,
+                    embedding vector({int(dimension)}) NOT NULL
+                )
+            """))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {table}_seq ON {table} (seq)"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {table}_meta ON {table} USING gin (metadata jsonb_path_ops)"))
+            if self.index_type == 'hnsw':
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {table}_ann ON {table} USING hnsw (embedding vector_cosine_ops) "
+                    f"WITH (m = {int(self.hnsw_m)}, ef_construction = {int(self.hnsw_ef_construction)})"
+                ))
+            elif self.index_type == 'ivfflat':
+                # IVFFlat centroids come from the rows present at build time; rebuild (REINDEX) after bulk loads
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {table}_ann ON {table} USING ivfflat (embedding vector_cosine_ops) "
+                    f"WITH (lists = {int(self.ivfflat_lists)})"
+                ))
+            conn.execute(
+                text("UPDATE vector_collections SET dimension = :dimension WHERE name = :name"),
+                {"dimension": int(dimension), "name": name}
+            )
+        logger.info(f"Created pgvector table {table} for collection {name} ({dimension}-d, {self.index_type})")
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            self.collections.pop(name, None)
+            with self.engine.begin() as conn:
+                row = self._registry_row(conn, name)
+                if row is None:
+                    return
+                conn.execute(text(f"DROP TABLE IF EXISTS {row[0]}"))
+                conn.execute(text("DELETE FROM vector_collections WHERE name = :name"), {"name": name})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "index_type": self.index_type,
+            "pool": self.engine.pool.status()
+        }
+
+    def close(self):
+        self.engine.dispose()
+
+
+def create_vector_store(backend: Optional[str], db_path: str) -> VectorStore:
+    """Build the vector store selected by VECTOR_BACKEND (chroma, numpy or pgvector)"""
+    backend = (backend or ('chroma' if CHROMADB_AVAILABLE else 'numpy')).lower()
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{backend}', expected one of {', '.join(VECTOR_BACKENDS)}")
+
+    if backend == 'pgvector':
+        database_url = os.getenv('PGVECTOR_URL') or os.getenv('DATABASE_URL')
+        if not database_url or not database_url.startswith('postgresql'):
+            raise RuntimeError("VECTOR_BACKEND=pgvector needs a postgresql:// PGVECTOR_URL or DATABASE_URL")
+        iterative_scan = os.getenv('PGVECTOR_ITERATIVE_SCAN', 'off').lower()
+        return PgVectorStore(
+            database_url,
+            index_type=os.getenv('PGVECTOR_INDEX', 'hnsw').lower(),
+            pool_size=int(os.getenv('PGVECTOR_POOL_SIZE', 5)),
+            max_overflow=int(os.getenv('PGVECTOR_MAX_OVERFLOW', 10)),
+            insert_batch_size=int(os.getenv('PGVECTOR_INSERT_BATCH_SIZE', 500)),
+            hnsw_m=int(os.getenv('PGVECTOR_HNSW_M', 16)),
+            hnsw_ef_construction=int(os.getenv('PGVECTOR_HNSW_EF_CONSTRUCTION', 64)),
+            ef_search=int(os.getenv('PGVECTOR_EF_SEARCH', 100)),
+            ivfflat_lists=int(os.getenv('PGVECTOR_IVFFLAT_LISTS', 100)),
+            probes=int(os.getenv('PGVECTOR_IVFFLAT_PROBES', 10)),
+            iterative_scan=None if iterative_scan == 'off' else iterative_scan
+        )
+
+    if backend == 'chroma' and CHROMADB_AVAILABLE:
+        return ChromaVectorStore(db_path)
+
+    if backend == 'chroma':
+        logger.warning("VECTOR_BACKEND=chroma but ChromaDB is not installed, using the NumPy index")
+    return NumpyVectorStore(
+        path=db_path,
+        dtype=os.getenv('VECTOR_INDEX_DTYPE', 'float32'),
+        rescore_factor=int(os.getenv('VECTOR_INDEX_RESCORE', 4))
+    )
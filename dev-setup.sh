@@ -83,7 +83,7 @@ echo ""
 echo "🚀 Next steps:"
 echo "   1. Edit .env file and add your GROQ_API_KEY"
 echo "   2. Start Neo4j: docker-compose up -d neo4j"
-echo "   3. Start backend: cd backend && source venv/bin/activate && python main.py"
+echo "   3. Start backend: cd backend && source venv/bin/activate && uvicorn main:app --reload"
 echo "   4. Start frontend: cd frontend && npm run dev"
 echo ""
 echo "🔧 Development commands:"